@@ -0,0 +1,400 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from cache import default_cache_dir
+from filterspec import FilterSpec
+from metrics import increment, timed
+from search import SearchIndex, compile_keywords, tokenize
+from store import job_key
+from text import html_to_text
+
+# Jobs read back from the store and matched per batch.
+ALERT_BATCH = 1000
+
+
+def keyword_anchors(node):
+    """Return ``(term, prefix)`` words one of which every match of ``node`` has.
+
+    Returns None when no such words exist, e.g. for ``NOT`` queries.
+    """
+    kind = node[0]
+    if kind == "phrase":
+        # Every word of a phrase must occur; the longest is the most selective.
+        return {max(node[1], key=lambda word: len(word[0]))}
+    if kind == "and":
+        options = [anchors for anchors in map(keyword_anchors, node[1:]) if anchors]
+        return min(options, key=len) if options else None
+    if kind == "or":
+        anchors = set()
+        for child in node[1:]:
+            child_anchors = keyword_anchors(child)
+            if not child_anchors:
+                return None
+            anchors |= child_anchors
+        return anchors
+    return None
+
+
+def anchors_decide(node):
+    """Whether containing one of :func:`keyword_anchors` is enough to match."""
+    if node[0] == "phrase":
+        return len(node[1]) == 1
+    return node[0] == "or" and all(map(anchors_decide, node[1:]))
+
+
+@dataclass
+class _Search:
+    """Searches with the same filters, which are matched once for all of them."""
+
+    query: tuple | None
+    remote_only: bool
+    location: str
+    job_types: tuple
+    names: set = field(default_factory=set)
+    anchors: list = field(default_factory=list)  # [(needle index, needle)]
+
+    def accepts(self, job):
+        """Check every filter but the keywords."""
+        if self.remote_only and not job.get("remote"):
+            return False
+        if (
+            self.location
+            and self.location not in (job.get("location") or "").casefold()
+        ):
+            return False
+        if self.job_types:
+            job_types = [job_type.casefold() for job_type in job.get("job_types") or ()]
+            return any(
+                needle in job_type
+                for needle in self.job_types
+                for job_type in job_types
+            )
+        return True
+
+
+def _signature(spec):
+    job_types = sorted({job_type.casefold() for job_type in spec.job_types if job_type})
+    return (
+        spec.remote_only,
+        spec.location.casefold(),
+        spec.keywords.strip(),
+        tuple(job_types),
+    )
+
+
+class _NeedleIndex:
+    """Maps strings to the searches indexed under them.
+
+    :meth:`lookup` finds every needle contained in a string by enumerating
+    its substrings of the needle lengths in use, so its cost depends on the
+    string, not on how many needles there are.
+    """
+
+    def __init__(self):
+        self.needles = {}
+        self.lengths = Counter()
+
+    def add(self, needle, search):
+        searches = self.needles.setdefault(needle, set())
+        if not searches:
+            self.lengths[len(needle)] += 1
+        searches.add(search)
+
+    def remove(self, needle, search):
+        searches = self.needles.get(needle)
+        if searches is None:
+            return
+        searches.discard(search)
+        if not searches:
+            del self.needles[needle]
+            self.lengths[len(needle)] -= 1
+            if not self.lengths[len(needle)]:
+                del self.lengths[len(needle)]
+
+    def get(self, needle):
+        return self.needles.get(needle, frozenset())
+
+    def lookup(self, text, prefixes_only=False):
+        found = set()
+        for length in self.lengths:
+            if length > len(text):
+                continue
+            starts = [0] if prefixes_only else range(len(text) - length + 1)
+            for start in starts:
+                found.update(self.needles.get(text[start : start + length], ()))
+        return found
+
+
+class QueryIndex:
+    """Standing searches indexed by what a matching job must contain.
+
+    Each search is filed under one anchor: the words its keyword query
+    cannot match without, else its location, else its job types. Searches
+    with none of these (e.g. only ``remote_only``) are checked against every
+    job, and searches with the same filters are checked once between them.
+    :meth:`match` looks up a job's candidate searches through its words,
+    location and job types, then checks only those candidates in full, so
+    matching costs grow with new jobs times candidate searches, not with the
+    total number of searches.
+    """
+
+    def __init__(self):
+        self._searches = {}  # signature -> _Search
+        self._signatures = {}  # name -> signature
+        self._terms = _NeedleIndex()
+        self._prefixes = _NeedleIndex()
+        self._locations = _NeedleIndex()
+        self._job_types = _NeedleIndex()
+        self._unanchored = set()
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def add(self, name, spec):
+        """Add or replace a search; raises :class:`search.QuerySyntaxError`."""
+        query = compile_keywords(spec.keywords) if spec.keywords.strip() else None
+        self.remove(name)
+        signature = _signature(spec)
+        self._signatures[name] = signature
+        search = self._searches.get(signature)
+        if search is not None:
+            search.names.add(name)
+            return
+        remote_only, location, _, job_types = signature
+        search = _Search(query, remote_only, location, job_types, {name})
+        words = keyword_anchors(query) if query is not None else None
+        if words:
+            for term, prefix in words:
+                index = self._prefixes if prefix else self._terms
+                search.anchors.append((index, term))
+            if anchors_decide(query):
+                # Being a candidate already means the keywords match.
+                search.query = None
+        elif location:
+            search.anchors.append((self._locations, location))
+        else:
+            search.anchors.extend((self._job_types, needle) for needle in job_types)
+        for index, needle in search.anchors:
+            index.add(needle, signature)
+        if not search.anchors:
+            self._unanchored.add(signature)
+        self._searches[signature] = search
+
+    def remove(self, name):
+        signature = self._signatures.pop(name, None)
+        if signature is None:
+            return
+        search = self._searches[signature]
+        search.names.discard(name)
+        if not search.names:
+            for index, needle in search.anchors:
+                index.remove(needle, signature)
+            self._unanchored.discard(signature)
+            del self._searches[signature]
+
+    def candidates(self, job):
+        """Return the names of the searches ``job`` might match."""
+        return {
+            name
+            for signature in self._candidates(job, _job_words(job), {})
+            for name in self._searches[signature].names
+        }
+
+    def _candidates(self, job, words, memo):
+        found = set(self._unanchored)
+        for word in words:
+            by_word = memo.get(word)
+            if by_word is None:
+                by_word = memo[word] = self._terms.get(word) | self._prefixes.lookup(
+                    word, prefixes_only=True
+                )
+            found |= by_word
+        location = (job.get("location") or "").casefold()
+        if location:
+            found |= self._locations.lookup(location)
+        for job_type in job.get("job_types") or ():
+            found |= self._job_types.lookup(job_type.casefold())
+        return found
+
+    @timed("alerts")
+    def match(self, jobs):
+        """Return ``{search name: [matching jobs]}`` for a batch of new jobs."""
+        jobs = list(jobs)
+        candidates = {}
+        memo = {}  # word -> searches, as words recur across the batch
+        for position, job in enumerate(jobs):
+            for signature in self._candidates(job, _job_words(job), memo):
+                candidates.setdefault(signature, []).append(position)
+        increment("alerts.candidates", sum(map(len, candidates.values())))
+
+        index = None
+        matches = {}
+        for signature, positions in candidates.items():
+            search = self._searches[signature]
+            matched = [jobs[position] for position in positions]
+            if search.query is not None:
+                if index is None:
+                    index = SearchIndex()
+                    index.add_jobs(jobs)
+                hits = index.search(search.query)
+                matched = [job for job in matched if job_key(job) in hits]
+            if search.remote_only or search.location or search.job_types:
+                matched = [job for job in matched if search.accepts(job)]
+            if matched:
+                for name in search.names:
+                    matches[name] = matched
+        return matches
+
+
+def _job_words(job):
+    text = job.get("description_text")
+    if text is None:
+        text = html_to_text(job.get("description") or "")
+    return set(tokenize(job.get("title") or "")) | set(tokenize(text))
+
+
+class SavedSearches:
+    """Named standing searches and the jobs they matched, kept in SQLite."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS searches (
+                name TEXT PRIMARY KEY,
+                spec TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS matches (
+                name TEXT NOT NULL,
+                job_key TEXT NOT NULL,
+                matched_at REAL NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (name, job_key)
+            ) WITHOUT ROWID;
+            """
+        )
+        self._conn.commit()
+        self._index = None
+
+    @classmethod
+    def open(cls):
+        return cls(default_cache_dir() / "searches.sqlite3")
+
+    def save(self, name, spec):
+        """Save ``spec`` (its filters; the sort order is ignored) as ``name``."""
+        spec = FilterSpec(
+            remote_only=spec.remote_only,
+            location=spec.location,
+            keywords=spec.keywords,
+            job_types=list(spec.job_types),
+        )
+        if self._index is not None:
+            self._index.add(name, spec)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO searches VALUES (?, ?, ?)",
+                (name, json.dumps(asdict(spec)), time.time()),
+            )
+            self._conn.commit()
+
+    def delete(self, name):
+        """Delete a search and its matches; return False if there was none."""
+        if self._index is not None:
+            self._index.remove(name)
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM searches WHERE name = ?", (name,))
+            self._conn.execute("DELETE FROM matches WHERE name = ?", (name,))
+            self._conn.commit()
+        return bool(cursor.rowcount)
+
+    def all(self):
+        """Return ``{name: FilterSpec}`` for every saved search, by name."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, spec FROM searches ORDER BY name"
+            ).fetchall()
+        return {name: FilterSpec(**json.loads(spec)) for name, spec in rows}
+
+    @property
+    def index(self):
+        """The :class:`QueryIndex` of every saved search, built on first use."""
+        if self._index is None:
+            index = QueryIndex()
+            for name, spec in self.all().items():
+                index.add(name, spec)
+            self._index = index
+        return self._index
+
+    def check(self, jobs):
+        """Match new ``jobs`` against every search and record the matches.
+
+        Returns ``{search name: [jobs]}`` holding only jobs the search had
+        not matched before, so each match is reported once.
+        """
+        matches = self.index.match(jobs)
+        now = time.time()
+        new = {}
+        with self._lock:
+            for name, matched in matches.items():
+                for job in matched:
+                    cursor = self._conn.execute(
+                        "INSERT OR IGNORE INTO matches VALUES (?, ?, ?, ?)",
+                        (
+                            name,
+                            job_key(job),
+                            now,
+                            json.dumps(job, separators=(",", ":")),
+                        ),
+                    )
+                    if cursor.rowcount:
+                        new.setdefault(name, []).append(job)
+            self._conn.commit()
+        return new
+
+    def check_store(self, store, batch=ALERT_BATCH):
+        """Check the jobs added to ``store`` since the last check.
+
+        Jobs added by any process count, e.g. by the app's background syncs.
+        The position reached is kept in the store itself, so a new or rebuilt
+        store starts from its current end: the first check only records
+        where it is and reports nothing, as does saving the first search.
+        """
+        position = store.get_meta("alerts_position")
+        if position is None:
+            self.prime(store)
+            return {}
+        new = {}
+        while added := store.load_added(after=position, limit=batch):
+            for name, jobs in self.check(job for _, job in added).items():
+                new.setdefault(name, []).extend(jobs)
+            position = added[-1][0]
+            store.set_meta("alerts_position", position)
+        return new
+
+    def prime(self, store):
+        """Start checking ``store`` from its current end, if not started yet."""
+        if store.get_meta("alerts_position") is None:
+            store.set_meta("alerts_position", store.position())
+
+    def matches(self, name, limit=None):
+        """Return the jobs ``name`` matched, most recently matched first."""
+        query = (
+            "SELECT data FROM matches WHERE name = ? ORDER BY matched_at DESC, job_key"
+        )
+        params = (name,)
+        if limit is not None:
+            query += " LIMIT ?"
+            params += (limit,)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [json.loads(data) for (data,) in rows]
@@ -1,76 +1,91 @@
+import math
+import os
+from dataclasses import replace
 from datetime import datetime
+from itertools import islice
 
 import altair as alt  # Added import for Altair
+import numpy as np
 import pandas as pd
+import requests
 import streamlit as st  # type: ignore
-from bs4 import BeautifulSoup  # type: ignore
-
-from jobs import fetch_jobs
-
-GERMAN_CITIES = {
-    "berlin": (52.5200, 13.4050),
-    "hamburg": (53.5500, 10.0000),
-    "munich": (48.1375, 11.5750),
-    "münchen": (48.1375, 11.5750),
-    "cologne": (50.9364, 6.9528),
-    "köln": (50.9364, 6.9528),
-    "frankfurt": (50.1106, 8.6822),
-    "frankfurt am main": (50.1106, 8.6822),
-    "stuttgart": (48.7775, 9.1800),
-    "düsseldorf": (51.2333, 6.7833),
-    "leipzig": (51.3400, 12.3750),
-    "dortmund": (51.5139, 7.4653),
-    "essen": (51.4508, 7.0131),
-    "bremen": (53.0758, 8.8072),
-    "dresden": (51.0500, 13.7400),
-    "hannover": (52.3744, 9.7386),
-    "nuremberg": (49.4528, 11.0778),
-    "nürnberg": (49.4528, 11.0778),
-    "duisburg": (51.4333, 6.7667),
-    "bochum": (51.4819, 7.2169),
-    "wuppertal": (51.2500, 7.1833),
-    "bielefeld": (52.0167, 8.5333),
-    "bonn": (50.7333, 7.1000),
-    "münster": (51.9625, 7.6253),
-    "karlsruhe": (49.0097, 8.4047),
-    "mannheim": (49.4875, 8.4661),
-    "augsburg": (48.3717, 10.8983),
-    "wiesbaden": (50.0833, 8.2500),
-    "gelsenkirchen": (51.5167, 7.1000),
-    "mönchengladbach": (51.1967, 6.4417),
-    "braunschweig": (52.2667, 10.5167),
-    "chemnitz": (50.8333, 12.9167),
-    "kiel": (54.3233, 10.1394),
-    "aachen": (50.7756, 6.0836),
-    "halle": (51.4833, 11.9667),
-    "magdeburg": (52.1333, 11.6167),
-    "freiburg": (47.9961, 7.8494),
-    "krefeld": (51.3333, 6.5667),
-    "mainz": (50.0000, 8.2667),
-    "lübeck": (53.8667, 10.6833),
-    "oberhausen": (51.4667, 6.8667),
-    "rostock": (54.0833, 12.1333),
-    "kassel": (51.3167, 9.5000),
-    "hagen": (51.3500, 7.4667),
-    "hamm": (51.6833, 7.8167),
-    "saarbrücken": (49.2333, 7.0000),
-    "potsdam": (52.4000, 13.0667),
-    "ludwigshafen": (49.4833, 8.4333),
-    "oldenburg": (53.1333, 8.2167),
-    "leverkusen": (51.0333, 6.9833),
-    "osnabrück": (52.2667, 8.0500),
-    "solingen": (51.1667, 7.0833),
-    "heidelberg": (49.4122, 8.7094),
-    "darmstadt": (49.8728, 8.6511),
-}
+
+from dedupe import collapse_rows
+from filters import facet_counts, filter_rows, iter_ranked_rows
+from filterspec import SORT_LABELS, FilterSpec
+from jobs import get_cache, get_store, sync_if_stale
+from jobtable import JobTable
+from locations import load_gazetteer
+from metrics import registry, serve, span, timed
+from search import QuerySyntaxError, SearchIndex
+
+CARDS_PER_PAGE_OPTIONS = [10, 20, 50, 100]
+DEFAULT_CARDS_PER_PAGE = 20
+TOP_FACET_VALUES = 8
+TOP_INSIGHT_VALUES = 5
+# Set to a port number to expose Prometheus metrics at http://host:port/metrics.
+METRICS_PORT_ENV = "REMOTEJOBS_METRICS_PORT"
 
 st.set_page_config(page_title="Remote Jobs", page_icon="💼", layout="wide")
 
 
-@st.cache_data(ttl=3600)  # Cache data for 1 hour
-def cached_fetch_jobs(page=1):
-    """Fetch and cache jobs data for a specific page."""
-    return fetch_jobs(page=page)
+@st.cache_resource
+def get_search_index():
+    """The keyword index over the job store, shared by every session."""
+    return SearchIndex()
+
+
+@st.cache_resource(max_entries=1)
+def load_dataset(job_count):
+    """Every job in the local store as one JobTable, shared by every session.
+
+    ``job_count`` stands for the store's contents: a sync that merges new
+    jobs changes it and the table is rebuilt. Jobs that are already in the
+    search index are not indexed again.
+    """
+    with span("store"):
+        jobs = get_store().load_jobs()
+    table = JobTable.from_records(jobs)
+    get_search_index().add_table(table)
+    return table
+
+
+def cache_stats():
+    cache = get_cache()
+    return cache.stats() if cache else None
+
+
+@st.cache_resource
+def start_metrics_server(port):
+    """Serve the metrics registry to a Prometheus scraper, once per process."""
+    return serve(port, cache_stats=cache_stats)
+
+
+def sync_or_warn(sync):
+    """Run ``sync``; if a job board cannot be read, keep the stored jobs."""
+    try:
+        return sync()
+    except requests.RequestException as e:
+        st.warning(f"Could not reach the job board; showing stored jobs. ({e})")
+    except ValueError as e:
+        # E.g. a board sending a malformed page.
+        st.warning(f"Could not read the job board; showing stored jobs. ({e})")
+    return None
+
+
+def sync_now():
+    """Sync with the job boards now, unless another process already is.
+
+    The sync takes the store's sync lease like the hourly one, so replicas
+    sharing the store never sync with the API at the same time.
+    """
+    result = sync_if_stale(max_age=0)
+    if result is None:
+        st.info(
+            "Another app process is already syncing with the job boards; "
+            "its new jobs will show up on the next refresh."
+        )
+    return result
 
 
 def get_time_difference(past_time):
@@ -102,29 +117,278 @@ def show_placeholder_cards(num=3):
         st.write("")
 
 
-def find_german_city_in_location(location_str, german_cities_dict):
-    """Find a German city in a location string."""
-    if pd.isna(location_str):
-        return None
+def render_job_card(row, tag_style):
+    """Render one job card; the full description is only built on request."""
+    with st.container(border=True):
+        st.markdown(f"### **{row['title']}**")
+        st.markdown(
+            (f"<small>at *{row['company_name']}* | 📍 {row['location']}</small>"),
+            unsafe_allow_html=True,
+        )
+
+        # --- Tags ---
+        tags = []
+        if row.get("remote"):
+            tags.append("🌎 Remote")
+        if row.get("job_types"):
+            tags.extend(t for t in row["job_types"] if t)  # Ensure no empty tags
+        if row.get("similar"):
+            tags.append(f"🧬 {row['similar']} similar")
+
+        if tags:
+            tag_html = "".join(
+                f'<span style="{tag_style}">{tag}</span>' for tag in tags
+            )
+            st.markdown(tag_html, unsafe_allow_html=True)
+
+        preview_text = row["preview"]
+        st.markdown(
+            f"<div style='margin-top: 10px;'>{preview_text}...</div>",
+            unsafe_allow_html=True,
+        )
+
+        if st.toggle("Show full details", key=f"details_{row['slug']}"):
+            if "created_at" in row and pd.notna(row["created_at"]):
+                posted_date = pd.to_datetime(row["created_at"], unit="s").strftime(
+                    "%Y-%m-%d"
+                )
+                st.markdown(f"**📅 Posted on:** {posted_date}")
+            if row.get("source") and pd.notna(row["source"]):
+                st.markdown(f"**🗂️ Listed on:** {str(row['source']).title()}")
+            st.markdown(f"**🔗 [View Job]({row['url']})**")
+            st.markdown("---")
+            st.markdown(row["description_text"], unsafe_allow_html=False)
+
+
+class RankedCards:
+    """The cards of one search, ranked only as far as the user pages.
+
+    Matches are sorted a window at a time (see
+    :func:`filters.iter_ranked_rows`), and with ``collapse`` only the first
+    posting of each cluster of near-duplicates becomes a card.
+    """
+
+    def __init__(self, jobs, rows, spec, index, batch, collapse):
+        self.jobs = jobs
+        self.collapse = collapse
+        self._ranked = iter_ranked_rows(jobs, rows, spec, index, batch)
+        self._matches = []  # Ranked so far, duplicates included.
+        self._rows = []
+        self._exhausted = False
+        self.total = len(rows)
+        if collapse:
+            # Cluster sizes cover every match, not just the ranked ones.
+            self._clusters, self._sizes = np.unique(
+                jobs.clusters[rows], return_counts=True
+            )
+            self.total = len(self._clusters)
+
+    def frame(self, count):
+        """Return the first ``count`` cards as rows of the jobs frame."""
+        while len(self._rows) < count and not self._exhausted:
+            more = list(islice(self._ranked, count))
+            self._exhausted = len(more) < count
+            self._matches.extend(more)
+            self._rows = self._matches
+            if self.collapse:
+                matches = np.array(self._matches, dtype=np.int64)
+                self._rows, _ = collapse_rows(self.jobs.clusters, matches)
+        rows = self._rows[:count]
+        df = self.jobs.frame.iloc[rows]
+        if not self.collapse:
+            return df
+        positions = np.searchsorted(self._clusters, self.jobs.clusters[rows])
+        return df.assign(similar=self._sizes[positions] - 1)
+
+
+@st.fragment
+@timed("render")
+def show_job_cards(cards, tag_style):
+    """Render one window of job cards.
+
+    Moving between windows or opening a card's details only reruns this
+    fragment, not the whole script, and ranks no more matches than the
+    windows shown so far.
+    """
+    page_size = st.session_state.cards_per_page
+    num_windows = max(1, math.ceil(cards.total / page_size))
+    window = min(st.session_state.card_window, num_windows)
+    start = (window - 1) * page_size
+    end = min(start + page_size, cards.total)
+    df = cards.frame(end)
+
+    for _, row in df.iloc[start:end].iterrows():
+        render_job_card(row, tag_style)
+        st.write("")  # Add a vertical gap between cards
+
+    if num_windows > 1:
+
+        def move_window(step):
+            st.session_state.card_window = window + step
+
+        col1, col2, col3 = st.columns([1, 1, 1])
+        with col1:
+            if window > 1:
+                st.button("⬆️ Previous jobs", on_click=move_window, args=(-1,))
+        with col2:
+            st.write(f"Showing {start + 1}–{end} of {cards.total}")
+        with col3:
+            if window < num_windows:
+                st.button("More jobs ⬇️", on_click=move_window, args=(1,))
+
+
+def show_facets(facets, set_location, on_change):
+    """Sidebar job-type filter and top locations/companies with counts.
+
+    Counts cover every job in the store that matches the other filters.
+    """
+    type_counts = facets.counts("job_types")
+    selected = st.session_state.selected_job_types
+    options = [*type_counts, *(t for t in selected if t not in type_counts)]
+    st.sidebar.multiselect(
+        "📁 Job Type",
+        options=options,
+        key="selected_job_types",
+        format_func=lambda job_type: f"{job_type} ({type_counts.get(job_type, 0)})",
+        on_change=on_change,
+    )
+    with st.sidebar.expander("📊 Top locations and companies"):
+        st.markdown("**Locations**")
+        for location, count in facets.locations[:TOP_FACET_VALUES]:
+            st.button(
+                f"{location} ({count})",
+                key=f"facet_location_{location}",
+                on_click=set_location,
+                args=(location,),
+                type="tertiary",
+            )
+        st.markdown("**Companies**")
+        st.markdown(
+            "\n".join(
+                f"- {company} ({count})"
+                for company, count in facets.companies[:TOP_FACET_VALUES]
+            )
+        )
 
-    location_lower = location_str.lower()
 
-    # Sort keys by length (longest first) to prioritize more specific matches
-    # e.g., "frankfurt am main" before "frankfurt"
-    sorted_keys = sorted(german_cities_dict.keys(), key=len, reverse=True)
+@st.cache_data(max_entries=1)
+def load_insights(job_count):
+    """Top categories and locations, daily postings and jobs per city.
+
+    Everything comes from the aggregates the store keeps up to date as jobs
+    are added, so the cost does not grow with the store's history.
+    ``job_count`` stands for the store's contents, as in :func:`load_dataset`.
+    """
+    store = get_store()
+    days = pd.DataFrame(store.aggregates("day"), columns=["Day", "Jobs"])
+    if not days.empty:
+        days["Day"] = pd.to_datetime(days["Day"])
+        # Days without postings are gaps in the aggregates; show them as zero.
+        days = days.set_index("Day").asfreq("D", fill_value=0).reset_index()
+    cities = load_gazetteer().city_totals(store.aggregates("location"))
+    return {
+        "categories": store.aggregates("job_type", TOP_INSIGHT_VALUES),
+        "locations": store.aggregates("location", TOP_INSIGHT_VALUES),
+        "days": days,
+        "cities": pd.DataFrame(
+            [
+                {"lat": city.lat, "lon": city.lon, "size": count}
+                for city, count in cities.items()
+            ]
+        ),
+    }
+
+
+def top_values_chart(pairs, label):
+    data = pd.DataFrame(pairs, columns=[label, "Count"])
+    return (
+        alt.Chart(data)
+        .mark_bar()
+        .encode(
+            x="Count",
+            y=alt.Y(
+                label,
+                sort="-x",
+                axis=alt.Axis(labelAngle=0, labelLimit=300),
+            ),
+            tooltip=[label, "Count"],
+        )
+    )
 
-    for city_key in sorted_keys:
-        if city_key in location_lower:
-            # Standardize "frankfurt am main" to "frankfurt"
-            if "frankfurt" in city_key:
-                return "frankfurt"
-            return city_key
 
-    return None
+@timed("insights")
+def show_insights(job_count):
+    insights = load_insights(job_count)
+    st.caption(f"Across all {job_count} jobs in the local store.")
+    col1, col2 = st.columns(2)
+    for column, key, title, label in (
+        (col1, "categories", "Job Categories", "Category"),
+        (col2, "locations", "Job Locations", "Location"),
+    ):
+        with column, st.container(border=True):
+            st.markdown(f"##### Top {TOP_INSIGHT_VALUES} {title}")
+            if insights[key]:
+                chart = top_values_chart(insights[key], label)
+                st.altair_chart(chart, use_container_width=True)
+            else:
+                st.markdown(f"No {label.lower()} data to display.")
+
+    days = insights["days"]
+    if not days.empty:
+        st.markdown("##### Postings Over Time")
+        trend = (
+            alt.Chart(days)
+            .mark_area(opacity=0.6)
+            .encode(
+                x=alt.X("Day:T", title=None),
+                y=alt.Y("Jobs:Q", title="Jobs posted"),
+                tooltip=[alt.Tooltip("Day:T"), "Jobs"],
+            )
+        )
+        st.altair_chart(trend, use_container_width=True)
+
+    # --- Jobs Map ---
+    if not insights["cities"].empty:
+        st.divider()
+        st.markdown("##### Jobs Map")
+        st.map(insights["cities"])
+
+
+def show_diagnostics():
+    """Sidebar panel with stage timings and cache statistics for this process."""
+    stages = registry.stages()
+    reruns = next((row for row in stages if row["stage"] == "rerun"), None)
+    if reruns:
+        col1, col2 = st.sidebar.columns(2)
+        col1.metric("Last rerun", f"{reruns['last'] * 1000:.0f} ms")
+        col2.metric("Mean rerun", f"{reruns['mean'] * 1000:.0f} ms")
+    stats = cache_stats()
+    if stats:
+        st.sidebar.metric("Cache hit rate", f"{stats['hit_rate']:.0%}")
+    if stages:
+        timings = pd.DataFrame(stages).set_index("stage")
+        timings[["total", "mean", "max", "last"]] *= 1000
+        st.sidebar.dataframe(
+            timings,
+            column_config={
+                name: st.column_config.NumberColumn(f"{name} ms", format="%.1f")
+                for name in ("total", "mean", "max", "last")
+            },
+        )
+    st.sidebar.download_button(
+        "Download metrics",
+        registry.to_prometheus(stats),
+        file_name="metrics.prom",
+        mime="text/plain",
+    )
 
 
 def main():
     """Streamlit application for displaying remote jobs."""
+    port = os.environ.get(METRICS_PORT_ENV)
+    if port:
+        start_metrics_server(int(port))
+
     st.title("🚀 Latest Remote Jobs")
 
     # --- Theme Selection ---
@@ -189,7 +453,7 @@ def main():
 
     # --- Callbacks ---
     def reset_pagination():
-        st.session_state.page = 1
+        st.session_state.card_window = 1
 
     def clear_filters_func():
         st.session_state.remote_only = False
@@ -197,24 +461,28 @@ def main():
         st.session_state.keywords = ""
         st.session_state.selected_job_types = []
         st.session_state.sort_by = "Newest"
-        st.session_state.page = 1
+        st.session_state.card_window = 1
+
+    def set_location(location):
+        st.session_state.country = location
+        st.session_state.card_window = 1
 
     # --- Sidebar ---
     st.sidebar.header("Controls")
     if st.sidebar.button("Refresh Jobs"):
-        st.cache_data.clear()
-        st.session_state.page = 1
-        st.session_state.last_updated = datetime.now()
-        st.success("Cache cleared! Fetching latest jobs...")
-        st.rerun()
+        # Only pages newer than the local store are fetched and merged.
+        result = sync_or_warn(sync_now)
+        if result is not None:
+            st.session_state.card_window = 1
+            st.session_state.last_updated = datetime.now()
+            st.success(f"Found {len(result.new_jobs)} new jobs.")
+            st.rerun()
 
     st.sidebar.button("Clear Filters", type="secondary", on_click=clear_filters_func)
 
     st.sidebar.divider()
 
-    # Initialize session state for page number and filters
-    if "page" not in st.session_state:
-        st.session_state.page = 1
+    # Initialize session state for filters
     if "country" not in st.session_state:
         st.session_state.country = ""
     if "keywords" not in st.session_state:
@@ -225,17 +493,30 @@ def main():
         st.session_state.remote_only = False
     if "sort_by" not in st.session_state:
         st.session_state.sort_by = "Newest"
+    if "card_window" not in st.session_state:
+        st.session_state.card_window = 1
+    if "cards_per_page" not in st.session_state:
+        st.session_state.cards_per_page = DEFAULT_CARDS_PER_PAGE
     if "last_updated" not in st.session_state:
         st.session_state.last_updated = datetime.now()
+    if "collapse_similar" not in st.session_state:
+        st.session_state.collapse_similar = True
 
     # --- Main Page Global Controls ---
     col1, col2 = st.columns(2)
     with col1:
         st.checkbox("🌎 Remote Only", key="remote_only", on_change=reset_pagination)
+        remote_count = st.empty()
+        st.checkbox(
+            "🧬 Collapse similar postings",
+            key="collapse_similar",
+            on_change=reset_pagination,
+            help="Show reposts and the same role in several cities as one card.",
+        )
     with col2:
         st.selectbox(
             "Sort by",
-            options=["Newest", "Oldest", "Company Name"],
+            options=list(SORT_LABELS),
             key="sort_by",
             on_change=reset_pagination,
         )
@@ -244,7 +525,16 @@ def main():
     st.sidebar.subheader("Filter")
     st.sidebar.text_input("📍 Location", key="country", on_change=reset_pagination)
     st.sidebar.text_input(
-        "🔑 Keywords (comma-separated)", key="keywords", on_change=reset_pagination
+        "🔑 Keywords (comma-separated)",
+        key="keywords",
+        on_change=reset_pagination,
+        help='Also accepts AND/OR/NOT, "quoted phrases" and prefix* terms.',
+    )
+    st.sidebar.selectbox(
+        "🗂️ Jobs per page",
+        options=CARDS_PER_PAGE_OPTIONS,
+        key="cards_per_page",
+        on_change=lambda: st.session_state.update(card_window=1),
     )
 
     # --- Main Content Area ---
@@ -253,187 +543,64 @@ def main():
         show_placeholder_cards()
 
     try:
-        # Fetch data
-        first_page_jobs = cached_fetch_jobs(page=1)
-        all_job_types = []
-        if first_page_jobs:
-            first_page_df = pd.DataFrame(first_page_jobs)
-            all_job_types = first_page_df["job_types"].explode().str.strip().unique()
-            all_job_types = [job_type for job_type in all_job_types if job_type]
-
-        st.sidebar.multiselect(
-            "📁 Job Type",
-            options=all_job_types,
-            key="selected_job_types",
-            on_change=reset_pagination,
-        )
-
-        jobs = cached_fetch_jobs(page=st.session_state.page)
+        # Merge new postings into the local store at most once an hour.
+        result = sync_or_warn(sync_if_stale)
+        if result is not None and result.new_jobs:
+            st.session_state.last_updated = datetime.now()
+        jobs = load_dataset(get_store().count())
 
-        # Now that data is fetched, clear the placeholder
+        # Now that data is loaded, clear the placeholder
         placeholder.empty()
 
-        if jobs:
-            df = pd.DataFrame(jobs)
-
-            # Apply filters from session state
-            if st.session_state.remote_only:
-                df = df[df["remote"]]
-            if st.session_state.country:
-                df = df[
-                    df["location"].str.contains(
-                        st.session_state.country, case=False, na=False
-                    )
-                ]
-
-            if st.session_state.keywords:
-                keyword_list = [
-                    k.strip().lower() for k in st.session_state.keywords.split(",")
-                ]
-                df = df[
-                    df.apply(
-                        lambda row: any(
-                            k in row["title"].lower() or k in row["description"].lower()
-                            for k in keyword_list
-                        ),
-                        axis=1,
-                    )
-                ]
-
-            if st.session_state.selected_job_types:
-                df = df[
-                    df["job_types"].apply(
-                        lambda x: any(
-                            item in st.session_state.selected_job_types for item in x
-                        )
-                    )
-                ]
-
-            # Apply sorting
-            if st.session_state.sort_by == "Newest" and "created_at" in df.columns:
-                df = df.sort_values(by="created_at", ascending=False)
-            elif st.session_state.sort_by == "Oldest" and "created_at" in df.columns:
-                df = df.sort_values(by="created_at", ascending=True)
-            elif (
-                st.session_state.sort_by == "Company Name"
-                and "company_name" in df.columns
-            ):
-                df = df.sort_values(by="company_name", ascending=True)
+        if len(jobs):
+            # Filter and sort the whole store, not just one API page.
+            spec = FilterSpec(
+                remote_only=st.session_state.remote_only,
+                location=st.session_state.country,
+                keywords=st.session_state.keywords,
+                job_types=st.session_state.selected_job_types,
+                sort_by=SORT_LABELS.get(st.session_state.sort_by),
+            )
+            index = get_search_index()
+            # Only matched here; cards are ranked as far as the user pages.
+            unsorted = replace(spec, sort_by=None)
+            try:
+                rows = filter_rows(jobs, unsorted, index)
+            except QuerySyntaxError as e:
+                st.warning(f"Ignoring keywords: {e}")
+                spec = replace(spec, keywords="")
+                rows = filter_rows(jobs, replace(unsorted, keywords=""), index)
+            if spec.sort_by == "relevance" and not spec.keywords:
+                st.caption("Enter keywords to rank by best match; newest first.")
+            matched = len(rows)
+            cards = RankedCards(
+                jobs,
+                rows,
+                spec,
+                index,
+                batch=st.session_state.card_window * st.session_state.cards_per_page,
+                collapse=st.session_state.collapse_similar,
+            )
+            facets = facet_counts(jobs, spec, index)
+            show_facets(facets, set_location, reset_pagination)
+            remote_count.caption(f"{facets.remote} remote jobs")
 
             # --- Status Line ---
             update_time_str = get_time_difference(st.session_state.last_updated)
-            st.markdown(f"**{len(df)} jobs** • Page {st.session_state.page}")
+            status = f"**{matched} jobs** match out of {len(jobs)}"
+            if cards.total < matched:
+                status += f" • {matched - cards.total} similar postings collapsed"
+            st.markdown(status)
             st.markdown(f"Updated {update_time_str}")
             st.divider()
 
             # --- Insights Section ---
-            if not df.empty:
-                st.write(f"Total jobs fetched: {len(df)}") # Debug print
-
-
-
-                with st.expander("Insights", expanded=False):
-                    col1, col2 = st.columns(2)
-
-                    with col1:
-                        with st.container(border=True):
-                            st.markdown("##### Top 5 Job Categories")
-                            job_types_series = df["job_types"].explode().str.strip()
-                            job_types_series = job_types_series[job_types_series != ""]
-
-                            if not job_types_series.empty:
-                                top_categories = (
-                                    job_types_series.value_counts().nlargest(5)
-                                )
-
-                                chart_data = top_categories.reset_index()
-                                chart_data.columns = ["Category", "Count"]  # type: ignore
-
-                                chart = (
-                                    alt.Chart(chart_data)
-                                    .mark_bar()
-                                    .encode(
-                                        x="Count",
-                                        y=alt.Y(
-                                            "Category",
-                                            sort="-x",
-                                            axis=alt.Axis(labelAngle=0, labelLimit=300),
-                                        ),
-                                        tooltip=["Category", "Count"],
-                                    )
-                                )
-                                st.altair_chart(chart, use_container_width=True)
-                            else:
-                                st.markdown("No category data to display.")
-
-                    with col2:
-                        with st.container(border=True):
-                            st.markdown("##### Top 5 Job Locations")
-                            locations_series = df["location"].dropna()
-                            locations_series = locations_series[locations_series != ""]
-
-                            if not locations_series.empty:
-                                top_locations = (
-                                    locations_series.value_counts().nlargest(5)
-                                )
-
-                                loc_chart_data = top_locations.reset_index()
-                                loc_chart_data.columns = ["Location", "Count"]
-
-                                loc_chart = (
-                                    alt.Chart(loc_chart_data)
-                                    .mark_bar()
-                                    .encode(
-                                        x="Count",
-                                        y=alt.Y(
-                                            "Location",
-                                            sort="-x",
-                                            axis=alt.Axis(labelAngle=0, labelLimit=300),
-                                        ),
-                                        tooltip=["Location", "Count"],
-                                    )
-                                )
-                                st.altair_chart(loc_chart, use_container_width=True)
-                            else:
-                                st.markdown("No location data to display.")
-
-                    # --- Germany Map ---
-                    df["matched_city"] = df["location"].apply(
-                        lambda x: find_german_city_in_location(x, GERMAN_CITIES)
-                    )
-                    df_germany = df[df["matched_city"].notna()].copy()
-
-                    if not df_germany.empty:
-                        st.divider()
-                        st.markdown("##### Jobs Map - Germany")
-
-                        job_counts = (
-                            df_germany["matched_city"].value_counts().to_dict()
-                        )
-
-                        locations_to_plot = []
-                        for city, count in job_counts.items():
-                            if count > 0 and city in GERMAN_CITIES:
-                                coords = GERMAN_CITIES[city]
-                                locations_to_plot.append(
-                                    {
-                                        "lat": coords[0],
-                                        "lon": coords[1],
-                                        "size": count,
-                                    }
-                                )
-
-                        if locations_to_plot:
-                            map_df = pd.DataFrame(locations_to_plot)
-                            st.map(map_df, zoom=5)
-                        else:
-                            st.markdown(
-                                "No plottable German cities in the current results."
-                            )
-
+            # Read from the store's running aggregates, and only when asked.
+            if st.toggle("📈 Insights", key="show_insights"):
+                show_insights(len(jobs))
                 st.divider()
 
-            if df.empty:
+            if not cards.total:
                 st.warning("🤔 No jobs match your current filters.")
                 st.info(
                     "Try changing your keywords or clearing some filters "
@@ -441,78 +608,19 @@ def main():
                 )
                 st.button("Clear All Filters", on_click=clear_filters_func)
             else:
-                for index, row in df.iterrows():
-                    with st.container(border=True):
-                        st.markdown(f"### **{row['title']}**")
-                        st.markdown(
-                            (
-                                f"<small>at *{row['company_name']}* | "
-                                f"📍 {row['location']}</small>"
-                            ),
-                            unsafe_allow_html=True,
-                        )
-
-                        # --- Tags ---
-                        tags = []
-                        if row.get("remote"):
-                            tags.append("🌎 Remote")
-                        if row.get("job_types"):
-                            tags.extend(
-                                t for t in row["job_types"] if t
-                            )  # Ensure no empty tags
-
-                        if tags:
-                            tag_html = "".join(
-                                f'<span style="{tag_style}">{tag}</span>'
-                                for tag in tags
-                            )
-                            st.markdown(tag_html, unsafe_allow_html=True)
-
-                        soup = BeautifulSoup(row["description"], "lxml")
-                        description_text = soup.get_text()
-                        preview_text = description_text[:200].strip()
-                        st.markdown(
-                            f"<div style='margin-top: 10px;'>{preview_text}...</div>",
-                            unsafe_allow_html=True,
-                        )
-
-                        with st.expander("Show full details"):
-                            if "created_at" in row and pd.notna(row["created_at"]):
-                                posted_date = pd.to_datetime(
-                                    row["created_at"], unit="s"
-                                ).strftime("%Y-%m-%d")
-                                st.markdown(f"**📅 Posted on:** {posted_date}")
-                            st.markdown(f"**🔗 [View Job]({row['url']})**")
-                            st.markdown("---")
-                            st.markdown(description_text, unsafe_allow_html=False)
-                    st.write("")  # Add a vertical gap between cards
-
-                # Pagination controls
-                col1, col2, col3 = st.columns([1, 1, 1])
-                with col1:
-                    if st.session_state.page > 1:
-                        if st.button("⬅️ Previous"):
-                            st.session_state.page -= 1
-                            st.rerun()
-                with col3:
-                    # Disable 'Next' if the current page has less than 100 jobs
-                    # (assuming 100 is a full page)
-                    if len(jobs) == 100:
-                        if st.button("Next ➡️"):
-                            st.session_state.page += 1
-                            st.rerun()
-                with col2:
-                    st.write(f"Page {st.session_state.page}")
+                show_job_cards(cards, tag_style)
 
         else:
-            st.warning("No more jobs found.")
-            if st.button("⬅️ Go Back"):
-                st.session_state.page -= 1
-                st.rerun()
+            st.warning("No jobs in the local store yet. Try refreshing.")
 
     except Exception as e:
         st.error(f"An error occurred: {e}")
 
+    st.sidebar.divider()
+    if st.sidebar.checkbox("🩺 Diagnostics", key="show_diagnostics"):
+        show_diagnostics()
+
 
 if __name__ == "__main__":
-    main()
+    with span("rerun"):
+        main()
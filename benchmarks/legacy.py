@@ -0,0 +1,96 @@
+"""Copies of the original code paths, kept as baselines for the benchmarks."""
+
+import csv
+
+import pandas as pd
+import requests
+from bs4 import BeautifulSoup  # type: ignore
+
+from locations import DEFAULT_GAZETTEER
+
+
+def fetch_jobs(api_url, page=1):
+    response = requests.get(api_url, params={"page": page})
+    response.raise_for_status()
+    return response.json().get("data", [])
+
+
+def fetch_pages_serially(api_url, max_pages):
+    jobs = []
+    for page in range(1, max_pages + 1):
+        page_jobs = fetch_jobs(api_url, page)
+        jobs.extend(page_jobs)
+        if len(page_jobs) < 100:
+            break
+    return jobs
+
+
+def filter_cli(jobs, country, keywords, job_type):
+    if country:
+        jobs = [j for j in jobs if country.lower() in j.get("location", "").lower()]
+    if keywords:
+        keywords_list = [k.strip().lower() for k in keywords.split(",")]
+        jobs = [
+            j
+            for j in jobs
+            if any(
+                k in j.get("title", "").lower() or k in j.get("description", "").lower()
+                for k in keywords_list
+            )
+        ]
+    if job_type:
+        jobs = [
+            j
+            for j in jobs
+            if job_type in j.get("title", "").lower()
+            or job_type in j.get("description", "").lower()
+        ]
+    return jobs
+
+
+def filter_app(jobs, remote_only, country, keywords, job_types):
+    df = pd.DataFrame(jobs)
+    if remote_only:
+        df = df[df["remote"]]
+    if country:
+        df = df[df["location"].str.contains(country, case=False, na=False)]
+    if keywords:
+        keyword_list = [k.strip().lower() for k in keywords.split(",")]
+        df = df[
+            df.apply(
+                lambda row: any(
+                    k in row["title"].lower() or k in row["description"].lower()
+                    for k in keyword_list
+                ),
+                axis=1,
+            )
+        ]
+    if job_types:
+        df = df[df["job_types"].apply(lambda x: any(i in job_types for i in x))]
+    return df.sort_values(by="created_at", ascending=False)
+
+
+def german_cities():
+    with open(DEFAULT_GAZETTEER, newline="", encoding="utf-8") as f:
+        return {
+            row["name"]: (float(row["lat"]), float(row["lon"]))
+            for row in csv.DictReader(f)
+            if row["country"] == "Germany"
+        }
+
+
+def find_german_city_in_location(location_str, german_cities_dict):
+    if pd.isna(location_str):
+        return None
+    location_lower = location_str.lower()
+    sorted_keys = sorted(german_cities_dict.keys(), key=len, reverse=True)
+    for city_key in sorted_keys:
+        if city_key in location_lower:
+            if "frankfurt" in city_key:
+                return "frankfurt"
+            return city_key
+    return None
+
+
+def description_text(markup):
+    return BeautifulSoup(markup, "lxml").get_text()
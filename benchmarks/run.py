@@ -0,0 +1,542 @@
+"""Run the offline benchmark suite and compare it with the previous run.
+
+Everything runs against synthetic data and a local stand-in API server, so
+no network access is needed. Run from the repository root::
+
+    python -m benchmarks.run
+    python -m benchmarks.run --sizes 1000,100000 --only filters,locations
+
+Results are saved under ``benchmarks/results/`` and each run is compared
+with the most recent earlier result file.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+from rich.console import Console
+
+import jobs as jobs_module
+from alerts import QueryIndex
+from benchmarks import legacy
+from benchmarks.server import RemotiveStandInServer, StandInServer
+from benchmarks.synthetic import generate_jobs, generate_searches, page_payload
+from dedupe import collapse_rows, fingerprint_jobs
+from fetcher import RATE_LIMIT
+from filters import facet_counts, filter_rows
+from filterspec import FilterSpec
+from jobtable import JobTable
+from jsonstream import CHUNK_SIZE, iter_array
+from locations import load_gazetteer
+from main import write_text
+from search import SearchIndex, compile_keywords
+from snapshots import diff_snapshots, write_snapshot
+from snapshots import query as snapshot_query
+from store import JobStore
+from text import _memo as html_memo
+from text import html_to_text, prepare_jobs
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+# New jobs per alerts batch; the number of saved searches follows --sizes.
+ALERT_JOBS = 200
+# Decodes one page from a file in a fresh interpreter and prints how far its
+# peak RSS rose while decoding, in MiB. VmHWM is read rather than ru_maxrss,
+# which a child inherits from the benchmark process (Linux only).
+DECODE_MEMORY_SCRIPT = """
+import json, sys
+from jobs import slim_job
+from dedupe import fingerprint_jobs
+from jsonstream import CHUNK_SIZE, iter_array
+from text import prepare_jobs
+
+def peak_kib():
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmHWM"))
+
+def chunks():
+    with open(sys.argv[1], "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            yield chunk
+
+before = peak_kib()
+if sys.argv[2] == "stream":
+    jobs = [slim_job(job) for job in iter_array(chunks())]
+else:
+    jobs = fingerprint_jobs(prepare_jobs(json.loads(b"".join(chunks()))["data"]))
+print((peak_kib() - before) / 1024)
+"""
+REGRESSION_THRESHOLD = 0.20  # flag cases that got more than 20% slower
+
+
+def best_of(fn, repeat):
+    return min(timeit.repeat(fn, number=1, repeat=repeat))
+
+
+def fresh_jobs(jobs):
+    """Copy raw job dicts so memoized/derived fields don't leak between cases."""
+    return [dict(job) for job in jobs]
+
+
+def bench_filters(jobs, repeat):
+    spec = FilterSpec(
+        remote_only=True,
+        location="berlin",
+        keywords="kubernetes, sql",
+        job_types=["internship"],
+        sort_by="newest",
+    )
+    relevance = FilterSpec(keywords="python, data", sort_by="relevance")
+    table = JobTable.from_records(fresh_jobs(jobs))
+    index = SearchIndex()
+    index.add_table(table)
+    return {
+        "legacy main.py list passes": best_of(
+            lambda: legacy.filter_cli(jobs, "berlin", "kubernetes, sql", "internship"),
+            repeat,
+        ),
+        "legacy app.py df.apply": best_of(
+            lambda: legacy.filter_app(
+                jobs, True, "berlin", "kubernetes, sql", ["internship"]
+            ),
+            repeat,
+        ),
+        "JobTable.from_records": best_of(
+            lambda: JobTable.from_records(fresh_jobs(jobs)), repeat
+        ),
+        "filter_rows": best_of(lambda: filter_rows(table, spec, index), repeat),
+        "facet_counts": best_of(lambda: facet_counts(table, spec, index), repeat),
+        "filter_rows relevance top 20": best_of(
+            lambda: filter_rows(table, relevance, index, limit=20), repeat
+        ),
+    }
+
+
+def bench_search(jobs, repeat):
+    table = JobTable.from_records(fresh_jobs(jobs))
+    index = SearchIndex()
+    index.add_table(table)
+    query = compile_keywords('python AND "data scientist" -junior')
+
+    def build():
+        SearchIndex().add_table(table)
+
+    return {
+        "index build": best_of(build, max(1, repeat // 2)),
+        "boolean query": best_of(lambda: index.search(query), repeat),
+    }
+
+
+def bench_alerts(jobs, repeat):
+    """Match one batch of new jobs against as many saved searches as jobs."""
+    specs = [FilterSpec(**search) for search in generate_searches(len(jobs))]
+    new_jobs = prepare_jobs(fresh_jobs(jobs[:ALERT_JOBS]))
+    table = JobTable.from_records(new_jobs)
+
+    def build():
+        index = QueryIndex()
+        for n, spec in enumerate(specs):
+            index.add(n, spec)
+        return index
+
+    def every_search():
+        index = SearchIndex()
+        index.add_table(table)
+        return [filter_rows(table, spec, index) for spec in specs]
+
+    index = build()
+    return {
+        "QueryIndex build": best_of(build, max(1, repeat // 2)),
+        f"QueryIndex.match {ALERT_JOBS} new jobs": best_of(
+            lambda: index.match(new_jobs), repeat
+        ),
+        f"filter_rows per search, {ALERT_JOBS} new jobs": best_of(
+            every_search, max(1, repeat // 2)
+        ),
+    }
+
+
+def bench_locations(jobs, repeat):
+    cities = legacy.german_cities()
+    locations = [job["location"] for job in jobs]
+    table = JobTable.from_records(fresh_jobs(jobs))
+
+    def gazetteer_counts():
+        gazetteer = load_gazetteer()
+        gazetteer.resolve.cache_clear()
+        gazetteer.city_counts(table.locations, table.location_codes)
+
+    return {
+        "legacy find_german_city_in_location": best_of(
+            lambda: [legacy.find_german_city_in_location(x, cities) for x in locations],
+            repeat,
+        ),
+        "Gazetteer.city_counts": best_of(gazetteer_counts, repeat),
+    }
+
+
+def bench_html(jobs, repeat):
+    descriptions = [job["description"] for job in jobs]
+    warm = fresh_jobs(jobs)
+    prepare_jobs(warm)
+    return {
+        "legacy BeautifulSoup get_text": best_of(
+            lambda: [legacy.description_text(d) for d in descriptions],
+            max(1, repeat // 2),
+        ),
+        "html_to_text": best_of(
+            lambda: [html_to_text(d) for d in descriptions], repeat
+        ),
+        "prepare_jobs (memoized)": best_of(
+            lambda: prepare_jobs(fresh_jobs(jobs)), repeat
+        ),
+    }
+
+
+def bench_dedupe(jobs, repeat):
+    table = JobTable.from_records(fresh_jobs(jobs))
+    rows = np.arange(len(table))
+    return {
+        "fingerprint_jobs": best_of(lambda: fingerprint_jobs(fresh_jobs(jobs)), repeat),
+        "JobTable.clusters": best_of(lambda: JobTable.clusters.func(table), repeat),
+        "collapse_rows": best_of(lambda: collapse_rows(table.clusters, rows), repeat),
+    }
+
+
+def bench_snapshots(jobs, repeat):
+    """Open and query a snapshot, against loading the same jobs from the store."""
+    table = JobTable.from_records(fresh_jobs(jobs))
+    spec = FilterSpec(location="berlin", keywords="kubernetes")
+    with tempfile.TemporaryDirectory() as directory:
+        store = JobStore(Path(directory) / "jobs.sqlite3")
+        store.add(table.records())
+        old = write_snapshot(
+            table, directory, datetime(2026, 1, 1, tzinfo=timezone.utc)
+        )
+        new = write_snapshot(
+            JobTable.from_records(table.records()[10:]),
+            directory,
+            datetime(2026, 1, 2, tzinfo=timezone.utc),
+        )
+        return {
+            "write_snapshot": best_of(
+                lambda: write_snapshot(table, directory), max(1, repeat // 2)
+            ),
+            "JobTable from JobStore": best_of(
+                lambda: JobTable.from_records(store.load_jobs()), max(1, repeat // 2)
+            ),
+            "JobTable from snapshot": best_of(
+                lambda: JobTable.from_arrow(new.read()), repeat
+            ),
+            "query location + keywords": best_of(
+                lambda: snapshot_query(new, spec, ["slug", "title"]), repeat
+            ),
+            "diff_snapshots": best_of(lambda: diff_snapshots(old, new), repeat),
+        }
+
+
+def page_chunks(jobs):
+    """One API page holding every job, split as a streamed response would be."""
+    body = json.dumps(page_payload(jobs, 1, len(jobs), "http://stand-in")).encode()
+    return [body[i : i + CHUNK_SIZE] for i in range(0, len(body), CHUNK_SIZE)]
+
+
+def bench_decode(jobs, repeat):
+    chunks = page_chunks(jobs)
+
+    # The HTML memo is cleared so that every run converts descriptions. Both
+    # ways fingerprint each job, as slim_job does while streaming.
+    def whole_page():
+        html_memo.clear()
+        fingerprint_jobs(prepare_jobs(json.loads(b"".join(chunks))["data"]))
+
+    def first_record():
+        html_memo.clear()
+        jobs_module.slim_job(next(iter_array(chunks)))
+
+    def streamed_page():
+        html_memo.clear()
+        [jobs_module.slim_job(job) for job in iter_array(chunks)]
+
+    return {
+        "json.loads + prepare + fingerprint (first record)": best_of(
+            whole_page, repeat
+        ),
+        "streaming first record": best_of(first_record, repeat),
+        "streaming whole page": best_of(streamed_page, repeat),
+    }
+
+
+def decode_memory(jobs):
+    """Peak RSS growth in MiB of decoding one page of ``jobs`` both ways."""
+    root = Path(__file__).resolve().parent.parent
+    with tempfile.NamedTemporaryFile(suffix=".json") as f:
+        f.write(b"".join(page_chunks(jobs)))
+        f.flush()
+        return {
+            case: float(
+                subprocess.run(
+                    [sys.executable, "-c", DECODE_MEMORY_SCRIPT, f.name, mode],
+                    cwd=root,
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                ).stdout
+            )
+            for case, mode in (
+                ("json.loads + prepare + fingerprint", "whole"),
+                ("streaming", "stream"),
+            )
+        }
+
+
+def bench_render(jobs, repeat):
+    records = JobTable.from_records(fresh_jobs(jobs[:1000])).records()
+    console = Console(file=io.StringIO(), width=120)
+    results = {}
+    for limit in (10, len(records)):
+        results[f"show_jobs top {limit}"] = best_of(
+            lambda limit=limit: jobs_module.show_jobs(
+                records, limit=limit, console=console
+            ),
+            repeat,
+        )
+        results[f"plain text top {limit}"] = best_of(
+            lambda limit=limit: write_text(records[:limit], io.StringIO(), "Jobs"),
+            repeat,
+        )
+    return results
+
+
+def bench_startup(repeat):
+    """Wall time of fresh interpreters starting the CLI."""
+    root = Path(__file__).resolve().parent.parent
+
+    def run(*argv):
+        subprocess.run(
+            [sys.executable, *argv], cwd=root, capture_output=True, check=True
+        )
+
+    return {
+        "python baseline": best_of(lambda: run("-c", "pass"), repeat),
+        "main.py --help": best_of(lambda: run("main.py", "--help"), repeat),
+    }
+
+
+@contextmanager
+def stand_in_api(jobs, latency):
+    """Point ``jobs.API_URL`` and the response cache at throwaway stand-ins."""
+    with (
+        StandInServer(jobs, latency=latency) as server,
+        tempfile.TemporaryDirectory() as cache_dir,
+        patch.dict(
+            os.environ,
+            # Unthrottled, to compare with the legacy fetch loop.
+            {"REMOTEJOBS_CACHE_DIR": cache_dir, "REMOTEJOBS_RATE_LIMIT": "0"},
+        ),
+        patch.object(jobs_module, "API_URL", server.url),
+    ):
+        os.environ.pop("REMOTEJOBS_NO_CACHE", None)
+        jobs_module._cache = None
+        jobs_module._fetchers.clear()
+        try:
+            yield server
+        finally:
+            jobs_module._cache = None
+            jobs_module._fetchers.clear()
+
+
+def bench_fetch(pages, latency, repeat):
+    jobs = generate_jobs(pages * 100)
+    boards = [jobs_module.Arbeitnow(), jobs_module.Remotive()]
+    with (
+        stand_in_api(jobs, latency) as server,
+        RemotiveStandInServer(generate_jobs(pages * 100, seed=1), latency) as remotive,
+        patch.object(jobs_module, "REMOTIVE_URL", remotive.url),
+    ):
+
+        def cold_cache_hit():
+            # A new process: reopen the on-disk cache, then read one page.
+            jobs_module._cache = None
+            jobs_module.fetch_jobs(page=1)
+
+        def throttled(sources):
+            # Each run starts with full token buckets at the default rate.
+            jobs_module._fetchers.clear()
+            with patch.dict(os.environ, {"REMOTEJOBS_RATE_LIMIT": str(RATE_LIMIT)}):
+                jobs_module.fetch_all_jobs(use_cache=False, sources=sources)
+            jobs_module._fetchers.clear()
+
+        jobs_module.fetch_jobs(page=1)
+        return {
+            "legacy serial requests.get": best_of(
+                lambda: legacy.fetch_pages_serially(server.url, pages), repeat
+            ),
+            "fetch_all_jobs (pooled, concurrent)": best_of(
+                lambda: jobs_module.fetch_all_jobs(use_cache=False), repeat
+            ),
+            "fetch_jobs from disk cache": best_of(cold_cache_hit, repeat),
+            "fetch_all_jobs, two boards one after the other": best_of(
+                lambda: [
+                    jobs_module.fetch_all_jobs(use_cache=False, sources=[board])
+                    for board in boards
+                ],
+                repeat,
+            ),
+            "fetch_all_jobs, two boards concurrently": best_of(
+                lambda: jobs_module.fetch_all_jobs(use_cache=False, sources=boards),
+                repeat,
+            ),
+            "fetch_all_jobs, two boards concurrently, rate limited": best_of(
+                lambda: throttled(boards), repeat
+            ),
+        }
+
+
+SUITES = {
+    "filters": bench_filters,
+    "search": bench_search,
+    "alerts": bench_alerts,
+    "locations": bench_locations,
+    "html": bench_html,
+    "dedupe": bench_dedupe,
+    "snapshots": bench_snapshots,
+    "decode": bench_decode,
+    "render": bench_render,
+}
+# Suites that do not depend on the dataset size.
+EXTRA = ("fetch", "startup")
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def previous_results():
+    files = sorted(RESULTS_DIR.glob("*.json"))
+    if not files:
+        return None, {}
+    return files[-1].name, json.loads(files[-1].read_text())["results"]
+
+
+def report(results, previous_name, previous):
+    regressions = []
+    header = f"{'case':<60} {'ms':>10}"
+    if previous:
+        header += f" {'previous':>10} {'change':>8}"
+        print(f"Comparing with {previous_name}")
+    print(header)
+    for case, seconds in results.items():
+        line = f"{case:<60} {seconds * 1000:>10.2f}"
+        if case in previous:
+            before = previous[case]
+            change = (seconds - before) / before if before else 0.0
+            line += f" {before * 1000:>10.2f} {change:>+8.0%}"
+            if change > REGRESSION_THRESHOLD:
+                line += "  REGRESSION"
+                regressions.append(case)
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline benchmarks.")
+    parser.add_argument(
+        "--sizes",
+        default="1000,10000",
+        help="Comma-separated dataset sizes (default: 1000,10000).",
+    )
+    parser.add_argument(
+        "--only",
+        help=f"Comma-separated suites to run ({', '.join([*SUITES, *EXTRA])}).",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--fetch-pages", type=int, default=10, help="Pages served by the stand-in."
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.05,
+        help="Seconds of simulated latency per API request (default: 0.05).",
+    )
+    parser.add_argument(
+        "--no-save", action="store_true", help="Don't write a results file."
+    )
+    parser.add_argument(
+        "--fail-on-regression",
+        action="store_true",
+        help="Exit with status 1 if any case regressed.",
+    )
+    args = parser.parse_args()
+
+    selected = set(args.only.split(",")) if args.only else {*SUITES, *EXTRA}
+    results = {}
+    memory = {}
+    for size in (int(size) for size in args.sizes.split(",")):
+        jobs = generate_jobs(size)
+        for name, suite in SUITES.items():
+            if name in selected:
+                for case, seconds in suite(jobs, args.repeat).items():
+                    results[f"{name}/{case} @{size}"] = seconds
+        if "decode" in selected:
+            for case, mib in decode_memory(jobs).items():
+                memory[f"decode/{case} peak RSS @{size}"] = mib
+    if "fetch" in selected:
+        fetch_results = bench_fetch(args.fetch_pages, args.latency, args.repeat)
+        for case, seconds in fetch_results.items():
+            key = f"fetch/{case} @{args.fetch_pages}p/{args.latency * 1000:.0f}ms"
+            results[key] = seconds
+    if "startup" in selected:
+        for case, seconds in bench_startup(args.repeat).items():
+            results[f"startup/{case}"] = seconds
+
+    previous_name, previous = previous_results()
+    regressions = report(results, previous_name, previous)
+    for case, mib in memory.items():
+        print(f"{case:<60} {mib:>10.1f} MiB")
+
+    if not args.no_save:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        commit = git_commit()
+        path = RESULTS_DIR / f"{stamp}-{commit}.json"
+        path.write_text(
+            json.dumps(
+                {
+                    "commit": commit,
+                    "created": time.time(),
+                    "python": platform.python_version(),
+                    "results": results,
+                    "memory_mib": memory,
+                },
+                indent=2,
+            )
+        )
+        print(f"Saved {path}")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
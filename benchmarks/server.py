@@ -0,0 +1,107 @@
+"""Local stand-ins for the job board APIs."""
+
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.synthetic import page_payload, remotive_payload
+
+API_PATH = "/api/job-board-api"
+REMOTIVE_PATH = "/api/remote-jobs"
+
+
+class StandInServer:
+    """Serves ``jobs`` in API-shaped pages on a background thread.
+
+    ``latency`` seconds are added to every response to mimic the network,
+    ``max_pages`` caps the number of non-empty pages and pages carry an
+    ``ETag`` so conditional requests get ``304 Not Modified``. Use it as a
+    context manager; :attr:`url` is the endpoint to point ``jobs.API_URL`` at.
+    """
+
+    path = API_PATH
+
+    def __init__(self, jobs, latency=0.0, page_size=100, max_pages=None):
+        self.jobs = jobs
+        self.latency = latency
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{self.path}"
+
+    def body(self, page):
+        if self.max_pages is not None and page > self.max_pages:
+            payload = page_payload([], page, self.page_size, self.url)
+        else:
+            payload = page_payload(self.jobs, page, self.page_size, self.url)
+        return json.dumps(payload).encode()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != server.path:
+                    self.send_error(404)
+                    return
+                page = int(parse_qs(url.query).get("page", ["1"])[0])
+                with server._lock:
+                    server.requests.append(page)
+                if server.latency:
+                    time.sleep(server.latency)
+                body = server.body(page)
+                etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class RemotiveStandInServer(StandInServer):
+    """Serves ``jobs`` the way Remotive does: all at once, in Remotive's fields.
+
+    Point ``jobs.REMOTIVE_URL`` at :attr:`url`.
+    """
+
+    path = REMOTIVE_PATH
+
+    def body(self, page):
+        return json.dumps(remotive_payload(self.jobs)).encode()
@@ -0,0 +1,164 @@
+"""Realistic synthetic job board payloads for benchmarks and tests."""
+
+import random
+from datetime import datetime, timezone
+
+TECH_WORDS = (
+    "python react data cloud backend frontend senior junior kubernetes sql java "
+    "go typescript devops security mobile machine learning platform"
+).split()
+# A Zipf-like vocabulary so that keywords are as selective as in real postings.
+WORDS = TECH_WORDS + [f"word{n}" for n in range(2000)]
+WEIGHTS = [1 / (rank + 20) for rank in range(len(WORDS))]
+ROLES = ["Engineer", "Developer", "Data Scientist", "Product Manager", "Designer"]
+LOCATIONS = [
+    "Berlin",
+    "Berlin, Germany",
+    "Munich",
+    "München, Bayern",
+    "Hamburg",
+    "Frankfurt am Main",
+    "Köln",
+    "Remote",
+    "Remote, Germany",
+    "Vienna, Austria",
+    "Amsterdam",
+    "London, United Kingdom",
+    "Zürich",
+    "Stuttgart",
+    "Leipzig",
+    "Düsseldorf",
+]
+JOB_TYPES = [
+    "full time",
+    "part time",
+    "internship",
+    "working student",
+    "Professional / Experienced",
+    "Berufseinstieg",
+]
+TAGS = ["IT", "Software Development", "Marketing", "Sales", "Finance", "Design"]
+
+
+def _description(rng):
+    paragraphs = [
+        " ".join(rng.choices(WORDS, WEIGHTS, k=rng.randint(30, 60)))
+        for _ in range(rng.randint(2, 4))
+    ]
+    bullets = "".join(
+        f"<li>{' '.join(rng.choices(WORDS, WEIGHTS, k=6))}</li>"
+        for _ in range(rng.randint(3, 6))
+    )
+    return (
+        f"<p><strong>{rng.choice(TECH_WORDS).title()}</strong> &amp; more</p>"
+        + "".join(f"<p>{paragraph}</p>" for paragraph in paragraphs)
+        + f"<ul>{bullets}</ul>"
+    )
+
+
+def generate_jobs(count, seed=0, start_time=1_700_000_000):
+    """Return ``count`` job dicts shaped like Arbeitnow records, newest first."""
+    rng = random.Random(seed)
+    companies = [f"Company {n}" for n in range(max(1, count // 8))]
+    jobs = []
+    for n in range(count):
+        title = f"{rng.choice(TECH_WORDS).title()} {rng.choice(ROLES)}"
+        slug = f"{title.lower().replace(' ', '-')}-{n}"
+        jobs.append(
+            {
+                "slug": slug,
+                "company_name": rng.choice(companies),
+                "title": title,
+                "description": _description(rng),
+                "remote": rng.random() < 0.4,
+                "url": f"https://www.arbeitnow.com/jobs/{slug}",
+                "tags": rng.sample(TAGS, k=rng.randint(0, 2)),
+                "job_types": rng.sample(JOB_TYPES, k=rng.randint(0, 2)),
+                "location": rng.choice(LOCATIONS),
+                "created_at": start_time - n * 37,
+            }
+        )
+    return jobs
+
+
+def page_payload(jobs, page, page_size=100, base_url=""):
+    """Build the JSON body the API returns for ``page`` of ``jobs``."""
+    start = (page - 1) * page_size
+    data = jobs[start : start + page_size]
+    has_next = start + page_size < len(jobs)
+    return {
+        "data": data,
+        "links": {
+            "first": f"{base_url}?page=1",
+            "last": None,
+            "prev": f"{base_url}?page={page - 1}" if page > 1 else None,
+            "next": f"{base_url}?page={page + 1}" if has_next else None,
+        },
+        "meta": {
+            "current_page": page,
+            "from": start + 1 if data else None,
+            "path": base_url,
+            "per_page": page_size,
+            "to": start + len(data) if data else None,
+            "terms": "This is a free public API for jobs.",
+            "info": "Synthetic payload generated for benchmarks.",
+        },
+    }
+
+
+def remotive_payload(jobs):
+    """Build the JSON body Remotive's API returns for Arbeitnow-shaped ``jobs``."""
+    return {
+        "00-warning": "Synthetic payload generated for benchmarks.",
+        "job-count": len(jobs),
+        "jobs": [
+            {
+                "id": len(jobs) - n,  # Ids grow with each new posting.
+                "url": job["url"].replace("arbeitnow.com", "remotive.com"),
+                "title": job["title"],
+                "company_name": job["company_name"],
+                "company_logo": None,
+                "category": "Software Development",
+                "tags": job["tags"],
+                "job_type": "_".join(
+                    (job["job_types"] or ["full time"])[0].lower().split()
+                ),
+                "publication_date": datetime.fromtimestamp(
+                    job["created_at"], timezone.utc
+                ).strftime("%Y-%m-%dT%H:%M:%S"),
+                "candidate_required_location": job["location"],
+                "salary": "",
+                "description": job["description"],
+            }
+            for n, job in enumerate(jobs)
+        ],
+    }
+
+
+def generate_searches(count, seed=0):
+    """Return ``count`` saved-search filters (``FilterSpec`` keyword arguments).
+
+    Most searches are one or two keywords, some narrowed to a place; the rest
+    are place, job type or ``OR`` searches, as users tend to save them. Saved
+    keywords are drawn evenly from the vocabulary, so most are as specific
+    as a skill or product name rather than as common as "python".
+    """
+    rng = random.Random(seed)
+    searches = []
+    for _ in range(count):
+        kind = rng.random()
+        words = rng.sample(WORDS, k=2)
+        if kind < 0.5:
+            search = {"keywords": ", ".join(words[: rng.randint(1, 2)])}
+            if rng.random() < 0.3:
+                search["location"] = rng.choice(LOCATIONS).split(",")[0]
+        elif kind < 0.65:
+            search = {"keywords": " OR ".join(words)}
+        elif kind < 0.85:
+            search = {"location": rng.choice(LOCATIONS).split(",")[0]}
+        elif kind < 0.97:
+            search = {"job_types": [rng.choice(JOB_TYPES)]}
+        else:
+            search = {"remote_only": True}
+        searches.append(search)
+    return searches
@@ -0,0 +1,155 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+DEFAULT_TTL = 3600  # seconds before a cached page must be revalidated
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def default_cache_dir():
+    """Return the cache directory, honouring ``REMOTEJOBS_CACHE_DIR``."""
+    configured = os.environ.get("REMOTEJOBS_CACHE_DIR")
+    if configured:
+        return Path(configured)
+    xdg_cache = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(xdg_cache) / "remotejobs"
+
+
+@dataclass
+class CacheEntry:
+    data: object
+    etag: str | None
+    last_modified: str | None
+    fetched_at: float
+
+    def is_fresh(self, ttl):
+        return time.time() - self.fetched_at < ttl
+
+
+class ResponseCache:
+    """SQLite-backed cache of decoded API responses, shared across processes.
+
+    Entries keep their ``ETag``/``Last-Modified`` validators so stale pages
+    can be revalidated with a conditional request instead of refetched.
+    Least recently used entries are evicted once the stored bodies exceed
+    ``max_bytes``. Hit/miss counters are kept per process.
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                body TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "revalidated": 0,
+            "stale": 0,
+            "stores": 0,
+            "evictions": 0,
+        }
+
+    def get(self, key):
+        """Return the entry stored under ``key`` (fresh or stale), or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM responses "
+                "WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            self._conn.commit()
+        body, etag, last_modified, fetched_at = row
+        return CacheEntry(json.loads(body), etag, last_modified, fetched_at)
+
+    def put(self, key, data, etag=None, last_modified=None):
+        """Store ``data`` under ``key`` and evict old entries if over budget."""
+        body = json.dumps(data, separators=(",", ":"))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, body, etag, last_modified, now, now, len(body)),
+            )
+            self._counters["stores"] += 1
+            self._evict()
+            self._conn.commit()
+
+    def touch(self, key):
+        """Mark ``key`` as freshly validated (after a 304 Not Modified)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET fetched_at = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def record(self, event):
+        """Count a cache event (``hits``, ``misses``, ``revalidated`` or ``stale``).
+
+        ``stale`` counts expired pages served because the API failed.
+        """
+        with self._lock:
+            self._counters[event] += 1
+
+    def stats(self):
+        """Return the event counters plus the current entry count and size."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            stats = dict(self._counters)
+        lookups = stats["hits"] + stats["misses"] + stats["revalidated"]
+        stats["hit_rate"] = (
+            (stats["hits"] + stats["revalidated"]) / lookups if lookups else 0.0
+        )
+        stats["entries"] = entries
+        stats["size_bytes"] = size
+        return stats
+
+    def _evict(self):
+        (total,) = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        ).fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self._counters["evictions"] += 1
@@ -0,0 +1,131 @@
+import hashlib
+
+import numpy as np
+
+from search import tokenize
+from text import html_to_text
+
+FINGERPRINT_BITS = 64
+# Description fingerprints at most this many bits apart are near-duplicates.
+# Unrelated texts differ in about 32 bits; a reworded sentence moves a few.
+MAX_DISTANCE = 7
+# Splitting the fingerprint into MAX_DISTANCE + 1 bands guarantees that two
+# fingerprints within MAX_DISTANCE bits agree exactly on at least one band.
+BANDS = MAX_DISTANCE + 1
+BAND_BITS = FINGERPRINT_BITS // BANDS
+SHINGLE_SIZE = 3
+
+
+def features(job):
+    """Return the weighted features of a posting's description: word shingles."""
+    text = job.get("description_text")
+    if text is None:
+        text = html_to_text(job.get("description") or "")
+    words = tokenize(text)
+    count = max(len(words) - SHINGLE_SIZE + 1, 1 if words else 0)
+    return dict.fromkeys(
+        (" ".join(words[i : i + SHINGLE_SIZE]) for i in range(count)), 1
+    )
+
+
+def title_key(title, location=""):
+    """Normalize a title for grouping: word set, minus words of the location.
+
+    "Backend Engineer Berlin" in Berlin and "Backend Engineer (Hamburg)" in
+    Hamburg both become "backend engineer".
+    """
+    words = set(tokenize(title or "")) - set(tokenize(location or ""))
+    return " ".join(sorted(words))
+
+
+def group_key(job):
+    """Postings are only compared with others of the same company and title."""
+    company = job.get("company_name") or ""
+    return company.casefold(), title_key(job.get("title"), job.get("location"))
+
+
+def simhash(weighted):
+    """Return the 64-bit SimHash of a ``{feature: weight}`` mapping."""
+    if not weighted:
+        return 0
+    digests = b"".join(
+        hashlib.blake2b(feature.encode(), digest_size=8).digest()
+        for feature in weighted
+    )
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8))
+    bits = bits.reshape(-1, FINGERPRINT_BITS).astype(np.int64) * 2 - 1
+    votes = np.fromiter(weighted.values(), dtype=np.int64, count=len(weighted))
+    return int.from_bytes(np.packbits(votes @ bits > 0).tobytes(), "big")
+
+
+def fingerprint(job):
+    return simhash(features(job))
+
+
+def fingerprint_jobs(jobs):
+    """Add a ``fingerprint`` field to each job that does not have one yet."""
+    for job in jobs:
+        if "fingerprint" not in job:
+            job["fingerprint"] = fingerprint(job)
+    return jobs
+
+
+def distance(a, b):
+    return (a ^ b).bit_count()
+
+
+class Deduplicator:
+    """Groups postings whose fingerprints are within ``MAX_DISTANCE`` bits.
+
+    Fingerprints are bucketed by each of their bands (locality-sensitive
+    hashing), so a new posting is only compared with the few earlier ones
+    sharing a band instead of with every posting seen so far. ``group``
+    (see :func:`group_key`) must also match. The first posting of a cluster is
+    its representative.
+    """
+
+    def __init__(self, max_distance=MAX_DISTANCE):
+        self.max_distance = max_distance
+        self._buckets = {}  # (group, band, band value) -> [(fingerprint, cluster)]
+
+    def add(self, fingerprint, cluster, group=None):
+        """Add a posting and return the cluster it belongs to.
+
+        That is the cluster of the first near-duplicate already added, or
+        ``cluster`` itself if there is none.
+        """
+        keys = [
+            (group, band, (fingerprint >> (band * BAND_BITS)) & ((1 << BAND_BITS) - 1))
+            for band in range(BANDS)
+        ]
+        for key in keys:
+            for other, other_cluster in self._buckets.get(key, ()):
+                if distance(fingerprint, other) <= self.max_distance:
+                    cluster = other_cluster
+                    break
+            else:
+                continue
+            break
+        for key in keys:
+            self._buckets.setdefault(key, []).append((fingerprint, cluster))
+        return cluster
+
+
+def cluster_rows(fingerprints, groups):
+    """Return, for every row, the row number of its cluster's representative."""
+    deduplicator = Deduplicator()
+    clusters = np.empty(len(fingerprints), dtype=np.int64)
+    for row, (value, group) in enumerate(zip(fingerprints.tolist(), groups)):
+        clusters[row] = deduplicator.add(value, row, group)
+    return clusters
+
+
+def collapse_rows(clusters, rows):
+    """Keep the first of ``rows`` from each cluster, in order.
+
+    Returns the kept rows and the number of rows each of them stands for.
+    """
+    rows = np.asarray(rows)
+    _, first, counts = np.unique(clusters[rows], return_index=True, return_counts=True)
+    order = np.argsort(first)
+    return rows[first[order]], counts[order]
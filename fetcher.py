@@ -0,0 +1,263 @@
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from metrics import increment
+
+REQUEST_TIMEOUT = (5, 30)  # (connect, read) in seconds
+# Responses worth retrying: rate limiting and transient server errors.
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5  # seconds; doubled on each retry, with full jitter
+BACKOFF_MAX = 30.0
+# A Retry-After longer than this is not waited out; the response is returned.
+MAX_RETRY_AFTER = 120.0
+# Client-side rate limit shared by every request of the process.
+RATE_LIMIT = 4.0  # requests per second
+BURST = 8
+# Consecutive failed requests that open the circuit, and how long it stays
+# open before a single trial request is let through.
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+
+
+def _close(response):
+    """Release the connection of a streamed response that will not be read."""
+    close = getattr(response, "close", None)
+    if close:
+        close()
+
+
+def _close_result(future):
+    if future.exception() is None:
+        _close(future.result())
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """The API failed repeatedly; requests are refused until the cooldown."""
+
+
+def retry_after(response, now=None):
+    """Return the delay a ``Retry-After`` header asks for, in seconds, or None."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = time.time() if now is None else now
+    return max(when.timestamp() - now, 0.0)
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, ``capacity`` max.
+
+    :meth:`pause` holds every caller back, e.g. while the server asks
+    clients to slow down with a ``429`` and ``Retry-After``.
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def try_acquire(self):
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            if now < self._paused_until or self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def acquire(self):
+        """Take one token, sleeping until one is available."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                if now < self._paused_until:
+                    wait_for = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    wait_for = (1 - self._tokens) / self.rate
+            self._sleep(wait_for)
+
+    def pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+
+class CircuitBreaker:
+    """Fails fast after ``threshold`` consecutive failures.
+
+    Once ``cooldown`` seconds have passed, one trial request is allowed
+    through (half-open); its success closes the circuit again and its
+    failure re-opens it for another cooldown.
+    """
+
+    def __init__(self, threshold, cooldown, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self._clock = clock
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._clock() - self._opened_at >= self.cooldown:
+                return "half-open"
+            return "open"
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._clock() - self._opened_at < self.cooldown or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold:
+                if self._opened_at is None or self._trial:
+                    increment("fetch.circuit_opened")
+                self._opened_at = self._clock()
+                self._trial = False
+
+
+class Fetcher:
+    """Sends GET requests with retries, rate limiting and a circuit breaker.
+
+    Connection errors, timeouts and :data:`RETRY_STATUSES` are retried up to
+    ``retries`` times with exponential backoff and full jitter, waiting as
+    long as a ``Retry-After`` header asks instead. A ``429`` pauses the
+    shared token bucket, so concurrent page fetches back off together.
+    With ``hedge_after`` set, a second copy of a request still unanswered
+    after that many seconds is sent and whichever answers first wins.
+    The last response is returned once retries run out, so callers handle
+    its status as they would without the fetcher.
+    """
+
+    def __init__(
+        self,
+        timeout=REQUEST_TIMEOUT,
+        retries=MAX_RETRIES,
+        bucket=None,
+        breaker=None,
+        hedge_after=None,
+        sleep=time.sleep,
+        rng=random,
+    ):
+        self.timeout = timeout
+        self.retries = retries
+        self.bucket = bucket
+        self.breaker = breaker or CircuitBreaker(BREAKER_THRESHOLD, BREAKER_COOLDOWN)
+        self.hedge_after = hedge_after
+        self._sleep = sleep
+        self._rng = rng
+        self._hedges = None
+        self._hedges_lock = threading.Lock()
+
+    def backoff(self, attempt):
+        return self._rng.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt))
+
+    def get(self, session, url, **kwargs):
+        if not self.breaker.allow():
+            increment("fetch.circuit_rejected")
+            raise CircuitOpenError(f"{url} failed repeatedly; retrying later")
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        while True:
+            if self.bucket:
+                self.bucket.acquire()
+            try:
+                response = self._send(session, url, kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    self.breaker.record_failure()
+                    raise
+                delay = self.backoff(attempt)
+            except Exception:
+                # Not worth retrying, but a half-open trial must not hang.
+                self.breaker.record_failure()
+                raise
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    self.breaker.record_success()
+                    return response
+                delay = retry_after(response)
+                exhausted = attempt == self.retries or (delay or 0) > MAX_RETRY_AFTER
+                if response.status_code == 429:
+                    # Rate limited, not down: the circuit stays closed.
+                    self.breaker.record_success()
+                elif exhausted:
+                    self.breaker.record_failure()
+                if exhausted:
+                    return response
+                _close(response)
+                if delay is None:
+                    delay = self.backoff(attempt)
+                if response.status_code == 429 and self.bucket:
+                    self.bucket.pause(delay)
+            attempt += 1
+            increment("fetch.retries")
+            self._sleep(delay)
+
+    def _send(self, session, url, kwargs):
+        if self.hedge_after is None:
+            return session.get(url, **kwargs)
+        with self._hedges_lock:
+            if self._hedges is None:
+                self._hedges = ThreadPoolExecutor(thread_name_prefix="hedge")
+        pending = {self._hedges.submit(session.get, url, **kwargs)}
+        done, _ = wait(pending, timeout=self.hedge_after)
+        # Hedges are extra load: only send one if the rate limit allows it.
+        if not done and (self.bucket is None or self.bucket.try_acquire()):
+            increment("fetch.hedged")
+            pending.add(self._hedges.submit(session.get, url, **kwargs))
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.add_done_callback(_close_result)
+                    return future.result()
+            # Both failed, or the only request did: raise its error.
+            if not pending:
+                return done.pop().result()
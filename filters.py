@@ -0,0 +1,239 @@
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from metrics import timed
+from search import SearchIndex, compile_keywords
+
+# Relevance of a posting decays towards RECENCY_FLOOR of its text score,
+# halving the distance every RECENCY_HALF_LIFE seconds.
+RECENCY_HALF_LIFE = 30 * 24 * 3600
+RECENCY_FLOOR = 0.5
+
+
+def _matching_codes(categories, needles):
+    """Return the codes of the categories containing any of ``needles``."""
+    needles = [needle.casefold() for needle in needles]
+    return np.array(
+        [
+            code
+            for code, value in enumerate(categories)
+            if any(needle in value.casefold() for needle in needles)
+        ],
+        dtype=np.int32,
+    )
+
+
+def location_mask(table, location):
+    # Match against the distinct locations once, then broadcast by code.
+    codes = _matching_codes(table.locations, [location])
+    return np.isin(table.location_codes, codes)
+
+
+def job_type_mask(table, job_types):
+    codes = _matching_codes(table.job_types, job_types)
+    hits = np.isin(table.job_type_codes, codes)
+    mask = np.zeros(len(table), dtype=bool)
+    mask[table.job_type_rows()[hits]] = True
+    return mask
+
+
+def keyword_mask(table, query, index=None):
+    """Match ``query`` against ``index``, building a throwaway index if needed.
+
+    The index may hold jobs outside ``table``; those matches are ignored.
+    """
+    if index is None:
+        index = SearchIndex()
+        index.add_table(table)
+    positions = table.positions
+    mask = np.zeros(len(table), dtype=bool)
+    rows = [positions[key] for key in index.search(query) if key in positions]
+    mask[rows] = True
+    return mask
+
+
+def filter_masks(table, spec, index=None):
+    """Return one boolean mask per active filter of ``spec``.
+
+    Raises :class:`search.QuerySyntaxError` for malformed keyword queries.
+    """
+    masks = {}
+    if spec.remote_only:
+        masks["remote"] = table.remote
+    if spec.location:
+        masks["location"] = location_mask(table, spec.location)
+    if spec.job_types:
+        masks["job_types"] = job_type_mask(table, spec.job_types)
+    if spec.keywords:
+        query = compile_keywords(spec.keywords)
+        if query is not None:
+            masks["keywords"] = keyword_mask(table, query, index)
+    return masks
+
+
+def _combine(table, masks, skip=None):
+    mask = np.ones(len(table), dtype=bool)
+    for name, other in masks.items():
+        if name != skip:
+            mask &= other
+    return mask
+
+
+def build_mask(table, spec, index=None):
+    """Combine the filters of ``spec`` into one boolean mask over ``table``."""
+    return _combine(table, filter_masks(table, spec, index))
+
+
+def relevance_scores(
+    table, rows, query, index=None, half_life=RECENCY_HALF_LIFE, now=None
+):
+    """Return the BM25 score of each of ``rows`` for ``query``.
+
+    With ``half_life`` (seconds), older postings are scored lower; pass None
+    to rank on the text alone.
+    """
+    if index is None:
+        index = SearchIndex()
+        index.add_table(table)
+    scores = index.scores(query)
+    values = np.fromiter(
+        (scores.get(key, 0.0) for key in table.keys[rows]), dtype=float, count=len(rows)
+    )
+    if half_life:
+        age = np.maximum((now or time.time()) - table.created_at[rows], 0)
+        values *= RECENCY_FLOOR + (1 - RECENCY_FLOOR) * 0.5 ** (age / half_life)
+    return values
+
+
+def _smallest(keys, count):
+    """Return the positions of the ``count`` smallest ``keys``, in order.
+
+    Ties are broken by position, so these are the first ``count`` positions
+    of a stable sort, found with a partial sort.
+    """
+    kth = np.partition(keys, count - 1)[count - 1]
+    below = np.flatnonzero(keys < kth)
+    ties = np.flatnonzero(keys == kth)[: count - len(below)]
+    return np.sort(np.concatenate([below, ties]))
+
+
+def sort_rows(table, rows, sort_by, query=None, index=None, limit=None):
+    """Order ``rows`` (positions in ``table``) according to ``sort_by``.
+
+    ``"relevance"`` ranks by :func:`relevance_scores` for ``query`` and falls
+    back to newest first without one. With ``limit``, only the first
+    ``limit`` rows are returned; they are picked with a partial sort instead
+    of ordering every match.
+    """
+    if sort_by == "relevance" and query is None:
+        sort_by = "newest"
+    if sort_by == "relevance":
+        keys = -relevance_scores(table, rows, query, index)
+    elif sort_by == "newest":
+        keys = -table.created_at[rows]
+    elif sort_by == "oldest":
+        keys = table.created_at[rows]
+    elif sort_by == "company":
+        ranks = np.empty(len(table.companies) + 1, dtype=np.int64)
+        order = sorted(range(len(table.companies)), key=table.companies.__getitem__)
+        ranks[order] = np.arange(len(order))
+        ranks[-1] = len(order)  # jobs without a company sort last
+        keys = ranks[table.company_codes[rows]]
+    else:
+        return rows[:limit]
+    if limit is not None and limit < len(rows):
+        if limit <= 0:
+            return rows[:0]
+        top = _smallest(keys, limit)
+        rows, keys = rows[top], keys[top]
+    return rows[np.argsort(keys, kind="stable")]
+
+
+def iter_ranked_rows(table, rows, spec, index=None, batch=None):
+    """Yield ``rows`` (matches of ``spec``) in ``spec``'s order, ranking lazily.
+
+    The first ``batch`` rows are picked with a partial sort, and twice as
+    many each time the consumer reads past them, so a caller that stops
+    early (one page of cards, ``--limit`` jobs after skipping duplicates)
+    never sorts every match. Without ``batch`` everything is sorted at once.
+    """
+    query = compile_keywords(spec.keywords) if spec.keywords else None
+    if index is None and query is not None and spec.sort_by == "relevance":
+        # Built once for every round of ranking.
+        index = SearchIndex()
+        index.add_table(table)
+    limit = batch
+    done = 0
+    while done < len(rows):
+        ranked = sort_rows(table, rows, spec.sort_by, query, index, limit)
+        yield from ranked[done:].tolist()
+        if limit is None or len(ranked) < limit:
+            return
+        done = len(ranked)
+        limit *= 2
+
+
+@timed("filter")
+def filter_rows(table, spec, index=None, limit=None):
+    """Return the positions of the rows matching ``spec``, in sorted order."""
+    query = compile_keywords(spec.keywords) if spec.keywords else None
+    if index is None and query is not None:
+        # One throwaway index serves both the keyword filter and the ranking.
+        index = SearchIndex()
+        index.add_table(table)
+    rows = np.flatnonzero(build_mask(table, spec, index))
+    return sort_rows(table, rows, spec.sort_by, query, index, limit)
+
+
+@dataclass
+class Facets:
+    """Value counts for the facets of a result set, most common first.
+
+    ``job_types``, ``locations`` and ``companies`` are ``(value, count)``
+    lists; ``remote`` is the number of remote jobs and ``total`` the number
+    of matching jobs.
+    """
+
+    job_types: list
+    locations: list
+    companies: list
+    remote: int
+    total: int
+
+    def counts(self, facet):
+        return dict(getattr(self, facet))
+
+
+def _ranked(values, codes):
+    """Count ``codes`` (``-1`` meaning missing) and pair counts with values."""
+    counts = np.bincount(codes[codes >= 0], minlength=len(values))
+    order = np.argsort(-counts, kind="stable")
+    return [(values[code], int(counts[code])) for code in order if counts[code]]
+
+
+@timed("facets")
+def facet_counts(table, spec, index=None):
+    """Count job types, locations, companies and remote jobs matching ``spec``.
+
+    Each facet is counted with every filter applied except its own, so the
+    counts show how many results picking a value would give instead of
+    collapsing to the current selection. Counting is one ``bincount`` per
+    facet over the interned codes.
+    """
+    masks = filter_masks(table, spec, index)
+    matched = _combine(table, masks)
+    type_rows = table.job_type_rows()
+    return Facets(
+        job_types=_ranked(
+            table.job_types,
+            table.job_type_codes[_combine(table, masks, "job_types")[type_rows]],
+        ),
+        locations=_ranked(
+            table.locations, table.location_codes[_combine(table, masks, "location")]
+        ),
+        companies=_ranked(table.companies, table.company_codes[matched]),
+        remote=int(np.count_nonzero(table.remote[_combine(table, masks, "remote")])),
+        total=int(np.count_nonzero(matched)),
+    )
@@ -0,0 +1,30 @@
+from dataclasses import dataclass, field
+
+SORT_ORDERS = ("newest", "oldest", "company", "relevance")
+SORT_LABELS = {
+    "Newest": "newest",
+    "Oldest": "oldest",
+    "Company Name": "company",
+    "Best match": "relevance",
+}
+
+
+@dataclass
+class FilterSpec:
+    """Filters and sort order shared by the CLI and the web app.
+
+    ``keywords`` is a comma-separated keyword list or a boolean query (see
+    :func:`search.compile_keywords`). ``job_types`` match a job when any of
+    them appears, case-insensitively, in one of the job's ``job_types``.
+    """
+
+    remote_only: bool = False
+    location: str = ""
+    keywords: str = ""
+    job_types: list = field(default_factory=list)
+    sort_by: str | None = None
+
+    def is_active(self):
+        return bool(
+            self.remote_only or self.location or self.keywords or self.job_types
+        )
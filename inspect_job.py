@@ -1,8 +1,233 @@
-from jobs import fetch_jobs
-
-jobs = fetch_jobs()
-if jobs:
-    print(f"URL: {jobs[0].get('url')}")
-    print(f"Data: {jobs[0]}")
-else:
-    print("No jobs found")
+"""Query and compare saved snapshots of the job board offline.
+
+Snapshots are written by ``main.py --snapshot``. Nothing here touches the
+network except the ``live`` command, which prints the first job of the live
+API's first page::
+
+    python inspect_job.py list
+    python inspect_job.py query --keywords python --country berlin
+    python inspect_job.py diff previous latest
+    python inspect_job.py show SLUG
+"""
+
+import argparse
+import csv
+import json
+import sys
+from datetime import datetime, timezone
+
+from filterspec import SORT_ORDERS, FilterSpec
+from main import format_columns, non_negative_int
+
+DEFAULT_COLUMNS = ("created_at", "company_name", "title", "location", "slug")
+
+
+def cell(value):
+    if isinstance(value, list):
+        return ", ".join(value)
+    if value is None:
+        return ""
+    return str(value)
+
+
+def rows_of(table, columns):
+    """Yield the rows of ``table`` (an Arrow table) as dicts of ``columns``."""
+    for row in table.select(columns).to_pylist():
+        if row.get("created_at"):
+            row["created_at"] = datetime.fromtimestamp(
+                row["created_at"], timezone.utc
+            ).isoformat()
+        yield row
+
+
+def write_rows(rows, columns, output_format, out):
+    if output_format == "jsonl":
+        for row in rows:
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+    elif output_format == "csv":
+        writer = csv.DictWriter(out, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows({name: cell(row[name]) for name in columns} for row in rows)
+    else:
+        lines = format_columns(
+            list(columns), [[cell(row[name]) for name in columns] for row in rows]
+        )
+        out.write("\n".join(lines) + "\n")
+
+
+def check_columns(snapshot, columns):
+    unknown = [name for name in columns if name not in snapshot.dataset().schema.names]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+
+
+def list_command(args):
+    from snapshots import list_snapshots
+
+    rows = [
+        [
+            snapshot.fetched_at.isoformat(),
+            str(snapshot.count()),
+            f"{snapshot.path.stat().st_size / 2**20:.1f}",
+            str(snapshot.path),
+        ]
+        for snapshot in list_snapshots()
+    ]
+    if not rows:
+        print("No snapshots yet; save one with: python main.py --snapshot")
+        return
+    headers = ["Fetched at", "Jobs", "MiB", "Path"]
+    print("\n".join(format_columns(headers, rows, right_align=(1, 2))))
+
+
+def query_command(args):
+    import pyarrow as pa
+
+    from snapshots import find_snapshot, query
+
+    spec = FilterSpec(
+        remote_only=args.remote_only,
+        location=args.country or "",
+        keywords=args.keywords or "",
+        job_types=[args.job_type] if args.job_type else [],
+        sort_by=args.sort,
+    )
+    snapshot = find_snapshot(args.snapshot)
+    check_columns(snapshot, args.columns)
+    table, rows = query(snapshot, spec, args.columns, limit=args.limit or None)
+    rows = rows[: args.limit] if args.limit else rows
+    arrow = table.to_arrow().take(pa.array(rows, pa.int64()))
+    if args.format == "table":
+        print(f"{len(rows)} matching jobs in the snapshot of {snapshot.stamp}\n")
+    write_rows(rows_of(arrow, args.columns), args.columns, args.format, sys.stdout)
+
+
+def diff_command(args):
+    import pyarrow as pa
+
+    from snapshots import diff_snapshots, find_snapshot
+
+    old, new = find_snapshot(args.old), find_snapshot(args.new)
+    check_columns(new, args.columns)
+    added, removed = diff_snapshots(old, new, args.columns)
+    columns = ["change", *args.columns]
+    changes = pa.concat_tables(
+        [
+            added.add_column(0, "change", pa.array(["added"] * len(added))),
+            removed.add_column(0, "change", pa.array(["removed"] * len(removed))),
+        ]
+    )
+    if args.format == "table":
+        print(
+            f"{old.stamp} → {new.stamp}: {len(added)} added, {len(removed)} removed\n"
+        )
+    write_rows(rows_of(changes, columns), columns, args.format, sys.stdout)
+
+
+def show_command(args):
+    import pyarrow.dataset as ds
+
+    from snapshots import find_snapshot
+
+    snapshot = find_snapshot(args.snapshot)
+    rows = snapshot.read(filter=ds.field("slug") == args.slug).to_pylist()
+    if not rows:
+        sys.exit(f"No job {args.slug!r} in the snapshot of {snapshot.stamp}")
+    print(json.dumps(rows[0], ensure_ascii=False, indent=2))
+
+
+def live_command(args):
+    from jobs import fetch_jobs
+
+    jobs = fetch_jobs()
+    if jobs:
+        print(f"URL: {jobs[0].get('url')}")
+        print(f"Data: {jobs[0]}")
+    else:
+        print("No jobs found")
+
+
+def columns_list(value):
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Query and compare saved snapshots of the job board offline."
+    )
+    commands = parser.add_subparsers(dest="command")
+
+    default_columns = ",".join(DEFAULT_COLUMNS)
+
+    def add_output_options(command):
+        command.add_argument(
+            "--columns",
+            type=columns_list,
+            default=list(DEFAULT_COLUMNS),
+            help=f"Comma-separated columns to show (default: {default_columns}).",
+        )
+        command.add_argument(
+            "--format",
+            choices=("table", "jsonl", "csv"),
+            default="table",
+            help="Output format (default: table).",
+        )
+
+    commands.add_parser("list", help="List the saved snapshots (the default).")
+
+    query = commands.add_parser(
+        "query", help="Filter a snapshot with the same options as main.py."
+    )
+    query.add_argument(
+        "snapshot",
+        nargs="?",
+        help="'latest' (default), 'previous', a date, a stamp or a file.",
+    )
+    query.add_argument("--country", help="Filter jobs by location.")
+    query.add_argument(
+        "--keywords", help="Keywords or a boolean query, as for main.py."
+    )
+    query.add_argument("--job-type", help="Filter jobs by type.")
+    query.add_argument("--remote-only", action="store_true")
+    query.add_argument("--sort", choices=sorted(SORT_ORDERS))
+    query.add_argument(
+        "--limit",
+        type=non_negative_int,
+        default=20,
+        help="Maximum number of jobs to show; 0 for no limit (default: 20).",
+    )
+    add_output_options(query)
+
+    diff = commands.add_parser("diff", help="Show jobs added and removed between two.")
+    diff.add_argument("old", nargs="?", default="previous")
+    diff.add_argument("new", nargs="?", default="latest")
+    add_output_options(diff)
+
+    show = commands.add_parser("show", help="Print every field of one job.")
+    show.add_argument("slug")
+    show.add_argument("--snapshot", help="Snapshot to read (default: latest).")
+
+    commands.add_parser("live", help="Print the first job of the live API.")
+
+    args = parser.parse_args()
+    if args.command == "query" and args.keywords:
+        from search import QuerySyntaxError, compile_keywords
+
+        try:
+            compile_keywords(args.keywords)
+        except QuerySyntaxError as e:
+            parser.error(f"invalid --keywords query: {e}")
+    handler = {
+        "query": query_command,
+        "diff": diff_command,
+        "show": show_command,
+        "live": live_command,
+    }.get(args.command, list_command)
+    try:
+        handler(args)
+    except ValueError as e:
+        sys.exit(str(e))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,621 @@
-import requests
-from rich.console import Console
-from rich.table import Table
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+from cache import ResponseCache, default_cache_dir
+from jsonstream import CHUNK_SIZE, iter_array
+from metrics import increment, span, timed
+from store import JobStore, job_key
+from text import prepare_job, prepare_jobs
 
 API_URL = "https://arbeitnow.com/api/job-board-api"
-console = Console()
+REMOTIVE_URL = "https://remotive.com/api/remote-jobs"
+PAGE_SIZE = 100  # The API returns at most 100 jobs per page.
+DEFAULT_WORKERS = 4
+# Boards read when REMOTEJOBS_SOURCES (comma-separated names) is not set.
+DEFAULT_SOURCES = "arbeitnow"
+# Fields of the canonical job record every source is normalized into. They
+# are Arbeitnow's names, plus the board a job came from; anything else is
+# dropped while decoding.
+API_FIELDS = (
+    "slug",
+    "company_name",
+    "title",
+    "description",
+    "remote",
+    "url",
+    "tags",
+    "job_types",
+    "location",
+    "created_at",
+    "source",
+)
+# Plain-text descriptions are cut to this many characters.
+MAX_DESCRIPTION_CHARS = 20_000
+SYNC_INTERVAL = 3600  # seconds between automatic incremental syncs
+# A sync lease outlives any sync; it only matters if its holder dies.
+SYNC_LEASE_TTL = 600
+
+_session = None
+_session_lock = threading.Lock()
+_fetchers = {}
+_fetcher_lock = threading.Lock()
+_cache = None
+_cache_lock = threading.Lock()
+_store = None
+_store_lock = threading.Lock()
+_sync_lock = threading.Lock()
+
+
+def get_session():
+    """Return the shared HTTP session, creating it on first use.
+
+    The session keeps a pool of keep-alive connections large enough for
+    concurrent page fetches, so consecutive requests skip the TCP/TLS setup.
+    ``requests`` is imported here rather than at module level to keep CLI
+    start-up fast when no page has to be downloaded.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=DEFAULT_WORKERS, pool_maxsize=DEFAULT_WORKERS * 2
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+    return _session
+
+
+def get_fetcher(source=None):
+    """Return the :class:`fetcher.Fetcher` used for API requests to ``source``.
+
+    Each job board (default: Arbeitnow) gets its own fetcher, so one board
+    that is down or rate limited does not hold back the others. Its rate
+    limiter and circuit breaker are shared by concurrent page fetches from
+    that board. Set ``REMOTEJOBS_RATE_LIMIT`` to change the requests per
+    second per board (0 turns the limit off) and ``REMOTEJOBS_HEDGE_AFTER``
+    to a number of seconds to hedge requests that are slower than that.
+    """
+    name = (source or ARBEITNOW).name
+    with _fetcher_lock:
+        fetcher = _fetchers.get(name)
+        if fetcher is None:
+            from fetcher import BURST, RATE_LIMIT, Fetcher, TokenBucket
+
+            rate = float(os.environ.get("REMOTEJOBS_RATE_LIMIT", RATE_LIMIT))
+            hedge_after = os.environ.get("REMOTEJOBS_HEDGE_AFTER")
+            fetcher = _fetchers[name] = Fetcher(
+                bucket=TokenBucket(rate, max(BURST, rate)) if rate > 0 else None,
+                hedge_after=float(hedge_after) if hedge_after else None,
+            )
+    return fetcher
+
+
+def get_cache():
+    """Return the shared on-disk response cache, or None if it is disabled.
+
+    Set ``REMOTEJOBS_NO_CACHE`` to disable the cache and
+    ``REMOTEJOBS_CACHE_DIR`` to move it.
+    """
+    global _cache
+    if os.environ.get("REMOTEJOBS_NO_CACHE"):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(default_cache_dir() / "responses.sqlite3")
+    return _cache
+
+
+class JobSource:
+    """A job board: where its pages are and how its postings map to job records.
+
+    Subclasses set :attr:`name` and :attr:`url` and implement
+    :meth:`normalize`, which turns one raw posting into the canonical record
+    (see :data:`API_FIELDS`) that the filters, the store and both interfaces
+    read, or returns None to skip a posting it cannot use. Pages go through
+    the shared cache, session and fetcher like Arbeitnow's.
+    """
+
+    name = None
+    url = None
+    # Key of the jobs array in a page.
+    array_key = "data"
+    # Jobs on a full page; None for boards that serve every job at once.
+    page_size = PAGE_SIZE
+    # Pages of this board fetched at once.
+    workers = DEFAULT_WORKERS
+
+    def params(self, page):
+        return {"page": page}
+
+    def normalize(self, raw):
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.name}>"
+
+
+class Arbeitnow(JobSource):
+    """The Arbeitnow job board API, whose field names are the canonical ones."""
+
+    name = "arbeitnow"
+
+    @property
+    def url(self):
+        # Read when used, so tests and benchmarks can point it elsewhere.
+        return API_URL
+
+    def normalize(self, raw):
+        return {**raw, "source": self.name}
+
+
+class Remotive(JobSource):
+    """Remotive's public API: every listed job in one response, all remote."""
+
+    name = "remotive"
+    array_key = "jobs"
+    page_size = None
+    workers = 1
+
+    @property
+    def url(self):
+        return REMOTIVE_URL
+
+    def params(self, page):
+        return {}
+
+    def normalize(self, raw):
+        if raw.get("id") is None:
+            return None
+        job_type = (raw.get("job_type") or "").replace("_", " ")
+        return {
+            "slug": f"remotive-{raw['id']}",
+            "company_name": raw.get("company_name"),
+            "title": raw.get("title"),
+            "description": raw.get("description"),
+            "remote": True,
+            "url": raw.get("url"),
+            "tags": raw.get("tags") or [],
+            "job_types": [job_type] if job_type else [],
+            "location": raw.get("candidate_required_location") or "",
+            "created_at": _timestamp(raw.get("publication_date")),
+            "source": self.name,
+        }
+
+
+def _timestamp(value):
+    """Parse an ISO 8601 time (UTC unless it says otherwise); 0 if unreadable."""
+    try:
+        posted = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return 0
+    if posted.tzinfo is None:
+        posted = posted.replace(tzinfo=timezone.utc)
+    return int(posted.timestamp())
+
+
+SOURCES = {source.name: source for source in (Arbeitnow, Remotive)}
+ARBEITNOW = Arbeitnow()
+
+
+def get_sources(names=None):
+    """Return the job boards to read, as :class:`JobSource` instances.
+
+    ``names`` is a comma-separated list of :data:`SOURCES`; it defaults to
+    ``REMOTEJOBS_SOURCES``, then to :data:`DEFAULT_SOURCES`.
+    """
+    names = names or os.environ.get("REMOTEJOBS_SOURCES") or DEFAULT_SOURCES
+    sources = []
+    for name in dict.fromkeys(name.strip().lower() for name in names.split(",")):
+        if not name:
+            continue
+        if name not in SOURCES:
+            raise ValueError(
+                f"Unknown job source {name!r}; choose from {', '.join(SOURCES)}"
+            )
+        sources.append(SOURCES[name]())
+    return sources or [ARBEITNOW]
+
+
+def fetch_jobs(page=1, session=None, use_cache=True, refresh=False, source=None):
+    """Fetch one page of jobs from ``source`` (default: Arbeitnow).
+
+    Fresh pages are served from the on-disk cache. Stale pages (or every page
+    when ``refresh`` is set) are revalidated with a conditional request, so an
+    unchanged page costs a ``304 Not Modified`` instead of a full download.
+    Requests go through :func:`get_fetcher`; if the API stays unreachable
+    or keeps failing, the cached page is served even if it is stale.
+    Pages are decoded job by job while they download (see :func:`slim_job`).
+    Each job comes back with plain-text ``description_text`` and ``preview``
+    fields in place of its HTML description, and a ``fingerprint`` used to
+    spot near-duplicate postings (see :mod:`dedupe`). Both are computed once,
+    while decoding, and cached with the page.
+    """
+    from dedupe import fingerprint_jobs
+
+    source = source or ARBEITNOW
+    jobs = _fetch_page_data(source, page, session, use_cache, refresh)
+    for job in jobs:
+        # Pages cached before jobs were tagged with their board.
+        job.setdefault("source", source.name)
+    # Only pages cached by older versions still lack these fields.
+    with span("html"):
+        prepare_jobs(jobs)
+    with span("dedupe"):
+        return fingerprint_jobs(jobs)
+
+
+def slim_job(job):
+    """Keep the :data:`API_FIELDS` of ``job``, with text and a fingerprint.
 
+    The description is converted as soon as the job is decoded and the HTML
+    is dropped, so a page never holds both. The fingerprint is cached with
+    the page, so cache hits and revalidated pages do not hash it again.
+    """
+    from dedupe import fingerprint
 
-def fetch_jobs(page=1):
-    """Fetch jobs from the Arbeitnow API for a specific page."""
-    response = requests.get(API_URL, params={"page": page})
-    response.raise_for_status()
-    return response.json().get("data", [])
+    job = prepare_job({field: job[field] for field in API_FIELDS if field in job})
+    job.pop("description", None)
+    if len(job["description_text"]) > MAX_DESCRIPTION_CHARS:
+        job["description_text"] = job["description_text"][:MAX_DESCRIPTION_CHARS]
+    job["fingerprint"] = fingerprint(job)
+    return job
 
 
-def show_jobs(jobs, limit=10, country=None, keywords=None, job_type=None):
+def decode_jobs(response, source=ARBEITNOW):
+    """Yield the normalized, slimmed jobs of a streamed page as they arrive."""
+    try:
+        chunks = response.iter_content(CHUNK_SIZE)
+        for raw in iter_array(chunks, source.array_key):
+            job = source.normalize(raw)
+            if job is None:
+                increment("sources.skipped")
+                continue
+            yield slim_job(job)
+    finally:
+        # Decoding stops at the end of the jobs array, before the page links.
+        response.close()
+
+
+def _fetch_page_data(source, page, session, use_cache, refresh):
+    cache = get_cache() if use_cache else None
+    params = source.params(page)
+    key = f"{source.url}?{urlencode(params)}" if params else source.url
+    entry = None
+    if cache:
+        with span("fetch.cache"):
+            entry = cache.get(key)
+    if entry and not refresh and entry.is_fresh(cache.ttl):
+        cache.record("hits")
+        return entry.data
+
+    headers = {}
+    if entry and entry.etag:
+        headers["If-None-Match"] = entry.etag
+    if entry and entry.last_modified:
+        headers["If-Modified-Since"] = entry.last_modified
+
+    import requests
+
+    session = session or get_session()
+    try:
+        with span("fetch.network"):
+            response = get_fetcher(source).get(
+                session, source.url, params=params, headers=headers, stream=True
+            )
+        if entry and response.status_code == 304:
+            cache.record("revalidated")
+            cache.touch(key)
+            return entry.data
+        response.raise_for_status()
+        with span("fetch.decode"):
+            jobs = list(decode_jobs(response, source))
+    except requests.RequestException as e:
+        status = getattr(e.response, "status_code", None)
+        # The API is down or overloaded: a stale page beats no page.
+        if entry is None or (status is not None and status < 500 and status != 429):
+            raise
+        cache.record("stale")
+        return entry.data
+    if cache:
+        cache.record("misses")
+        cache.put(
+            key,
+            jobs,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+    return jobs
+
+
+def iter_job_pages(
+    start_page=1,
+    max_pages=None,
+    max_jobs=None,
+    workers=None,
+    use_cache=True,
+    refresh=False,
+    source=None,
+):
+    """Yield ``(page, jobs)`` tuples in page order, fetching pages concurrently.
+
+    Up to ``workers`` pages (default: ``source.workers``) are kept in flight
+    at once. Paging stops after the first short or empty page, or once
+    ``max_pages`` pages or ``max_jobs`` jobs have been yielded. Pages fetched
+    speculatively past the end are discarded.
+    """
+    source = source or ARBEITNOW
+    workers = workers or source.workers
+    if source.page_size is None:
+        max_pages = 1  # The first page holds the whole board.
+    last_page = start_page + max_pages - 1 if max_pages else None
+    remaining = max_jobs
+    session = get_session()
+    executor = ThreadPoolExecutor(max_workers=workers)
+    pending = deque()
+    next_page = start_page
+
+    def fill_window():
+        nonlocal next_page
+        while len(pending) < workers and (last_page is None or next_page <= last_page):
+            future = executor.submit(
+                fetch_jobs,
+                next_page,
+                session,
+                use_cache=use_cache,
+                refresh=refresh,
+                source=source,
+            )
+            pending.append((next_page, future))
+            next_page += 1
+
+    try:
+        fill_window()
+        while pending:
+            page, future = pending.popleft()
+            jobs = future.result()
+            is_last = source.page_size is None or len(jobs) < source.page_size
+            if remaining is not None:
+                jobs = jobs[:remaining]
+                remaining -= len(jobs)
+            if jobs:
+                yield page, jobs
+            if is_last or remaining == 0:
+                break
+            fill_window()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_source_pages(sources=None, **options):
+    """Yield ``(source, page, jobs)`` from every source at once, as pages arrive.
+
+    Each source is paged by :func:`iter_job_pages` (which takes ``options``)
+    on a thread of its own, with at most ``source.workers`` of its pages in
+    flight, so a refresh waits for the slowest board rather than for every
+    board in turn. Pages of one source arrive in order. If a source fails,
+    the other sources are still read to the end, then its error is raised.
+    """
+    sources = sources or get_sources()
+    if len(sources) == 1:
+        for page, jobs in iter_job_pages(source=sources[0], **options):
+            yield sources[0], page, jobs
+        return
+
+    arrivals = queue.SimpleQueue()
+    stop = threading.Event()
+    done = object()
+
+    def read(source):
+        try:
+            with closing(iter_job_pages(source=source, **options)) as pages:
+                for page, jobs in pages:
+                    if stop.is_set():
+                        break
+                    arrivals.put((source, page, jobs))
+        except Exception as e:
+            arrivals.put(e)
+        finally:
+            arrivals.put(done)
+
+    executor = ThreadPoolExecutor(max_workers=len(sources))
+    for source in sources:
+        executor.submit(read, source)
+    error = None
+    running = len(sources)
+    try:
+        while running:
+            arrival = arrivals.get()
+            if arrival is done:
+                running -= 1
+            elif isinstance(arrival, Exception):
+                increment("sources.failed")
+                error = error or arrival
+            else:
+                yield arrival
+    finally:
+        # Sources still running stop after their current page.
+        stop.set()
+        executor.shutdown(wait=False)
+    if error is not None:
+        raise error
+
+
+def merge_jobs(jobs):
+    """Drop jobs posted twice, by key or by URL, keeping the first of each."""
+    keys = set()
+    urls = set()
+    merged = []
+    for job in jobs:
+        key = job_key(job)
+        url = job.get("url")
+        if key in keys or (url and url in urls):
+            continue
+        keys.add(key)
+        if url:
+            urls.add(url)
+        merged.append(job)
+    return merged
+
+
+def fetch_all_jobs(
+    max_pages=None,
+    max_jobs=None,
+    workers=None,
+    use_cache=True,
+    refresh=False,
+    sources=None,
+):
+    """Fetch every page of every source and return the jobs as one list.
+
+    Sources are fetched concurrently (see :func:`iter_source_pages`) and
+    ``max_pages``, ``max_jobs`` and ``workers`` apply to each of them. The
+    jobs of several sources are merged newest first, each posting once.
+    """
+    sources = sources or get_sources()
+    all_jobs = []
+    for _, _, jobs in iter_source_pages(
+        sources,
+        max_pages=max_pages,
+        max_jobs=max_jobs,
+        workers=workers,
+        use_cache=use_cache,
+        refresh=refresh,
+    ):
+        all_jobs.extend(jobs)
+    if len(sources) > 1:
+        all_jobs.sort(key=lambda job: job.get("created_at") or 0, reverse=True)
+        all_jobs = merge_jobs(all_jobs)
+    return all_jobs
+
+
+@timed("snapshot.fetch")
+def snapshot_board(directory=None, use_cache=True, sources=None):
+    """Fetch every page and save the board as a columnar snapshot.
+
+    Returns the :class:`snapshots.Snapshot`. Snapshots are read offline by
+    ``inspect_job.py``; comparing two shows which jobs came and went.
+    """
+    from jobtable import JobTable
+    from snapshots import write_snapshot
+
+    jobs = fetch_all_jobs(use_cache=use_cache, refresh=True, sources=sources)
+    return write_snapshot(JobTable.from_records(jobs), directory)
+
+
+def get_store():
+    """Return the shared local job store used by incremental syncs."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = JobStore(default_cache_dir() / "jobs.sqlite3")
+    return _store
+
+
+@dataclass
+class SyncResult:
+    new_jobs: list
+    pages_fetched: int
+
+
+@timed("sync")
+def sync_jobs(store=None, max_pages=None, use_cache=True, sources=None):
+    """Merge postings that are not in the local store yet into it.
+
+    Pages are walked newest-first and paging stops at the first page that
+    holds no unseen job, so the cost of a sync scales with the number of new
+    postings rather than with the size of the board. An empty store is
+    filled with a concurrent crawl of every page instead. Sources are
+    synced side by side.
+    """
+    store = store or get_store()
+    sources = sources or get_sources()
+    new_jobs = []
+    pages_fetched = 0
+    if store.count() == 0:
+        for _, _, page_jobs in iter_source_pages(
+            sources, max_pages=max_pages, use_cache=use_cache, refresh=True
+        ):
+            pages_fetched += 1
+            new_jobs.extend(store.add(page_jobs))
+    elif len(sources) == 1:
+        new_jobs, pages_fetched = _sync_source(store, sources[0], max_pages, use_cache)
+    else:
+        with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+            futures = [
+                executor.submit(_sync_source, store, source, max_pages, use_cache)
+                for source in sources
+            ]
+        error = None
+        for future in futures:
+            try:
+                added, pages = future.result()
+            except Exception as e:
+                increment("sources.failed")
+                error = error or e
+                continue
+            new_jobs.extend(added)
+            pages_fetched += pages
+        if error is not None:
+            raise error
+    store.set_meta("last_sync", time.time())
+    return SyncResult(new_jobs, pages_fetched)
+
+
+def _sync_source(store, source, max_pages, use_cache):
+    new_jobs = []
+    pages_fetched = 0
+    while max_pages is None or pages_fetched < max_pages:
+        pages_fetched += 1
+        page_jobs = fetch_jobs(
+            pages_fetched, use_cache=use_cache, refresh=True, source=source
+        )
+        added = store.add(page_jobs)
+        new_jobs.extend(added)
+        if not added or source.page_size is None or len(page_jobs) < source.page_size:
+            break
+    return new_jobs, pages_fetched
+
+
+def sync_if_stale(store=None, max_age=SYNC_INTERVAL):
+    """Run :func:`sync_jobs` if the last sync is older than ``max_age``.
+
+    Concurrent callers in this process wait for a single sync instead of
+    each running one. Other processes sharing the store (replicas, workers)
+    skip the sync while one of them holds the store's sync lease and pick
+    up its new jobs from the store afterwards. ``max_age=0`` syncs now (e.g.
+    on a user's request) yet still defers to a sync already running.
+    """
+    store = store or get_store()
+    if time.time() - store.get_meta("last_sync", 0) < max_age:
+        return None
+    with _sync_lock:
+        owner = store.acquire_lease("sync", SYNC_LEASE_TTL)
+        if owner is None:
+            increment("sync.skipped")
+            return None
+        try:
+            # Another process may have finished a sync since the first check.
+            if time.time() - store.get_meta("last_sync", 0) < max_age:
+                return None
+            return sync_jobs(store)
+        finally:
+            store.release_lease("sync", owner)
+
+
+def jobs_title(limit, country=None, keywords=None, job_type=None):
     title = f"Top {limit} Remote Jobs"
     if country:
         title += f" in {country.title()}"
@@ -21,7 +623,14 @@ def show_jobs(jobs, limit=10, country=None, keywords=None, job_type=None):
         title += f" with keywords: {', '.join(keywords)}"
     if job_type:
         title += f" for {job_type.title()}"
-    table = Table(title=title, show_lines=True)
+    return title
+
+
+def show_jobs(jobs, limit=10, country=None, keywords=None, job_type=None, console=None):
+    from rich.console import Console
+    from rich.table import Table
+
+    table = Table(title=jobs_title(limit, country, keywords, job_type), show_lines=True)
     table.add_column("Company", style="cyan")
     table.add_column("Title", style="green")
     table.add_column("Location", style="magenta")
@@ -34,4 +643,5 @@ def show_jobs(jobs, limit=10, country=None, keywords=None, job_type=None):
             job.get("location", "N/A"),
             job.get("url", ""),
         )
-    console.print(table)
+    with span("render"):
+        (console or Console()).print(table)
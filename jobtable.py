@@ -0,0 +1,332 @@
+import sys
+from functools import cached_property
+
+import numpy as np
+
+from dedupe import cluster_rows, fingerprint, title_key
+from metrics import timed
+from store import job_key
+from text import prepare_job
+
+
+class Interner:
+    """Maps repeated strings to small integer codes, sharing one copy of each."""
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def code(self, value):
+        if value is None or value == "":
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(sys.intern(value))
+        return code
+
+
+def _objects(values):
+    import pandas as pd
+
+    # Keep Python strings as they are instead of converting to a string dtype.
+    return pd.Series(values, dtype=object, copy=False)
+
+
+class JobTable:
+    """Immutable, column-oriented container for a set of jobs.
+
+    Company, location, source and job-type strings are interned into categorical
+    codes, flags and timestamps live in NumPy arrays and job types are
+    stored as one flat code array with per-row offsets. Build it once per
+    fetch with :meth:`from_records` and share it; :attr:`frame` exposes the
+    same columns as a DataFrame without copying the strings.
+    """
+
+    def __init__(
+        self,
+        keys,
+        titles,
+        urls,
+        previews,
+        texts,
+        company_codes,
+        companies,
+        location_codes,
+        locations,
+        remote,
+        created_at,
+        fingerprints,
+        job_type_offsets,
+        job_type_codes,
+        job_types,
+        source_codes=None,
+        sources=(),
+    ):
+        self.keys = keys
+        self.titles = titles
+        self.urls = urls
+        self.previews = previews
+        self.texts = texts
+        self.company_codes = company_codes
+        self.companies = companies
+        self.location_codes = location_codes
+        self.locations = locations
+        self.remote = remote
+        self.created_at = created_at
+        self.fingerprints = fingerprints
+        self.job_type_offsets = job_type_offsets
+        self.job_type_codes = job_type_codes
+        self.job_types = job_types
+        if source_codes is None:
+            source_codes = np.full(len(keys), -1, dtype=np.int32)
+        self.source_codes = source_codes
+        self.sources = sources
+
+    @classmethod
+    @timed("table")
+    def from_records(cls, jobs):
+        """Build a table from API job dicts in a single pass."""
+        companies, locations, job_types = Interner(), Interner(), Interner()
+        sources = Interner()
+        keys, titles, urls, previews, texts = [], [], [], [], []
+        company_codes, location_codes, remote, created_at = [], [], [], []
+        fingerprints, source_codes = [], []
+        offsets, type_codes = [0], []
+        for job in jobs:
+            prepare_job(job)
+            keys.append(job_key(job))
+            titles.append(job.get("title") or "")
+            urls.append(job.get("url") or "")
+            previews.append(job["preview"])
+            texts.append(job["description_text"])
+            company_codes.append(companies.code(job.get("company_name")))
+            location_codes.append(locations.code(job.get("location")))
+            remote.append(bool(job.get("remote")))
+            created_at.append(int(job.get("created_at") or 0))
+            if "fingerprint" not in job:
+                job["fingerprint"] = fingerprint(job)
+            fingerprints.append(job["fingerprint"])
+            source_codes.append(sources.code(job.get("source")))
+            type_codes.extend(
+                job_types.code(job_type.strip())
+                for job_type in job.get("job_types") or ()
+                if job_type and job_type.strip()
+            )
+            offsets.append(len(type_codes))
+        return cls(
+            keys=np.array(keys, dtype=object),
+            titles=np.array(titles, dtype=object),
+            urls=np.array(urls, dtype=object),
+            previews=np.array(previews, dtype=object),
+            texts=np.array(texts, dtype=object),
+            company_codes=np.array(company_codes, dtype=np.int32),
+            companies=companies.values,
+            location_codes=np.array(location_codes, dtype=np.int32),
+            locations=locations.values,
+            remote=np.array(remote, dtype=bool),
+            created_at=np.array(created_at, dtype=np.int64),
+            fingerprints=np.array(fingerprints, dtype=np.uint64),
+            job_type_offsets=np.array(offsets, dtype=np.int64),
+            job_type_codes=np.array(type_codes, dtype=np.int32),
+            job_types=job_types.values,
+            source_codes=np.array(source_codes, dtype=np.int32),
+            sources=sources.values,
+        )
+
+    @classmethod
+    @timed("table")
+    def from_arrow(cls, table):
+        """Build a table from the columns of :meth:`to_arrow`, without per-job work.
+
+        Strings are dictionary-encoded by Arrow instead of interned one by
+        one. Columns missing from ``table`` (e.g. not read from a snapshot)
+        are left empty.
+        """
+        import pyarrow.compute as pc
+
+        rows = table.num_rows
+
+        def column(name, default):
+            if name not in table.column_names:
+                return None
+            return pc.fill_null(table.column(name).combine_chunks(), default)
+
+        def objects(name):
+            values = column(name, "")
+            if values is None:
+                return np.full(rows, "", dtype=object)
+            return values.to_numpy(zero_copy_only=False)
+
+        def numbers(name, dtype):
+            values = column(name, dtype(0))
+            if values is None:
+                return np.zeros(rows, dtype=dtype)
+            return values.to_numpy(zero_copy_only=False).astype(dtype, copy=False)
+
+        def categories(values):
+            if values is None:
+                return np.full(rows, -1, dtype=np.int32), []
+            encoded = pc.dictionary_encode(values)
+            codes = pc.fill_null(encoded.indices, -1).to_numpy(zero_copy_only=False)
+            return codes.astype(np.int32), encoded.dictionary.to_pylist()
+
+        def chunks(name):
+            if name not in table.column_names:
+                return None
+            return table.column(name).combine_chunks()
+
+        company_codes, companies = categories(chunks("company_name"))
+        location_codes, locations = categories(chunks("location"))
+        source_codes, sources = categories(chunks("source"))
+        if "job_types" in table.column_names:
+            lists = chunks("job_types")
+            offsets = lists.offsets.to_numpy().astype(np.int64)
+            type_codes, job_types = categories(lists.values[offsets[0] : offsets[-1]])
+            offsets -= offsets[0]
+        else:
+            offsets = np.zeros(rows + 1, dtype=np.int64)
+            type_codes, job_types = np.array([], dtype=np.int32), []
+        return cls(
+            keys=objects("slug"),
+            titles=objects("title"),
+            urls=objects("url"),
+            previews=objects("preview"),
+            texts=objects("description_text"),
+            company_codes=company_codes,
+            companies=companies,
+            location_codes=location_codes,
+            locations=locations,
+            remote=numbers("remote", np.bool_),
+            created_at=numbers("created_at", np.int64),
+            fingerprints=numbers("fingerprint", np.uint64),
+            job_type_offsets=offsets,
+            job_type_codes=type_codes,
+            job_types=job_types,
+            source_codes=source_codes,
+            sources=sources,
+        )
+
+    def to_arrow(self):
+        """The table as a :class:`pyarrow.Table`; pyarrow is only imported here."""
+        import pyarrow as pa
+
+        def strings(codes, values):
+            indices = pa.array(codes, mask=codes < 0)
+            return pa.array(values, pa.string()).take(indices)
+
+        return pa.table(
+            {
+                "slug": pa.array(self.keys, pa.string()),
+                "title": pa.array(self.titles, pa.string()),
+                "company_name": strings(self.company_codes, self.companies),
+                "location": strings(self.location_codes, self.locations),
+                "remote": pa.array(self.remote),
+                "url": pa.array(self.urls, pa.string()),
+                "job_types": pa.ListArray.from_arrays(
+                    pa.array(self.job_type_offsets, pa.int32()),
+                    strings(self.job_type_codes, self.job_types),
+                ),
+                "created_at": pa.array(self.created_at),
+                "fingerprint": pa.array(self.fingerprints),
+                "preview": pa.array(self.previews, pa.string()),
+                "description_text": pa.array(self.texts, pa.string()),
+                "source": strings(self.source_codes, self.sources),
+            }
+        )
+
+    def __len__(self):
+        return len(self.keys)
+
+    @cached_property
+    def positions(self):
+        """Map each job key to its row number."""
+        return {key: row for row, key in enumerate(self.keys)}
+
+    @cached_property
+    def clusters(self):
+        """For each row, the row of the first near-duplicate posting in the table.
+
+        Postings of the same company and title whose description fingerprints
+        are close enough form one cluster; other rows point to themselves.
+        """
+        groups = [
+            (
+                company,
+                title_key(title, self.locations[location] if location >= 0 else ""),
+            )
+            for company, title, location in zip(
+                self.company_codes.tolist(), self.titles, self.location_codes.tolist()
+            )
+        ]
+        return cluster_rows(self.fingerprints, groups)
+
+    def row_job_types(self, row):
+        start, end = self.job_type_offsets[row], self.job_type_offsets[row + 1]
+        return [self.job_types[code] for code in self.job_type_codes[start:end]]
+
+    def job_type_rows(self):
+        """Return the row number of every entry in :attr:`job_type_codes`."""
+        return np.repeat(np.arange(len(self)), np.diff(self.job_type_offsets))
+
+    @staticmethod
+    def _category(codes, categories):
+        import pandas as pd
+
+        return pd.Categorical.from_codes(
+            codes, pd.Index(categories, dtype=object), validate=False
+        )
+
+    @cached_property
+    @timed("frame")
+    def frame(self):
+        """The table as a DataFrame, built once and shared by every caller.
+
+        Strings are referenced rather than copied and company/location are
+        categoricals over the interned values. Treat it as read-only. pandas
+        is only imported here, so the CLI never pays for it.
+        """
+        import pandas as pd
+
+        return pd.DataFrame(
+            {
+                "slug": _objects(self.keys),
+                "title": _objects(self.titles),
+                "company_name": self._category(self.company_codes, self.companies),
+                "location": self._category(self.location_codes, self.locations),
+                "remote": self.remote,
+                "url": _objects(self.urls),
+                "job_types": _objects(
+                    [self.row_job_types(row) for row in range(len(self))]
+                ),
+                "created_at": self.created_at,
+                "preview": _objects(self.previews),
+                "description_text": _objects(self.texts),
+                "source": self._category(self.source_codes, self.sources),
+            },
+            copy=False,
+        )
+
+    def record(self, row):
+        """Return one row as a job dict with the API's field names."""
+        company = self.company_codes[row]
+        location = self.location_codes[row]
+        source = self.source_codes[row]
+        return {
+            "slug": self.keys[row],
+            "title": self.titles[row],
+            "company_name": self.companies[company] if company >= 0 else "",
+            "location": self.locations[location] if location >= 0 else "",
+            "remote": bool(self.remote[row]),
+            "url": self.urls[row],
+            "job_types": self.row_job_types(row),
+            "created_at": int(self.created_at[row]),
+            "fingerprint": int(self.fingerprints[row]),
+            "preview": self.previews[row],
+            "description_text": self.texts[row],
+            "source": self.sources[source] if source >= 0 else "",
+        }
+
+    def records(self, rows=None):
+        rows = range(len(self)) if rows is None else rows
+        return [self.record(row) for row in rows]
@@ -0,0 +1,115 @@
+import codecs
+import json
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = " \t\n\r"
+
+_decoder = json.JSONDecoder()
+
+
+def _skip(buffer, pos, chars):
+    while pos < len(buffer) and buffer[pos] in chars:
+        pos += 1
+    return pos
+
+
+def iter_array(chunks, key="data"):
+    """Yield the items of the array under ``key`` of a JSON object, one by one.
+
+    ``chunks`` are the raw bytes of the document as they arrive (e.g.
+    ``response.iter_content()``). Each item is decoded as soon as its last
+    byte is in, and only the undecoded tail is buffered, so the whole body
+    and the whole decoded document never exist at once. Values under other
+    keys are decoded and discarded. A body without ``key`` (or an empty
+    body) yields nothing; malformed JSON raises :class:`json.JSONDecodeError`.
+    """
+    decode = codecs.getincrementaldecoder("utf-8")().decode
+    chunks = iter(chunks)
+    buffer = ""
+    pos = 0
+    state = "start"
+    final = False
+
+    def complete(end):
+        # A number or literal may continue in the next chunk ("1." then "5"),
+        # so a value only counts once the delimiter after it is in.
+        after = _skip(buffer, end, WHITESPACE)
+        if after == len(buffer):
+            return final
+        if buffer[after] in ",}]":
+            return True
+        if final:
+            raise json.JSONDecodeError(
+                "Expected ',' or a closing bracket", buffer, after
+            )
+        return False
+
+    while True:
+        while True:
+            pos = _skip(buffer, pos, WHITESPACE + ("," if state != "start" else ""))
+            if pos == len(buffer):
+                break
+            char = buffer[pos]
+            if state == "start":
+                if char != "{":
+                    raise json.JSONDecodeError("Expected an object", buffer, pos)
+                pos += 1
+                state = "key"
+            elif state == "key":
+                if char == "}":
+                    return
+                try:
+                    name, end = _decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    break
+                colon = _skip(buffer, end, WHITESPACE)
+                if colon == len(buffer) and not final:
+                    break
+                if colon == len(buffer) or buffer[colon] != ":":
+                    raise json.JSONDecodeError("Expected ':'", buffer, colon)
+                pos = colon + 1
+                state = "array" if name == key else "value"
+            elif state == "value":
+                try:
+                    _, end = _decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    break
+                if not complete(end):
+                    break
+                pos = end
+                state = "key"
+            elif state == "array":
+                if char != "[":
+                    raise json.JSONDecodeError(f"Expected {key!r} array", buffer, pos)
+                pos += 1
+                state = "items"
+            else:  # items
+                if char == "]":
+                    return
+                try:
+                    item, end = _decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    break
+                if not complete(end):
+                    break
+                pos = end
+                yield item
+
+        if final:
+            if state == "start":
+                return
+            raise json.JSONDecodeError("Unexpected end of document", buffer, pos)
+        buffer = buffer[pos:]
+        pos = 0
+        chunk = next(chunks, None)
+        if chunk is None:
+            final = True
+            buffer += decode(b"", final=True)
+        else:
+            buffer += decode(chunk)
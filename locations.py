@@ -0,0 +1,84 @@
+import csv
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_GAZETTEER = Path(__file__).resolve().parent / "data" / "cities.csv"
+
+
+@dataclass(frozen=True)
+class City:
+    name: str
+    country: str
+    lat: float
+    lon: float
+
+
+class Gazetteer:
+    """Resolves free-form location strings to known cities.
+
+    All names are compiled into a single regular expression alternation with
+    word boundaries, longest names first, so matching costs one scan per
+    string however large the gazetteer is ("Frankfurt am Main" wins over
+    "Frankfurt", "Hamm" does not match inside "Hamburg"). Results are cached
+    per distinct location string.
+    """
+
+    def __init__(self, names, cache_size=65_536):
+        self.names = {name.casefold(): city for name, city in names.items()}
+        alternatives = sorted(self.names, key=len, reverse=True)
+        self._pattern = re.compile(
+            r"\b(?:" + "|".join(map(re.escape, alternatives)) + r")\b"
+        )
+        self.resolve = lru_cache(maxsize=cache_size)(self._resolve)
+
+    @classmethod
+    def from_csv(cls, path=DEFAULT_GAZETTEER):
+        """Load a ``name,city,country,lat,lon`` file; aliases share a city."""
+        cities = {}
+        names = {}
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                key = (row["city"], row["country"])
+                if key not in cities:
+                    cities[key] = City(
+                        row["city"],
+                        row["country"],
+                        float(row["lat"]),
+                        float(row["lon"]),
+                    )
+                names[row["name"]] = cities[key]
+        return cls(names)
+
+    def _resolve(self, location):
+        if not location:
+            return None
+        match = self._pattern.search(location.casefold())
+        return self.names[match.group()] if match else None
+
+    def city_counts(self, locations, codes):
+        """Count jobs per city from interned location ``codes``.
+
+        ``locations`` are the distinct location strings the codes refer to,
+        so each distinct string is resolved once however many jobs share it.
+        """
+        counts = np.bincount(codes[codes >= 0], minlength=len(locations))
+        return self.city_totals(zip(locations, counts.tolist()))
+
+    def city_totals(self, location_counts):
+        """Sum ``(location, count)`` pairs per city, e.g. store aggregates."""
+        totals = {}
+        for location, count in location_counts:
+            city = self.resolve(location) if count else None
+            if city is not None:
+                totals[city] = totals.get(city, 0) + count
+        return totals
+
+
+@lru_cache(maxsize=None)
+def load_gazetteer(path=DEFAULT_GAZETTEER):
+    """Load and compile a gazetteer file once per process."""
+    return Gazetteer.from_csv(path)
@@ -1,15 +1,224 @@
 import argparse
+import csv
+import json
+import sys
+import time
+from contextlib import closing
+from dataclasses import replace
+from itertools import islice
 
-from rich.console import Console
+from filterspec import SORT_ORDERS, FilterSpec
+from jobs import (
+    DEFAULT_SOURCES,
+    SOURCES,
+    get_cache,
+    get_sources,
+    iter_source_pages,
+    jobs_title,
+    show_jobs,
+)
+from metrics import registry
 
-from jobs import fetch_jobs, show_jobs
+# Heavy modules (requests, rich, numpy, pandas) are imported where they are
+# first needed, so --help, argument errors and plain-text runs start quickly.
+OUTPUT_FORMATS = ("table", "json", "jsonl", "csv")
+OUTPUT_FIELDS = (
+    "slug",
+    "title",
+    "company_name",
+    "location",
+    "remote",
+    "job_types",
+    "url",
+    "created_at",
+    "source",
+)
+# Sort orders that match a board's own newest-first order, so matches can be
+# emitted page by page. Any other order (or "newest" across several boards)
+# needs every page before the first row.
+STREAMING_SORTS = (None, "newest")
 
-console = Console()
+
+def iter_matching_jobs(
+    spec,
+    max_pages=1,
+    use_cache=True,
+    refresh=False,
+    collapse=True,
+    limit=None,
+    sources=None,
+):
+    """Yield jobs matching ``spec`` as pages arrive.
+
+    Pages are only requested while the consumer keeps pulling, so stopping
+    early (e.g. once ``--limit`` matches are found) stops the fetching too.
+    With ``collapse``, near-duplicates of a job already yielded (reposts,
+    the same role in several cities) are skipped, across pages too.
+    ``limit`` lets sorts that need every page (such as relevance) rank just
+    the top matches, however many duplicates are skipped. ``sources``
+    (default: the configured boards) are fetched side by side, ``max_pages``
+    pages from each.
+    """
+    import numpy as np
+
+    from dedupe import Deduplicator, group_key
+    from filters import filter_rows, iter_ranked_rows
+    from jobtable import JobTable
+
+    deduplicator = Deduplicator() if collapse else None
+
+    def is_new(job):
+        if deduplicator is None:
+            return True
+        key = job["slug"]
+        return deduplicator.add(job["fingerprint"], key, group_key(job)) == key
+
+    sources = sources or get_sources()
+    pages = iter_source_pages(
+        sources, max_pages=max_pages, use_cache=use_cache, refresh=refresh
+    )
+    streaming = spec.sort_by is None or (
+        spec.sort_by in STREAMING_SORTS and len(sources) == 1
+    )
+    with closing(pages):
+        if streaming:
+            for _, _, jobs in pages:
+                table = JobTable.from_records(jobs)
+                for row in filter_rows(table, spec):
+                    job = table.record(row)
+                    if is_new(job):
+                        yield job
+            return
+
+        unsorted = replace(spec, sort_by=None)
+        matches = []
+        for _, _, jobs in pages:
+            table = JobTable.from_records(jobs)
+            matches.extend(table.records(filter_rows(table, unsorted)))
+    table = JobTable.from_records(matches)
+    # Every row matches; the keywords are only needed to rank. Rows are
+    # ranked ``limit`` at a time, and more only if duplicates were skipped.
+    ranking = FilterSpec(keywords=spec.keywords, sort_by=spec.sort_by)
+    rows = np.arange(len(table))
+    for row in iter_ranked_rows(table, rows, ranking, batch=limit):
+        job = table.record(row)
+        if is_new(job):
+            yield job
+
+
+def project(job):
+    return {field: job.get(field) for field in OUTPUT_FIELDS}
+
+
+def write_jsonl(jobs, out):
+    for job in jobs:
+        out.write(json.dumps(project(job), ensure_ascii=False) + "\n")
+
+
+def write_json(jobs, out):
+    # Written element by element so memory stays flat for large result sets.
+    out.write("[")
+    for i, job in enumerate(jobs):
+        out.write(",\n " if i else "\n ")
+        out.write(json.dumps(project(job), ensure_ascii=False))
+    out.write("\n]\n")
+
+
+def write_csv(jobs, out):
+    writer = csv.DictWriter(out, fieldnames=OUTPUT_FIELDS)
+    writer.writeheader()
+    for job in jobs:
+        row = project(job)
+        row["job_types"] = "; ".join(row["job_types"] or ())
+        writer.writerow(row)
+
+
+WRITERS = {"json": write_json, "jsonl": write_jsonl, "csv": write_csv}
+
+
+def format_columns(headers, rows, right_align=()):
+    """Lay ``rows`` out as plain-text columns under ``headers``."""
+    rows = [headers, *rows]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(headers))]
+    lines = []
+    for row in rows:
+        cells = [
+            cell.rjust(width) if i in right_align else cell.ljust(width)
+            for i, (cell, width) in enumerate(zip(row, widths))
+        ]
+        lines.append("  ".join(cells).rstrip())
+    return lines
+
+
+def write_text(jobs, out, title):
+    out.write(title + "\n\n")
+    rows = [
+        [
+            job.get("company_name") or "N/A",
+            job.get("title") or "N/A",
+            job.get("location") or "N/A",
+            job.get("url") or "",
+        ]
+        for job in jobs
+    ]
+    for line in format_columns(["Company", "Title", "Location", "URL"], rows):
+        out.write(line + "\n")
+
+
+def show_profile(out, wall_time):
+    """Print the time spent in each stage of the run."""
+    headers = ["Stage", "Calls", "Total ms", "Mean ms", "Max ms"]
+    rows = [
+        [
+            row["stage"],
+            str(row["count"]),
+            f"{row['total'] * 1000:.1f}",
+            f"{row['mean'] * 1000:.2f}",
+            f"{row['max'] * 1000:.2f}",
+        ]
+        for row in registry.stages()
+    ]
+    title = f"Profile ({wall_time * 1000:.1f} ms wall time)"
+    note = "Fetch stages run on several workers at once and can overlap."
+    if out.isatty():
+        from rich.console import Console
+        from rich.table import Table
+
+        table = Table(title=title)
+        table.add_column(headers[0], style="cyan")
+        for header in headers[1:]:
+            table.add_column(header, justify="right")
+        for row in rows:
+            table.add_row(*row)
+        console = Console(file=out)
+        console.print(table)
+        console.print(note)
+    else:
+        lines = format_columns(headers, rows, right_align=range(1, len(headers)))
+        out.write("\n".join([title, *lines, note]) + "\n")
+
+
+def _at_least(minimum, value):
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a whole number: {value!r}") from None
+    if number < minimum:
+        raise argparse.ArgumentTypeError(f"must be {minimum} or more, not {value}")
+    return number
+
+
+def positive_int(value):
+    return _at_least(1, value)
+
+
+def non_negative_int(value):
+    return _at_least(0, value)
 
 
 def main():
     parser = argparse.ArgumentParser(
-        description="Fetch remote jobs from Arbeitnow API."
+        description="Fetch remote jobs from Arbeitnow and other job boards."
     )
     parser.add_argument(
         "--country",
@@ -19,52 +228,381 @@ def main():
     parser.add_argument(
         "--keywords",
         type=str,
-        help="Comma-separated keywords to filter job titles and descriptions.",
+        help=(
+            "Comma-separated keywords to filter job titles and descriptions. "
+            'Also accepts AND/OR/NOT, "quoted phrases" and prefix* terms.'
+        ),
     )
     parser.add_argument(
         "--job-type",
         type=str,
         help="Filter jobs by type (e.g., 'student', 'internship').",
     )
+    parser.add_argument(
+        "--remote-only",
+        action="store_true",
+        help="Only show jobs marked as remote.",
+    )
+    parser.add_argument(
+        "--sort",
+        choices=sorted(SORT_ORDERS),
+        help=(
+            "Sort the results (default: API order, newest first). 'relevance' "
+            "ranks by how well jobs match --keywords."
+        ),
+    )
+    parser.add_argument(
+        "--limit",
+        type=non_negative_int,
+        default=10,
+        help="Maximum number of jobs to show; 0 for no limit (default: 10).",
+    )
+    pages = parser.add_mutually_exclusive_group()
+    pages.add_argument(
+        "--pages",
+        type=positive_int,
+        default=1,
+        help="Number of pages to search on each board (default: 1).",
+    )
+    pages.add_argument(
+        "--all",
+        action="store_true",
+        help="Search every page of the job board.",
+    )
+    parser.add_argument(
+        "--sources",
+        metavar="NAMES",
+        help=(
+            f"Comma-separated job boards to read ({', '.join(SOURCES)}; "
+            f"default: $REMOTEJOBS_SOURCES or {DEFAULT_SOURCES})."
+        ),
+    )
+    parser.add_argument(
+        "--show-similar",
+        action="store_true",
+        help="Show every near-duplicate posting instead of only the first one.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="table",
+        help="Output format (default: table).",
+    )
+    watch = parser.add_argument_group(
+        "watch mode",
+        "Keep polling the newest pages and report only jobs that were not on "
+        "the board before. --pages, --sort and --limit do not apply.",
+    )
+    watch.add_argument(
+        "--watch",
+        action="store_true",
+        help="Poll for new matching jobs until interrupted.",
+    )
+    watch.add_argument(
+        "--interval",
+        type=float,
+        metavar="SECONDS",
+        help="Shortest time between polls (default: 60).",
+    )
+    watch.add_argument(
+        "--max-interval",
+        type=float,
+        metavar="SECONDS",
+        help="Longest time between polls while nothing changes (default: 900).",
+    )
+    watch.add_argument(
+        "--output",
+        metavar="FILE",
+        help="Append new jobs to FILE as JSON lines instead of printing them.",
+    )
+    watch.add_argument(
+        "--on-new",
+        metavar="COMMAND",
+        help="Run COMMAND with the new jobs as JSON lines on stdin.",
+    )
+    saved = parser.add_argument_group(
+        "saved searches",
+        "Keep standing searches and report the new jobs each of them matches.",
+    )
+    saved.add_argument(
+        "--save-search",
+        metavar="NAME",
+        help=(
+            "Save the --country, --keywords, --job-type and --remote-only "
+            "filters as the search NAME."
+        ),
+    )
+    saved.add_argument(
+        "--delete-search",
+        metavar="NAME",
+        help="Delete the saved search NAME.",
+    )
+    saved.add_argument(
+        "--list-searches",
+        action="store_true",
+        help="List the saved searches.",
+    )
+    saved.add_argument(
+        "--alerts",
+        action="store_true",
+        help=(
+            "Sync new jobs into the local store and show the ones each saved "
+            "search matches. With --on-new, pass them to COMMAND instead."
+        ),
+    )
+    parser.add_argument(
+        "--snapshot",
+        action="store_true",
+        help=(
+            "Fetch every page and save a columnar snapshot of the board for "
+            "inspect_job.py, then exit."
+        ),
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the on-disk response cache.",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Revalidate cached pages with the API even if they are fresh.",
+    )
+    parser.add_argument(
+        "--cache-stats",
+        action="store_true",
+        help="Print response cache statistics after the run.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print a breakdown of where the run spent its time.",
+    )
     args = parser.parse_args()
+    started = time.perf_counter()
 
-    console.print("[bold blue]Fetching latest remote jobs...[/bold blue]")
-    jobs = fetch_jobs()
+    if args.keywords:
+        from search import QuerySyntaxError, compile_keywords
 
-    if args.country:
-        jobs = [
-            job
-            for job in jobs
-            if args.country.lower() in job.get("location", "").lower()
-        ]
+        try:
+            compile_keywords(args.keywords)
+        except QuerySyntaxError as e:
+            parser.error(f"invalid --keywords query: {e}")
+    try:
+        args.sources = get_sources(args.sources)
+    except ValueError as e:
+        parser.error(str(e))
 
-    if args.keywords:
-        keywords_list = [k.strip().lower() for k in args.keywords.split(",")]
-        jobs = [
-            job
-            for job in jobs
-            if any(
-                k in job.get("title", "").lower()
-                or k in job.get("description", "").lower()
-                for k in keywords_list
-            )
-        ]
+    spec = FilterSpec(
+        remote_only=args.remote_only,
+        location=args.country or "",
+        keywords=args.keywords or "",
+        job_types=[args.job_type] if args.job_type else [],
+        sort_by=args.sort,
+    )
+    if args.snapshot:
+        run_snapshot(args)
+        return
+    if args.save_search or args.delete_search or args.list_searches or args.alerts:
+        if args.watch or args.output:
+            parser.error("saved search options cannot be combined with --watch")
+        if args.save_search and not spec.is_active():
+            parser.error("--save-search needs at least one filter to save")
+        if args.alerts and args.format not in ("table", "jsonl"):
+            parser.error("--alerts prints one list per search: use table or jsonl")
+        run_saved_searches(args, spec)
+        return
+    if args.watch:
+        if args.format not in ("table", "jsonl"):
+            parser.error("--watch prints jobs as they appear: use table or jsonl")
+        run_watch(args, replace(spec, sort_by=None))
+        return
+    if args.output or args.on_new:
+        parser.error("--output needs --watch, --on-new needs --watch or --alerts")
 
-    if args.job_type:
-        job_type_lower = args.job_type.lower()
-        jobs = [
-            job
-            for job in jobs
-            if job_type_lower in job.get("title", "").lower()
-            or job_type_lower in job.get("description", "").lower()
-        ]
+    matches = iter_matching_jobs(
+        spec,
+        max_pages=None if args.all else args.pages,
+        use_cache=not args.no_cache,
+        refresh=args.refresh,
+        collapse=not args.show_similar,
+        limit=args.limit or None,
+        sources=args.sources,
+    )
+    # Closing the pipeline as soon as output is done cancels queued fetches.
+    with closing(matches):
+        jobs = islice(matches, args.limit) if args.limit else matches
+        if args.format == "table":
+            keywords = args.keywords.split(",") if args.keywords else None
+            if sys.stdout.isatty():
+                from rich.console import Console
+
+                Console().print("[bold blue]Fetching latest remote jobs...[/bold blue]")
+                jobs = list(jobs)
+                show_jobs(
+                    jobs,
+                    limit=len(jobs),
+                    country=args.country,
+                    keywords=keywords,
+                    job_type=args.job_type,
+                )
+            else:
+                # Piped or redirected: plain columns, without loading rich.
+                jobs = list(jobs)
+                title = jobs_title(len(jobs), args.country, keywords, args.job_type)
+                with registry.span("render"):
+                    write_text(jobs, sys.stdout, title)
+        else:
+            with registry.span("render"):
+                WRITERS[args.format](jobs, sys.stdout)
+
+    report_stats(args, started)
 
-    show_jobs(
-        jobs,
-        country=args.country,
-        keywords=args.keywords.split(",") if args.keywords else None,
-        job_type=args.job_type,
+
+def run_watch(args, spec):
+    """Run ``--watch`` until interrupted, then report like a one-shot run."""
+    import watch
+
+    schedule = watch.PollSchedule(
+        min_interval=args.interval or watch.MIN_INTERVAL,
+        max_interval=args.max_interval or watch.MAX_INTERVAL,
+    )
+    watcher = watch.Watcher(
+        spec,
+        use_cache=not args.no_cache,
+        collapse=not args.show_similar,
+        schedule=schedule,
+        sources=args.sources,
     )
+    sinks = []
+    output = open(args.output, "a", encoding="utf-8") if args.output else None
+    if output:
+        sinks.append(watch.jsonl_sink(output, project))
+    if args.on_new:
+        sinks.append(watch.command_sink(args.on_new, project))
+    if not sinks and args.format == "jsonl":
+        sinks.append(watch.jsonl_sink(sys.stdout, project))
+    elif not sinks:
+        sinks.append(watch.terminal_sink(sys.stdout))
+
+    def on_new(jobs):
+        for sink in sinks:
+            sink(jobs)
+
+    print(
+        f"Watching for new jobs every {schedule.min_interval:g}–"
+        f"{schedule.max_interval:g} s (Ctrl+C to stop)...",
+        file=sys.stderr,
+    )
+    started = time.perf_counter()
+    try:
+        watcher.run(on_new)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if output:
+            output.close()
+    report_stats(args, started)
+
+
+def run_snapshot(args):
+    from jobs import snapshot_board
+
+    started = time.perf_counter()
+    try:
+        snapshot = snapshot_board(use_cache=not args.no_cache, sources=args.sources)
+    except ImportError as e:
+        sys.exit(f"Snapshots need pyarrow ({e}); install remotejobs-cli[snapshots].")
+    print(f"Saved {snapshot.count()} jobs to {snapshot.path}")
+    report_stats(args, started)
+
+
+def describe_spec(spec):
+    parts = []
+    if spec.keywords:
+        parts.append(f"keywords: {spec.keywords}")
+    if spec.location:
+        parts.append(f"location: {spec.location}")
+    if spec.job_types:
+        parts.append(f"job type: {', '.join(spec.job_types)}")
+    if spec.remote_only:
+        parts.append("remote only")
+    return "; ".join(parts)
+
+
+def run_saved_searches(args, spec):
+    """Manage saved searches, or report their new matches with ``--alerts``."""
+    from alerts import SavedSearches
+    from jobs import get_store
+
+    started = time.perf_counter()
+    searches = SavedSearches.open()
+    if args.save_search:
+        searches.save(args.save_search, spec)
+        # Alerts cover the jobs added from now on.
+        searches.prime(get_store())
+        print(f"Saved search {args.save_search!r} ({describe_spec(spec)}).")
+        return
+    if args.delete_search:
+        if not searches.delete(args.delete_search):
+            sys.exit(f"No saved search named {args.delete_search!r}.")
+        print(f"Deleted search {args.delete_search!r}.")
+        return
+    saved = searches.all()
+    if args.list_searches or not saved:
+        if not saved:
+            print("No saved searches yet; save one with --save-search NAME.")
+            return
+        rows = [[name, describe_spec(spec)] for name, spec in saved.items()]
+        print("\n".join(format_columns(["Name", "Filters"], rows)))
+        return
+
+    from jobs import sync_jobs
+
+    store = get_store()
+    sync_jobs(store, use_cache=not args.no_cache, sources=args.sources)
+    matches = searches.check_store(store)
+
+    rows = [
+        {"search": name, **project(job)}
+        for name, jobs in matches.items()
+        for job in jobs
+    ]
+    if args.on_new:
+        import watch
+
+        if rows:
+            watch.command_sink(args.on_new, dict)(rows)
+    elif args.format == "jsonl":
+        for row in rows:
+            sys.stdout.write(json.dumps(row, ensure_ascii=False) + "\n")
+    elif not matches:
+        print(f"No new matches for your {len(saved)} saved searches.")
+    else:
+        with registry.span("render"):
+            for name, jobs in matches.items():
+                write_text(jobs, sys.stdout, f"{name}: {len(jobs)} new jobs")
+                sys.stdout.write("\n")
+    report_stats(args, started)
+
+
+def report_stats(args, started):
+    status = sys.stdout if args.format == "table" else sys.stderr
+    if args.cache_stats:
+        cache = get_cache()
+        if cache is None:
+            print("Response cache is disabled.", file=status)
+        else:
+            stats = cache.stats()
+            stale = f", {stats['stale']} stale" if stats["stale"] else ""
+            print(
+                f"Cache: {stats['hits']} hits, {stats['revalidated']} revalidated, "
+                f"{stats['misses']} misses{stale}, {stats['entries']} entries "
+                f"({stats['size_bytes'] / 1024:.0f} KiB)",
+                file=status,
+            )
+    if args.profile:
+        show_profile(status, time.perf_counter() - started)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,187 @@
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds, matching the Prometheus client defaults.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_PREFIX = "remotejobs"
+
+
+class Histogram:
+    """Cumulative latency histogram for one stage."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.last = seconds
+
+
+class Metrics:
+    """Process-wide registry of stage timings and event counters.
+
+    Spans cost two ``perf_counter`` calls and a short critical section, so
+    they can stay enabled on hot paths. Spans running on worker threads
+    overlap, so stage totals can add up to more than the wall-clock time.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._stages = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def stages(self):
+        """Return per-stage summaries, most expensive first."""
+        with self._lock:
+            rows = [
+                {
+                    "stage": stage,
+                    "count": h.count,
+                    "total": h.total,
+                    "mean": h.total / h.count,
+                    "max": h.max,
+                    "last": h.last,
+                }
+                for stage, h in self._stages.items()
+            ]
+        return sorted(rows, key=lambda row: row["total"], reverse=True)
+
+    def counters(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+    def to_prometheus(self, cache_stats=None):
+        """Render the registry in the Prometheus text exposition format.
+
+        ``cache_stats`` is a :meth:`cache.ResponseCache.stats` dict whose
+        counters and hit rate are exported alongside the stage timings.
+        """
+        name = f"{METRIC_PREFIX}_stage_duration_seconds"
+        lines = [
+            f"# HELP {name} Time spent in each pipeline stage.",
+            f"# TYPE {name} histogram",
+        ]
+        with self._lock:
+            stages = sorted(self._stages.items())
+            counters = sorted(self._counters.items())
+            for stage, h in stages:
+                cumulative = 0
+                for bound, count in zip((*h.buckets, "+Inf"), h.counts):
+                    cumulative += count
+                    lines.append(
+                        f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}'
+                    )
+                lines.append(f'{name}_sum{{stage="{stage}"}} {h.total:.6f}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {h.count}')
+
+        if counters:
+            name = f"{METRIC_PREFIX}_events_total"
+            lines += [f"# HELP {name} Event counters.", f"# TYPE {name} counter"]
+            lines += [f'{name}{{event="{event}"}} {value}' for event, value in counters]
+
+        if cache_stats:
+            name = f"{METRIC_PREFIX}_cache_requests_total"
+            lines += [
+                f"# HELP {name} Response cache lookups by outcome.",
+                f"# TYPE {name} counter",
+            ]
+            for outcome in ("hits", "revalidated", "misses", "stale"):
+                value = cache_stats.get(outcome, 0)
+                lines.append(f'{name}{{outcome="{outcome}"}} {value}')
+            for key, help_text in (
+                ("hit_rate", "Share of lookups served without a full download."),
+                ("entries", "Pages held in the response cache."),
+                ("size_bytes", "Size of the cached response bodies."),
+            ):
+                name = f"{METRIC_PREFIX}_cache_{key}"
+                lines += [
+                    f"# HELP {name} {help_text}",
+                    f"# TYPE {name} gauge",
+                    f"{name} {cache_stats[key]}",
+                ]
+        return "\n".join(lines) + "\n"
+
+
+registry = Metrics()
+span = registry.span
+observe = registry.observe
+increment = registry.increment
+
+
+def timed(stage):
+    """Decorator recording every call of the function as a ``stage`` span."""
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def serve(port, host="0.0.0.0", metrics=registry, cache_stats=None):
+    """Serve ``/metrics`` for a Prometheus scraper on a daemon thread.
+
+    ``cache_stats`` is a callable returning the current cache statistics.
+    Returns the running server; call ``shutdown()`` on it to stop.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.to_prometheus(cache_stats() if cache_stats else None)
+            body = body.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,353 @@
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import OrderedDict
+
+from metrics import timed
+from store import job_key
+from text import html_to_text
+
+TOKEN_RE = re.compile(r"[\w+#]+")
+QUERY_TOKEN_RE = re.compile(r'"[^"]*"?|\(|\)|[^\s()"]+')
+COMBINING_RE = re.compile(
+    r"[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]"
+)
+OPERATORS = {"AND", "OR", "NOT"}
+# Gap between title and description positions so phrases never span both.
+FIELD_GAP = 1000
+# BM25F parameters: term-frequency saturation, length normalization and how
+# much more a title occurrence counts than one in the description.
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_BOOST = 3.0
+SCORE_CACHE_SIZE = 32
+
+
+def normalize(text):
+    """Casefold ``text`` and strip accents so "München" matches "munchen"."""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return COMBINING_RE.sub("", decomposed)
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(normalize(text))
+
+
+class QuerySyntaxError(ValueError):
+    pass
+
+
+class SearchIndex:
+    """Positional inverted index over job titles and descriptions.
+
+    Jobs can be added at any time; each job is indexed once, keyed by its
+    slug. Queries are parsed by :func:`parse_query` or built from a keyword
+    list with :func:`keywords_query`.
+    """
+
+    def __init__(self):
+        self._postings = {}  # term -> {doc_id: [positions]}
+        self._keys = []
+        self._doc_ids = {}
+        self._sorted_terms = None
+        # Field lengths per document and their running totals, for BM25.
+        self._lengths = []
+        self._title_total = 0
+        self._body_total = 0
+        self._scores = OrderedDict()  # query -> {doc_id: score}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._doc_ids
+
+    def add(self, key, title, text):
+        """Index one document; documents that are already indexed are skipped."""
+        with self._lock:
+            if key in self._doc_ids:
+                return
+            doc_id = len(self._keys)
+            self._keys.append(key)
+            self._doc_ids[key] = doc_id
+            doc_terms = {}
+            title_terms = tokenize(title)
+            body_terms = tokenize(text)
+            for position, term in enumerate(title_terms):
+                doc_terms.setdefault(term, []).append(position)
+            for position, term in enumerate(body_terms, FIELD_GAP):
+                doc_terms.setdefault(term, []).append(position)
+            self._lengths.append((len(title_terms), len(body_terms)))
+            self._title_total += len(title_terms)
+            self._body_total += len(body_terms)
+            self._scores.clear()
+            for term, positions in doc_terms.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    self._sorted_terms = None
+                postings[doc_id] = positions
+
+    @timed("index")
+    def add_jobs(self, jobs):
+        for job in jobs:
+            text = job.get("description_text")
+            if text is None:
+                text = html_to_text(job.get("description", ""))
+            self.add(job_key(job), job.get("title", ""), text)
+
+    @timed("index")
+    def add_table(self, table):
+        """Index the rows of a :class:`jobtable.JobTable`."""
+        for key, title, text in zip(table.keys, table.titles, table.texts):
+            self.add(key, title, text)
+
+    def search(self, query):
+        """Return the keys of the jobs matching ``query`` (a string or AST)."""
+        if isinstance(query, str):
+            query = parse_query(query)
+        with self._lock:
+            doc_ids = self._evaluate(query)
+            return {self._keys[doc_id] for doc_id in doc_ids}
+
+    def scores(self, query):
+        """Return BM25F relevance scores of the documents matching ``query``.
+
+        Every document holding one of the query's positive terms (prefix
+        terms expanded) gets a score; ``NOT`` clauses do not contribute.
+        Term statistics are kept up to date by :meth:`add`, and the scores
+        of recent queries are cached until the next document is added.
+        """
+        if isinstance(query, str):
+            query = parse_query(query)
+        with self._lock:
+            cached = self._scores.get(query)
+            if cached is None:
+                cached = self._scores[query] = self._score(query)
+                if len(self._scores) > SCORE_CACHE_SIZE:
+                    self._scores.popitem(last=False)
+            else:
+                self._scores.move_to_end(query)
+            return {self._keys[doc_id]: score for doc_id, score in cached.items()}
+
+    def _score(self, query):
+        count = len(self._keys)
+        if not count:
+            return {}
+        terms = {
+            term
+            for word, prefix in _positive_words(query)
+            for term in self._expand(word, prefix)
+        }
+        title_avg = max(self._title_total / count, 1)
+        body_avg = max(self._body_total / count, 1)
+        scores = {}
+        for term in terms:
+            postings = self._postings[term]
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, positions in postings.items():
+                title_len, body_len = self._lengths[doc_id]
+                in_title = bisect_left(positions, FIELD_GAP)
+                title_norm = 1 - BM25_B + BM25_B * title_len / title_avg
+                body_norm = 1 - BM25_B + BM25_B * body_len / body_avg
+                tf = (
+                    TITLE_BOOST * in_title / title_norm
+                    + (len(positions) - in_title) / body_norm
+                )
+                score = idf * tf * (BM25_K1 + 1) / (BM25_K1 + tf)
+                scores[doc_id] = scores.get(doc_id, 0.0) + score
+        return scores
+
+    def _expand(self, term, prefix):
+        if not prefix:
+            return [term] if term in self._postings else []
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._postings)
+        terms = []
+        for candidate in self._sorted_terms[bisect_left(self._sorted_terms, term) :]:
+            if not candidate.startswith(term):
+                break
+            terms.append(candidate)
+        return terms
+
+    def _term_docs(self, terms):
+        docs = set()
+        for term in terms:
+            docs.update(self._postings[term])
+        return docs
+
+    def _evaluate(self, node):
+        kind = node[0]
+        if kind == "and":
+            result = self._evaluate(node[1])
+            for child in node[2:]:
+                if not result:
+                    break
+                result &= self._evaluate(child)
+            return result
+        if kind == "or":
+            result = set()
+            for child in node[1:]:
+                result |= self._evaluate(child)
+            return result
+        if kind == "not":
+            return set(range(len(self._keys))) - self._evaluate(node[1])
+        if kind == "phrase":
+            return self._phrase_docs(node[1])
+        raise QuerySyntaxError(f"Unknown query node: {kind!r}")
+
+    def _phrase_docs(self, words):
+        slots = [self._expand(term, prefix) for term, prefix in words]
+        if not all(slots):
+            return set()
+        candidates = self._term_docs(slots[0])
+        for terms in slots[1:]:
+            candidates &= self._term_docs(terms)
+        if len(slots) == 1:
+            return candidates
+
+        matches = set()
+        for doc_id in candidates:
+            positions = [
+                {p for term in terms for p in self._postings[term].get(doc_id, ())}
+                for terms in slots
+            ]
+            if any(
+                all(start + i in positions[i] for i in range(1, len(positions)))
+                for start in positions[0]
+            ):
+                matches.add(doc_id)
+        return matches
+
+
+def _positive_words(node):
+    """Yield the ``(term, prefix)`` words of ``node`` outside ``NOT`` clauses."""
+    kind = node[0]
+    if kind == "phrase":
+        yield from node[1]
+    elif kind in ("and", "or"):
+        for child in node[1:]:
+            yield from _positive_words(child)
+
+
+def _phrase(text, prefix_last=False):
+    """Build a phrase node; ``word*`` marks a prefix match."""
+    words = []
+    for raw in text.split():
+        prefix = raw.endswith("*")
+        words.extend((term, False) for term in tokenize(raw))
+        if prefix and words:
+            words[-1] = (words[-1][0], True)
+    if prefix_last and words:
+        words[-1] = (words[-1][0], True)
+    return ("phrase", tuple(words)) if words else None
+
+
+def parse_query(text):
+    """Parse a boolean query into an AST.
+
+    Supports ``AND``/``OR``/``NOT`` (also ``-term``), parentheses, quoted
+    phrases and ``prefix*`` terms. Adjacent terms are implicitly ANDed and
+    ``NOT`` binds tighter than ``AND``, which binds tighter than ``OR``.
+    """
+    tokens = QUERY_TOKEN_RE.findall(text)
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def take():
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def parse_or():
+        children = [parse_and()]
+        while peek() == "OR":
+            take()
+            children.append(parse_and())
+        children = [child for child in children if child]
+        if not children:
+            return None
+        return children[0] if len(children) == 1 else ("or", *children)
+
+    def parse_and():
+        children = []
+        while peek() not in (None, "OR", ")"):
+            if peek() == "AND":
+                take()
+                continue
+            node = parse_unary()
+            if node:
+                children.append(node)
+        if not children:
+            return None
+        return children[0] if len(children) == 1 else ("and", *children)
+
+    def parse_unary():
+        token = take()
+        if token == "NOT" or (token.startswith("-") and len(token) > 1):
+            if token == "NOT" and peek() is None:
+                raise QuerySyntaxError("NOT needs a term after it")
+            operand = parse_unary() if token == "NOT" else _phrase(token[1:])
+            if operand is None:
+                raise QuerySyntaxError("NOT needs an operand")
+            return ("not", operand)
+        if token == "(":
+            node = parse_or()
+            if peek() != ")":
+                raise QuerySyntaxError("Unbalanced parentheses")
+            take()
+            return node
+        if token == ")":
+            raise QuerySyntaxError("Unbalanced parentheses")
+        if token.startswith('"'):
+            return _phrase(token.strip('"'))
+        return _phrase(token)
+
+    node = parse_or()
+    if peek() is not None:
+        raise QuerySyntaxError(f"Unexpected {peek()!r}")
+    if node is None:
+        raise QuerySyntaxError("Empty query")
+    return node
+
+
+def keywords_query(keywords):
+    """Build an OR query from plain keywords such as ``["python", "data sci"]``.
+
+    Each keyword is matched as a phrase whose last word is a prefix, which
+    keeps the old substring behaviour for partial words like "develop".
+    """
+    phrases = [_phrase(keyword, prefix_last=True) for keyword in keywords]
+    phrases = [phrase for phrase in phrases if phrase]
+    if not phrases:
+        return None
+    return phrases[0] if len(phrases) == 1 else ("or", *phrases)
+
+
+def is_boolean_query(text):
+    """Tell a boolean query apart from a plain comma-separated keyword list."""
+    return bool(
+        '"' in text
+        or "(" in text
+        or "*" in text
+        or any(token in OPERATORS for token in text.split())
+        or any(token.startswith("-") for token in text.split())
+    )
+
+
+def compile_keywords(text):
+    """Turn user input into a query AST, or None if it holds no terms.
+
+    Input using query syntax goes through :func:`parse_query`; anything else
+    is treated as a comma-separated keyword list.
+    """
+    if is_boolean_query(text):
+        return parse_query(text)
+    return keywords_query(text.split(","))
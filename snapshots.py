@@ -0,0 +1,175 @@
+import os
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from pathlib import Path
+
+from cache import default_cache_dir
+from metrics import timed
+
+# pyarrow is imported where it is first needed; it ships with streamlit, and
+# plain CLI runs never load it.
+COMPRESSION = "zstd"
+# Rows per record batch. Readers decompress one batch of one column at a time.
+BATCH_ROWS = 16 * 1024
+STAMP_FORMAT = "%Y%m%dT%H%M%SZ"
+# Columns the filters read, besides the keyword search's title and text.
+FILTER_COLUMNS = ("slug", "company_name", "location", "remote", "job_types")
+SORT_COLUMNS = ("created_at",)
+KEYWORD_COLUMNS = ("title", "description_text")
+
+
+def snapshot_dir():
+    """Return the snapshot directory, honouring ``REMOTEJOBS_SNAPSHOT_DIR``."""
+    configured = os.environ.get("REMOTEJOBS_SNAPSHOT_DIR")
+    return Path(configured) if configured else default_cache_dir() / "snapshots"
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """One saved copy of the board: an Arrow IPC file named by fetch time.
+
+    Files are compressed with zstd and sit in one ``date=YYYY-MM-DD``
+    directory per fetch day. They are read through a memory map, and only
+    the columns (and, with a filter, the rows) asked for are decoded.
+    """
+
+    path: Path
+    fetched_at: datetime
+
+    @classmethod
+    def from_path(cls, path):
+        path = Path(path)
+        stamp = path.stem.removeprefix("jobs-")
+        try:
+            fetched_at = datetime.strptime(stamp, STAMP_FORMAT)
+        except ValueError:
+            raise ValueError(f"Not a snapshot file name: {path.name}") from None
+        return cls(path, fetched_at.replace(tzinfo=timezone.utc))
+
+    @property
+    def stamp(self):
+        return self.fetched_at.strftime(STAMP_FORMAT)
+
+    def dataset(self):
+        import pyarrow.dataset as ds
+        from pyarrow import fs
+
+        return ds.dataset(
+            str(self.path),
+            format="ipc",
+            filesystem=fs.LocalFileSystem(use_mmap=True),
+        )
+
+    def count(self):
+        """Return the number of jobs, from the file's batch headers alone."""
+        return self.dataset().count_rows()
+
+    def read(self, columns=None, filter=None):
+        """Return ``columns`` (default: all) of the rows matching ``filter``.
+
+        ``filter`` is a :mod:`pyarrow.dataset` expression, e.g.
+        ``ds.field("slug") == slug``.
+        """
+        return self.dataset().to_table(columns=columns, filter=filter)
+
+
+@timed("snapshot")
+def write_snapshot(table, directory=None, fetched_at=None):
+    """Save a :class:`jobtable.JobTable` as a new snapshot and return it."""
+    import pyarrow as pa
+
+    fetched_at = fetched_at or datetime.now(timezone.utc)
+    directory = Path(directory or snapshot_dir()) / f"date={fetched_at:%Y-%m-%d}"
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"jobs-{fetched_at.strftime(STAMP_FORMAT)}.arrow"
+    arrow = table.to_arrow()
+    options = pa.ipc.IpcWriteOptions(compression=COMPRESSION)
+    # Written aside and renamed, so readers never see a partial file.
+    partial = path.with_suffix(".partial")
+    with pa.OSFile(str(partial), "wb") as sink:
+        with pa.ipc.new_file(sink, arrow.schema, options=options) as writer:
+            writer.write_table(arrow, max_chunksize=BATCH_ROWS)
+    os.replace(partial, path)
+    return Snapshot(path, fetched_at)
+
+
+def list_snapshots(directory=None):
+    """Return every snapshot in ``directory``, oldest first."""
+    directory = Path(directory or snapshot_dir())
+    snapshots = []
+    for path in directory.glob("date=*/jobs-*.arrow"):
+        try:
+            snapshots.append(Snapshot.from_path(path))
+        except ValueError:
+            continue
+    return sorted(snapshots, key=lambda snapshot: snapshot.fetched_at)
+
+
+def find_snapshot(ref=None, directory=None):
+    """Resolve ``ref`` to a snapshot.
+
+    ``ref`` is ``"latest"`` (the default), ``"previous"``, a file path, or
+    the start of a fetch time: a ``YYYY-MM-DD`` date or a ``YYYYMMDDTHHMM``
+    stamp, which picks the latest snapshot taken then.
+    """
+    ref = ref or "latest"
+    if ref.endswith(".arrow") and Path(ref).exists():
+        return Snapshot.from_path(ref)
+    snapshots = list_snapshots(directory)
+    if ref == "previous":
+        snapshots = snapshots[:-1]
+    elif ref != "latest":
+        prefix = ref.replace("-", "").replace(":", "")
+        snapshots = [s for s in snapshots if s.stamp.startswith(prefix)]
+    if not snapshots:
+        raise ValueError(f"No snapshot matches {ref!r}")
+    return snapshots[-1]
+
+
+def query(snapshot, spec, columns=None, limit=None):
+    """Run the CLI's filters over a snapshot; return ``(table, rows)``.
+
+    The filters other than the keywords run first, on the few small columns
+    they need. Text and the other ``columns`` are then read for the rows
+    left, and :func:`filters.filter_rows` matches those as ``main.py``
+    matches live pages, keywords and ranking included.
+    """
+    import numpy as np
+
+    from filters import filter_rows
+    from jobtable import JobTable
+
+    dataset = snapshot.dataset()
+    plain = replace(spec, keywords="", sort_by=None)
+    if plain.is_active():
+        table = JobTable.from_arrow(dataset.to_table(columns=list(FILTER_COLUMNS)))
+        rows = filter_rows(table, plain)
+    else:
+        rows = np.arange(dataset.count_rows())
+
+    needed = set(FILTER_COLUMNS) | set(SORT_COLUMNS)
+    if spec.keywords:
+        needed.update(KEYWORD_COLUMNS)
+    needed.update(dataset.schema.names if columns is None else columns)
+    read = [name for name in dataset.schema.names if name in needed]
+    table = JobTable.from_arrow(dataset.take(rows, columns=read))
+    return table, filter_rows(table, spec, limit=limit)
+
+
+def diff_snapshots(old, new, columns=None):
+    """Return ``(added, removed)`` Arrow tables of the jobs in only one snapshot.
+
+    Only the slugs of both snapshots are read to find the changes; the
+    other ``columns`` are read for the changed jobs alone.
+    """
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+    old_keys = old.read(["slug"]).column("slug").combine_chunks()
+    new_keys = new.read(["slug"]).column("slug").combine_chunks()
+    added = new_keys.filter(pc.invert(pc.is_in(new_keys, value_set=old_keys)))
+    removed = old_keys.filter(pc.invert(pc.is_in(old_keys, value_set=new_keys)))
+    return (
+        new.read(columns, ds.field("slug").isin(added)),
+        old.read(columns, ds.field("slug").isin(removed)),
+    )
@@ -0,0 +1,233 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Bump to rebuild the aggregates of existing stores from their jobs.
+AGGREGATES_VERSION = 1
+# Aggregate kinds: what the counts are keyed by.
+AGGREGATE_KINDS = ("job_type", "location", "day")
+# Bytes of the database file read through a shared memory map, so processes
+# on one host read the same page-cache pages instead of private copies.
+MMAP_SIZE = 256 * 1024 * 1024
+
+
+def job_key(job):
+    """Return the stable identity of a job: its slug, falling back to its URL."""
+    return job.get("slug") or job.get("url")
+
+
+def posting_day(created_at):
+    """Return the UTC ``YYYY-MM-DD`` day of a ``created_at`` timestamp."""
+    return datetime.fromtimestamp(int(created_at), timezone.utc).date().isoformat()
+
+
+def aggregate_keys(job):
+    """Yield the ``(kind, value)`` aggregates a job counts towards."""
+    for job_type in dict.fromkeys(job.get("job_types") or ()):
+        job_type = (job_type or "").strip()
+        if job_type:
+            yield "job_type", job_type
+    location = (job.get("location") or "").strip()
+    if location:
+        yield "location", location
+    if job.get("created_at"):
+        yield "day", posting_day(job["created_at"])
+
+
+def default_owner():
+    """Identify this thread of this process on this host as a lease owner."""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+class JobStore:
+    """Local SQLite store of every job seen so far, keyed by slug/URL.
+
+    Jobs are kept newest-first by ``created_at`` so pages can be read back in
+    the same order the API serves them. Posting counts per job type, location
+    and day are updated in the same transaction as each insert, so reading
+    them never scans the jobs.
+
+    Several processes can open the same file: WAL mode lets readers carry on
+    while one process writes, and :meth:`acquire_lease` picks that writer.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        # Durable at every WAL checkpoint; a crash can only lose the last sync.
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                created_at INTEGER NOT NULL,
+                first_seen REAL NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_created_at ON jobs (created_at DESC);
+            CREATE TABLE IF NOT EXISTS meta (
+                name TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS aggregates (
+                kind TEXT NOT NULL,
+                value TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (kind, value)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS leases (
+                name TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            """
+        )
+        self._conn.commit()
+        if self.get_meta("aggregates_version") != AGGREGATES_VERSION:
+            self._rebuild_aggregates()
+
+    def add(self, jobs):
+        """Insert the jobs that are not stored yet and return them."""
+        now = time.time()
+        with self._lock:
+            added = []
+            for job in jobs:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO jobs VALUES (?, ?, ?, ?, ?)",
+                    (
+                        job_key(job),
+                        job.get("url"),
+                        int(job.get("created_at") or 0),
+                        now,
+                        json.dumps(job, separators=(",", ":")),
+                    ),
+                )
+                if cursor.rowcount:
+                    added.append(job)
+            self._count(added)
+            self._conn.commit()
+        return added
+
+    def _count(self, jobs):
+        self._conn.executemany(
+            "INSERT INTO aggregates VALUES (?, ?, 1)"
+            " ON CONFLICT (kind, value) DO UPDATE SET count = count + 1",
+            (key for job in jobs for key in aggregate_keys(job)),
+        )
+
+    def _rebuild_aggregates(self):
+        """Recount the aggregates from every stored job, once per version."""
+        with self._lock:
+            self._conn.execute("DELETE FROM aggregates")
+            rows = self._conn.execute("SELECT data FROM jobs")
+            while batch := rows.fetchmany(1000):
+                self._count(json.loads(data) for (data,) in batch)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                ("aggregates_version", json.dumps(AGGREGATES_VERSION)),
+            )
+            self._conn.commit()
+
+    def aggregates(self, kind, limit=None):
+        """Return ``(value, count)`` pairs of one aggregate kind.
+
+        Job types and locations come most common first; days come in
+        chronological order.
+        """
+        if kind not in AGGREGATE_KINDS:
+            raise ValueError(f"Unknown aggregate: {kind!r}")
+        order = "value" if kind == "day" else "count DESC, value"
+        query = f"SELECT value, count FROM aggregates WHERE kind = ? ORDER BY {order}"
+        params = (kind,)
+        if limit is not None:
+            query += " LIMIT ?"
+            params += (limit,)
+        with self._lock:
+            return self._conn.execute(query, params).fetchall()
+
+    def load_jobs(self, limit=None, offset=0):
+        """Return stored jobs newest-first, optionally one window at a time."""
+        query = "SELECT data FROM jobs ORDER BY created_at DESC, rowid ASC"
+        params = ()
+        if limit is not None:
+            query += " LIMIT ? OFFSET ?"
+            params = (limit, offset)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def position(self):
+        """Return the insertion position of the last job added, 0 if none."""
+        with self._lock:
+            (position,) = self._conn.execute("SELECT MAX(rowid) FROM jobs").fetchone()
+        return position or 0
+
+    def load_added(self, after=0, limit=None):
+        """Return ``(position, job)`` pairs of jobs added after ``after``.
+
+        Jobs come in the order they were added, by any process sharing the
+        file, so a saved position picks up exactly the jobs added since.
+        """
+        query = "SELECT rowid, data FROM jobs WHERE rowid > ? ORDER BY rowid"
+        params = (after,)
+        if limit is not None:
+            query += " LIMIT ?"
+            params += (limit,)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [(position, json.loads(data)) for position, data in rows]
+
+    def count(self):
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()
+        return count
+
+    def get_meta(self, name, default=None):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE name = ?", (name,)
+            ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, name, value):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES (?, ?)", (name, json.dumps(value))
+            )
+            self._conn.commit()
+
+    def acquire_lease(self, name, ttl, owner=None):
+        """Try to take the lease ``name`` for ``ttl`` seconds; return the owner.
+
+        At most one owner, across every process using the file, holds a
+        lease at a time. Returns None if someone else holds it; a lease whose
+        holder died is free again once it expires.
+        """
+        owner = owner or default_owner()
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO leases VALUES (?, ?, ?) ON CONFLICT (name) DO UPDATE"
+                " SET owner = excluded.owner, expires_at = excluded.expires_at"
+                " WHERE leases.expires_at < ? OR leases.owner = excluded.owner",
+                (name, owner, now + ttl, now),
+            )
+            self._conn.commit()
+        return owner if cursor.rowcount else None
+
+    def release_lease(self, name, owner):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner)
+            )
+            self._conn.commit()
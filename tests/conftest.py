@@ -0,0 +1,88 @@
+import json
+import threading
+
+import pytest
+import requests
+
+import jobs
+
+
+def make_job(n, **overrides):
+    job = {
+        "slug": f"job-{n}",
+        "company_name": f"Company {n % 7}",
+        "title": f"Python Developer {n}",
+        "description": f"<p>Work on <b>Python</b> services, posting {n}.</p>",
+        "remote": n % 2 == 0,
+        "url": f"https://example.com/jobs/job-{n}",
+        "tags": [],
+        "job_types": ["full time"] if n % 3 else ["internship"],
+        "location": "Berlin" if n % 4 else "Munich, Germany",
+        "created_at": 1_700_000_000 - n * 60,
+    }
+    job.update(overrides)
+    return job
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200, headers=None):
+        self._payload = payload
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def json(self):
+        return self._payload
+
+    def iter_content(self, chunk_size=1):
+        body = json.dumps(self._payload).encode() if self._payload else b""
+        for start in range(0, len(body), chunk_size):
+            yield body[start : start + chunk_size]
+
+    def close(self):
+        pass
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+
+class FakeSession:
+    """Serves ``total`` synthetic jobs in pages of ``jobs.PAGE_SIZE``."""
+
+    def __init__(self, total):
+        self.jobs = [make_job(n) for n in range(total)]
+        self.requested_pages = []
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, **kwargs):
+        page = params["page"]
+        with self._lock:
+            self.requested_pages.append(page)
+        start = (page - 1) * jobs.PAGE_SIZE
+        return FakeResponse({"data": self.jobs[start : start + jobs.PAGE_SIZE]})
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    """Patch the shared session with a fake API serving 250 jobs."""
+    session = FakeSession(250)
+    monkeypatch.setattr(jobs, "get_session", lambda: session)
+    return session
+
+
+@pytest.fixture(autouse=True)
+def no_cache(monkeypatch, tmp_path):
+    """Keep tests off the user's on-disk cache and job store, unthrottled."""
+    monkeypatch.setenv("REMOTEJOBS_NO_CACHE", "1")
+    monkeypatch.setenv("REMOTEJOBS_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("REMOTEJOBS_RATE_LIMIT", "0")
+    monkeypatch.setattr(jobs, "_cache", None)
+    monkeypatch.setattr(jobs, "_store", None)
+    monkeypatch.setattr(jobs, "_fetchers", {})
+
+
+@pytest.fixture
+def response_cache(monkeypatch):
+    """Enable a fresh on-disk response cache in a temporary directory."""
+    monkeypatch.delenv("REMOTEJOBS_NO_CACHE")
+    return jobs.get_cache()
@@ -0,0 +1,82 @@
+import json
+import sys
+
+from conftest import make_job
+
+from alerts import QueryIndex, SavedSearches
+from filters import filter_rows
+from filterspec import FilterSpec
+from jobs import get_store, prepare_jobs
+from jobtable import JobTable
+from main import main
+from store import JobStore
+
+SPECS = {
+    "python": FilterSpec(keywords="python"),
+    "rust": FilterSpec(keywords="rust"),
+    "prefix": FilterSpec(keywords="dev"),
+    "either": FilterSpec(keywords="rust OR services"),
+    "phrase": FilterSpec(keywords='"python services" -posting'),
+    "not": FilterSpec(keywords="-rust"),
+    "munich": FilterSpec(location="munich", remote_only=True),
+    "intern": FilterSpec(job_types=["Intern"]),
+    "remote": FilterSpec(remote_only=True),
+}
+
+
+def test_query_index_matches_like_filters():
+    jobs = prepare_jobs([make_job(n) for n in range(12)])
+    jobs[5]["title"] = "Rust Engineer"
+    index = QueryIndex()
+    for name, spec in SPECS.items():
+        index.add(name, spec)
+
+    table = JobTable.from_records(jobs)
+    expected = {}
+    for name, spec in SPECS.items():
+        if matched := table.records(filter_rows(table, spec)):
+            expected[name] = [job["slug"] for job in matched]
+    matches = index.match(jobs)
+    found = {name: [job["slug"] for job in jobs] for name, jobs in matches.items()}
+    assert found == expected
+    # Only searches the job could match are checked.
+    candidates = index.candidates(jobs[5])
+    assert candidates == {"rust", "either", "python", "phrase", "not", "remote"}
+
+
+def test_check_store_reports_new_jobs_once(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    store.add(prepare_jobs([make_job(n, job_types=["internship"]) for n in range(3)]))
+    searches = SavedSearches(tmp_path / "searches.sqlite3")
+    searches.save("intern", FilterSpec(job_types=["intern"]))
+    assert searches.check_store(store) == {}
+
+    store.add(prepare_jobs([make_job(n, job_types=["internship"]) for n in (3, 4)]))
+    new = searches.check_store(store)
+    assert [job["slug"] for job in new["intern"]] == ["job-3", "job-4"]
+    assert searches.check_store(store) == {}
+    assert len(searches.matches("intern")) == 2
+
+    assert searches.delete("intern")
+    assert searches.index.match(store.load_jobs()) == {}
+
+
+def test_cli_alerts_report_new_matches(fake_api, monkeypatch, capsys):
+    def run(*argv):
+        monkeypatch.setattr(sys, "argv", ["main.py", *argv])
+        main()
+        return capsys.readouterr().out
+
+    get_store()  # Saving primes alerts at the end of an empty store.
+    assert "Saved search 'munich'" in run("--save-search", "munich", "--country", "mun")
+    fake_api.jobs[:0] = [
+        make_job(1000, location="Munich"),
+        make_job(1001, location="Berlin"),
+    ]
+    lines = run("--alerts", "--format", "jsonl").splitlines()
+    munich = [json.loads(line) for line in lines]
+    assert [(row["search"], row["slug"]) for row in munich[:1]] == [
+        ("munich", "job-1000")
+    ]
+    assert all("munich" in row["location"].lower() for row in munich)
+    assert run("--alerts").startswith("No new matches for your 1 saved searches")
@@ -0,0 +1,68 @@
+import json
+import sys
+
+from conftest import make_job
+
+from dedupe import Deduplicator, collapse_rows, fingerprint
+from jobtable import JobTable
+from main import main
+
+DESCRIPTION = (
+    "<p>We are looking for a backend engineer to build and run our payment "
+    "services. You will design APIs, own deployments and mentor two juniors. "
+    "Our stack is Python, PostgreSQL and Kubernetes on AWS.</p>"
+)
+
+
+def posting(n, **overrides):
+    fields = {
+        "title": "Backend Engineer",
+        "company_name": "Acme",
+        "description": DESCRIPTION,
+    }
+    return make_job(n, **{**fields, **overrides})
+
+
+def test_reposts_and_city_variants_share_a_cluster():
+    table = JobTable.from_records(
+        [
+            posting(0, location="Berlin"),
+            posting(1, title="Backend Engineer Hamburg", location="Hamburg"),
+            posting(2, description=DESCRIPTION + "<p>Apply today!</p>"),
+            posting(3, company_name="Other GmbH"),
+            posting(4, title="Frontend Engineer"),
+            posting(5, description="<p>A completely different role.</p>"),
+        ]
+    )
+    assert table.clusters.tolist() == [0, 0, 0, 3, 4, 5]
+
+    rows, sizes = collapse_rows(table.clusters, [4, 2, 3, 0, 1])
+    assert rows.tolist() == [4, 2, 3]
+    assert sizes.tolist() == [1, 3, 1]
+
+
+def test_deduplicator_matches_fingerprints_a_few_bits_apart():
+    deduplicator = Deduplicator(max_distance=3)
+    base = fingerprint(posting(0))
+    assert deduplicator.add(base, "a") == "a"
+    # Bits flipped in three different bands: the fourth band still matches.
+    assert deduplicator.add(base ^ (1 | 1 << 20 | 1 << 40), "b") == "a"
+    assert deduplicator.add(base ^ 0b1111, "c") == "c"
+    assert deduplicator.add(base, "d", group="other company") == "d"
+
+
+def test_cli_skips_near_duplicates_across_pages(fake_api, monkeypatch, capsys):
+    fake_api.jobs[0].update(posting(0, slug="job-0"))
+    fake_api.jobs[150].update(posting(150, slug="job-150", location="Hamburg"))
+
+    def slugs(*argv):
+        monkeypatch.setattr(sys, "argv", ["main.py", *argv])
+        main()
+        lines = capsys.readouterr().out.splitlines()
+        return [json.loads(line)["slug"] for line in lines]
+
+    collapsed = slugs("--all", "--limit", "0", "--format", "jsonl")
+    assert len(collapsed) == 249
+    assert "job-150" not in collapsed
+    everything = slugs("--all", "--limit", "0", "--format", "jsonl", "--show-similar")
+    assert len(everything) == 250
@@ -0,0 +1,153 @@
+import threading
+
+import pytest
+import requests
+from conftest import FakeResponse
+
+import jobs
+from fetcher import CircuitBreaker, CircuitOpenError, Fetcher, TokenBucket
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class ScriptedSession:
+    """Returns (or raises) the scripted outcomes in order."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def test_retries_honour_retry_after_and_pause_the_bucket():
+    clock = Clock()
+    bucket = TokenBucket(rate=1, capacity=1, clock=clock, sleep=clock.sleep)
+    fetcher = Fetcher(bucket=bucket, sleep=clock.sleep)
+    session = ScriptedSession(
+        FakeResponse(None, 429, {"Retry-After": "7"}),
+        requests.ConnectionError("reset"),
+        FakeResponse({"data": []}),
+    )
+    assert fetcher.get(session, "http://api").status_code == 200
+    assert session.calls == 3
+    # The retry sleep and the paused bucket both honour Retry-After.
+    assert clock.sleeps[0] == 7
+    assert clock.now >= 7
+
+
+def test_token_bucket_spreads_requests_at_the_rate():
+    clock = Clock()
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock, sleep=clock.sleep)
+    for _ in range(6):
+        bucket.acquire()
+    assert clock.now == pytest.approx(2.0)
+    assert not bucket.try_acquire()
+
+
+def test_circuit_breaker_opens_and_half_opens():
+    clock = Clock()
+    breaker = CircuitBreaker(threshold=2, cooldown=30, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+    clock.now = 30
+    assert breaker.allow()
+    assert not breaker.allow()  # one trial request at a time
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_failed_trial_request_reopens_the_circuit():
+    clock = Clock()
+    breaker = CircuitBreaker(threshold=1, cooldown=30, clock=clock)
+    fetcher = Fetcher(breaker=breaker, sleep=clock.sleep)
+    breaker.record_failure()
+    clock.now = 30
+    session = ScriptedSession(requests.TooManyRedirects("loop"))
+    with pytest.raises(requests.TooManyRedirects):
+        fetcher.get(session, "http://api")
+    assert breaker.state == "open"
+    clock.now = 60
+    assert breaker.allow()
+
+
+def test_stale_cache_is_served_while_the_api_is_down(
+    fake_api, response_cache, monkeypatch
+):
+    fetcher = Fetcher(retries=1, sleep=lambda s: None)
+    monkeypatch.setitem(jobs._fetchers, jobs.ARBEITNOW.name, fetcher)
+    response_cache.put(f"{jobs.API_URL}?page=1", [{"slug": "cached"}])
+    response_cache.ttl = 0  # Every entry is stale.
+    fake_api.get = lambda url, **kwargs: FakeResponse(None, status_code=503)
+
+    for _ in range(5):
+        assert [job["slug"] for job in jobs.fetch_jobs(page=1)] == ["cached"]
+    assert response_cache.stats()["stale"] == 5
+    with pytest.raises(CircuitOpenError):
+        jobs.fetch_jobs(page=2)
+
+
+def test_a_failing_source_leaves_the_other_breaker_closed(fake_api):
+    serve = fake_api.get
+
+    def get(url, **kwargs):
+        if url == jobs.REMOTIVE_URL:
+            return FakeResponse(None, status_code=503)
+        return serve(url, **kwargs)
+
+    fake_api.get = get
+    remotive = jobs.Remotive()
+    for source in (jobs.ARBEITNOW, remotive):
+        fetcher = Fetcher(retries=0, sleep=lambda s: None)
+        jobs._fetchers[source.name] = fetcher
+
+    for _ in range(5):
+        with pytest.raises(requests.HTTPError):
+            jobs.fetch_jobs(source=remotive, use_cache=False)
+    assert jobs.get_fetcher(remotive).breaker.state == "open"
+    assert jobs.fetch_jobs(page=1, use_cache=False)
+    assert jobs.get_fetcher().breaker.state == "closed"
+
+
+def test_hedged_request_returns_the_faster_copy():
+    release = threading.Event()
+
+    class SlowFirstSession:
+        def __init__(self):
+            self.calls = 0
+            self.lock = threading.Lock()
+
+        def get(self, url, **kwargs):
+            with self.lock:
+                self.calls += 1
+                first = self.calls == 1
+            if first:
+                release.wait(5)
+                return FakeResponse("slow")
+            return FakeResponse("fast")
+
+    session = SlowFirstSession()
+    fetcher = Fetcher(hedge_after=0.01)
+    try:
+        assert fetcher.get(session, "http://api").json() == "fast"
+    finally:
+        release.set()
+    assert session.calls == 2
@@ -0,0 +1,107 @@
+from conftest import make_job
+
+from filters import (
+    RECENCY_FLOOR,
+    RECENCY_HALF_LIFE,
+    facet_counts,
+    filter_rows,
+    iter_ranked_rows,
+    relevance_scores,
+)
+from filterspec import FilterSpec
+from jobtable import JobTable
+from search import compile_keywords
+
+
+def table(**overrides):
+    jobs = [make_job(n) for n in range(12)]
+    for n, fields in overrides.items():
+        jobs[int(n)].update(fields)
+    return JobTable.from_records(jobs)
+
+
+def slugs(jobs, spec):
+    return jobs.keys[filter_rows(jobs, spec)].tolist()
+
+
+def test_filters_combine_into_one_mask():
+    spec = FilterSpec(remote_only=True, location="munich", job_types=["Intern"])
+    assert slugs(table(), spec) == ["job-0"]
+
+
+def test_job_type_matches_job_types_not_description():
+    jobs = table(**{"1": {"description": "<p>Great internship culture</p>"}})
+    result = slugs(jobs, FilterSpec(job_types=["internship"]))
+    assert result == ["job-0", "job-3", "job-6", "job-9"]
+
+
+def test_keywords_and_sort():
+    jobs = table(
+        **{
+            "5": {"title": "Rust Engineer"},
+            "7": {"description": "<p>Some rust too</p>"},
+        }
+    )
+    result = slugs(jobs, FilterSpec(keywords="rust", sort_by="oldest"))
+    assert result == ["job-7", "job-5"]
+    assert len(filter_rows(jobs, FilterSpec(keywords="python -rust"))) == 10
+
+
+def test_sort_by_company_puts_missing_companies_last():
+    jobs = table(**{"0": {"company_name": None}, "3": {"company_name": "Acme"}})
+    rows = filter_rows(jobs, FilterSpec(sort_by="company"))
+    assert jobs.record(rows[0])["company_name"] == "Acme"
+    assert jobs.record(rows[-1])["slug"] == "job-0"
+
+
+def test_facets_ignore_their_own_filter():
+    jobs = table(**{"0": {"location": None}})
+    spec = FilterSpec(remote_only=True, job_types=["internship"])
+    facets = facet_counts(jobs, spec)
+
+    assert facets.total == 2  # job-0 and job-6
+    # Job types are counted among remote jobs, whatever type is selected.
+    assert facets.job_types == [("full time", 4), ("internship", 2)]
+    # Remote jobs are counted among internships, remote or not.
+    assert facets.remote == 2
+    assert facets.counts("locations") == {"Berlin": 1}  # job-0 has no location
+    assert facets.companies == [("Company 0", 1), ("Company 6", 1)]
+
+
+def test_relevance_sort_ranks_matches_and_decays_with_age():
+    jobs = table(
+        **{
+            "2": {"title": "Rust Engineer", "description": "<p>Rust, Rust.</p>"},
+            "4": {"title": "Rust Developer"},
+            "8": {"description": "<p>Some rust.</p>"},
+        }
+    )
+    spec = FilterSpec(keywords="rust", sort_by="relevance")
+    assert jobs.keys[filter_rows(jobs, spec)].tolist() == ["job-2", "job-4", "job-8"]
+    assert jobs.keys[filter_rows(jobs, spec, limit=1)].tolist() == ["job-2"]
+
+    rows = filter_rows(jobs, FilterSpec(keywords="rust"))
+    now = int(jobs.created_at[4]) + 1
+    fresh = relevance_scores(jobs, rows, compile_keywords("rust"), now=now)
+    aged = relevance_scores(
+        jobs, rows, compile_keywords("rust"), now=now + RECENCY_HALF_LIFE * 10
+    )
+    assert (aged < fresh).all() and (aged >= fresh * RECENCY_FLOOR).all()
+
+    no_keywords = filter_rows(jobs, FilterSpec(sort_by="relevance"))
+    assert (
+        no_keywords.tolist() == filter_rows(jobs, FilterSpec(sort_by="newest")).tolist()
+    )
+
+
+def test_ranking_lazily_matches_a_full_sort():
+    # Equal companies and dates, so partial sorts must break ties like a
+    # stable sort does.
+    jobs = table(**{str(n): {"created_at": 1_700_000_000} for n in range(0, 12, 3)})
+    rows = filter_rows(jobs, FilterSpec())
+    for sort_by in ("newest", "oldest", "company"):
+        spec = FilterSpec(sort_by=sort_by)
+        full = filter_rows(jobs, spec).tolist()
+        assert filter_rows(jobs, spec, limit=5).tolist() == full[:5]
+        ranked = iter_ranked_rows(jobs, rows, spec, batch=2)
+        assert list(ranked) == full
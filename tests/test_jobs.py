@@ -0,0 +1,204 @@
+from collections import Counter
+
+import pytest
+import requests
+from conftest import FakeResponse, make_job
+
+import dedupe
+import jobs
+from benchmarks.server import RemotiveStandInServer, StandInServer
+from benchmarks.synthetic import generate_jobs
+from cache import ResponseCache
+from jobtable import JobTable
+
+
+def test_fetch_all_jobs_stops_after_short_page(fake_api):
+    all_jobs = jobs.fetch_all_jobs(workers=2)
+    assert len(all_jobs) == 250
+    assert [job["slug"] for job in all_jobs[:2]] == ["job-0", "job-1"]
+    assert max(fake_api.requested_pages) <= 4
+
+
+def test_iter_job_pages_respects_budgets(fake_api):
+    pages = list(jobs.iter_job_pages(max_pages=2))
+    assert [page for page, _ in pages] == [1, 2]
+
+    limited = jobs.fetch_all_jobs(max_jobs=150)
+    assert len(limited) == 150
+    assert limited[-1]["slug"] == "job-149"
+
+
+def test_fetch_jobs_serves_fresh_pages_from_cache(
+    fake_api, response_cache, monkeypatch
+):
+    first = jobs.fetch_jobs(page=1)
+    calls = []
+    monkeypatch.setattr(dedupe, "fingerprint", lambda job: calls.append(job) or 0)
+    second = jobs.fetch_jobs(page=1)
+    assert first == second
+    assert fake_api.requested_pages == [1]
+    assert response_cache.stats()["hits"] == 1
+    assert calls == []  # Fingerprints are cached with the page.
+
+
+def test_fetch_jobs_revalidates_with_etag(fake_api, response_cache):
+    response_cache.put(f"{jobs.API_URL}?page=1", [{"slug": "cached"}], etag='"v1"')
+    response_cache.ttl = 0  # Every entry is stale.
+
+    def not_modified(url, params=None, headers=None, **kwargs):
+        assert headers["If-None-Match"] == '"v1"'
+        return FakeResponse(None, status_code=304)
+
+    fake_api.get = not_modified
+    assert [job["slug"] for job in jobs.fetch_jobs(page=1)] == ["cached"]
+    assert response_cache.stats()["revalidated"] == 1
+
+
+def test_response_cache_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(tmp_path / "c.sqlite3", max_bytes=200)
+    cache.put("a", ["x" * 80])
+    cache.put("b", ["y" * 80])
+    cache.get("a")
+    cache.put("c", ["z" * 80])
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_sync_jobs_stops_at_known_jobs(fake_api):
+    first = jobs.sync_jobs()
+    assert len(first.new_jobs) == 250
+    assert jobs.get_store().count() == 250
+
+    fake_api.jobs.insert(0, make_job(999, slug="job-new", created_at=1_800_000_000))
+    fake_api.requested_pages.clear()
+    second = jobs.sync_jobs()
+    assert [job["slug"] for job in second.new_jobs] == ["job-new"]
+    assert fake_api.requested_pages == [1, 2]
+    assert jobs.get_store().load_jobs(limit=1)[0]["slug"] == "job-new"
+
+
+def test_crawl_and_revalidate_against_stand_in_server(monkeypatch, response_cache):
+    with StandInServer(generate_jobs(230)) as server:
+        monkeypatch.setattr(jobs, "API_URL", server.url)
+        monkeypatch.setattr(jobs, "_session", None)
+        assert len(jobs.fetch_all_jobs()) == 230
+
+        assert len(jobs.fetch_jobs(page=1, refresh=True)) == 100
+        assert response_cache.stats()["revalidated"] == 1
+        assert server.requests.count(1) == 2
+
+
+def test_sync_if_stale_skips_while_another_process_syncs(fake_api):
+    store = jobs.get_store()
+    store.acquire_lease("sync", ttl=60, owner="other-replica")
+    assert jobs.sync_if_stale(store) is None
+    assert fake_api.requested_pages == []
+
+    store.release_lease("sync", "other-replica")
+    assert len(jobs.sync_if_stale(store).new_jobs) == 250
+
+    # A refresh on request syncs however recent the last sync was, but
+    # still not while another process holds the lease.
+    fake_api.jobs.insert(0, make_job(999, slug="job-new", created_at=1_800_000_000))
+    store.acquire_lease("sync", ttl=60, owner="other-replica")
+    assert jobs.sync_if_stale(store, max_age=0) is None
+    store.release_lease("sync", "other-replica")
+    assert [job["slug"] for job in jobs.sync_if_stale(store, max_age=0).new_jobs] == [
+        "job-new"
+    ]
+
+
+def test_fetched_jobs_keep_only_used_fields_and_text(fake_api):
+    fake_api.jobs[0]["unused"] = {"big": "x" * 1000}
+    fake_api.jobs[0]["description"] = "<p>" + "word " * 10_000 + "</p>"
+    job = jobs.fetch_jobs(page=1)[0]
+    assert "unused" not in job
+    assert "description" not in job
+    assert len(job["description_text"]) == jobs.MAX_DESCRIPTION_CHARS
+    assert job["preview"].startswith("word word")
+
+
+@pytest.fixture
+def two_boards(monkeypatch):
+    """Arbeitnow and Remotive stand-ins; one Remotive job is also on Arbeitnow."""
+    remotive_jobs = generate_jobs(20, seed=1)
+    arbeitnow_jobs = generate_jobs(230)
+    cross_posted = remotive_jobs[0]
+    arbeitnow_jobs.append(
+        {
+            **cross_posted,
+            "slug": "cross-posted",
+            "url": cross_posted["url"].replace("arbeitnow.com", "remotive.com"),
+            "created_at": cross_posted["created_at"] + 1,
+        }
+    )
+    with (
+        StandInServer(arbeitnow_jobs, latency=0.05) as arbeitnow,
+        RemotiveStandInServer(remotive_jobs, latency=0.05) as remotive,
+    ):
+        monkeypatch.setattr(jobs, "API_URL", arbeitnow.url)
+        monkeypatch.setattr(jobs, "REMOTIVE_URL", remotive.url)
+        monkeypatch.setattr(jobs, "_session", None)
+        yield remotive_jobs, [jobs.Arbeitnow(), jobs.Remotive()]
+
+
+def test_sources_are_merged_newest_first_without_cross_posts(two_boards):
+    remotive_jobs, sources = two_boards
+    merged = jobs.fetch_all_jobs(sources=sources)
+    assert len(merged) == 250
+    assert Counter(job["source"] for job in merged) == {
+        "arbeitnow": 231,
+        "remotive": 19,
+    }
+    created = [job["created_at"] for job in merged]
+    assert created == sorted(created, reverse=True)
+
+    job = next(job for job in merged if job["slug"] == "remotive-19")
+    original = remotive_jobs[1]
+    assert job["remote"] is True
+    assert job["created_at"] == original["created_at"]
+    assert job["location"] == original["location"]
+    assert job["job_types"] == [" ".join(original["job_types"][0].lower().split())]
+    assert JobTable.from_records([job]).record(0)["source"] == "remotive"
+
+
+def test_sync_walks_each_source_for_new_jobs(two_boards):
+    remotive_jobs, sources = two_boards
+    assert len(jobs.sync_jobs(sources=sources).new_jobs) == 251
+    remotive_jobs.insert(0, {**remotive_jobs[5], "title": "Brand New Role"})
+    result = jobs.sync_jobs(sources=sources)
+    assert [job["title"] for job in result.new_jobs] == ["Brand New Role"]
+    assert result.pages_fetched == 2
+
+
+def test_failing_source_does_not_stop_the_others(two_boards, monkeypatch):
+    _, sources = two_boards
+    monkeypatch.setattr(jobs, "REMOTIVE_URL", jobs.API_URL + "/missing")
+    fetched = []
+    with pytest.raises(requests.HTTPError):
+        for source, _, page_jobs in jobs.iter_source_pages(sources):
+            fetched.extend(page_jobs)
+    assert len(fetched) == 231
+
+
+def test_malformed_remotive_postings_do_not_break_the_board():
+    good = {"id": 1, "title": "Engineer", "publication_date": "2026-10-17T08:00:00"}
+    payload = {
+        "jobs": [
+            {**good, "publication_date": "last Tuesday"},
+            {"title": "No id"},
+            {**good, "id": 2},
+        ]
+    }
+    decoded = list(jobs.decode_jobs(FakeResponse(payload), jobs.Remotive()))
+    assert [job["slug"] for job in decoded] == ["remotive-1", "remotive-2"]
+    assert [job["created_at"] for job in decoded] == [0, 1_792_224_000]
+
+
+def test_get_sources_reads_the_environment(monkeypatch):
+    assert [source.name for source in jobs.get_sources()] == ["arbeitnow"]
+    monkeypatch.setenv("REMOTEJOBS_SOURCES", "Remotive, arbeitnow")
+    assert [source.name for source in jobs.get_sources()] == ["remotive", "arbeitnow"]
+    with pytest.raises(ValueError, match="Unknown job source 'nope'"):
+        jobs.get_sources("arbeitnow,nope")
@@ -0,0 +1,23 @@
+import numpy as np
+from conftest import make_job
+
+from jobtable import JobTable
+
+
+def test_table_interns_repeated_strings():
+    jobs = [make_job(n, company_name=f"Company {n % 3}") for n in range(30)]
+    table = JobTable.from_records(jobs)
+    assert len(table) == 30
+    assert len(table.companies) == 3
+    assert table.job_types == ["internship", "full time"]
+    assert table.record(3)["company_name"] == "Company 0"
+    assert table.record(3)["job_types"] == ["internship"]
+
+
+def test_frame_shares_the_table_columns():
+    table = JobTable.from_records([make_job(n) for n in range(5)])
+    frame = table.frame
+    assert frame is table.frame
+    assert np.shares_memory(frame["created_at"].to_numpy(), table.created_at)
+    assert frame["location"].dtype == "category"
+    assert list(frame["slug"]) == [f"job-{n}" for n in range(5)]
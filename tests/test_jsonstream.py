@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from jsonstream import iter_array
+
+PAYLOAD = {
+    "meta": {"data": ["not", "these"], "total": 12.5e3},
+    "data": [{"slug": "a", "title": "Café"}, 17, None, {"slug": "b"}],
+    "links": {"next": None},
+}
+
+
+def split(body, size):
+    return [body[i : i + size] for i in range(0, len(body), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 1024])
+def test_items_match_a_full_decode_however_the_body_is_split(size):
+    body = json.dumps(PAYLOAD, ensure_ascii=False).encode()
+    assert list(iter_array(split(body, size))) == PAYLOAD["data"]
+
+
+@pytest.mark.parametrize(
+    "chunks",
+    [
+        [b'{"x": 1.', b'5, "data": [2.', b"5, 3e", b"2]}"],
+        [b'{"x": 1e', b'3, "data": [-1', b"0, true", b"]}"],
+    ],
+)
+def test_numbers_split_between_chunks_are_joined(chunks):
+    expected = json.loads(b"".join(chunks))["data"]
+    assert list(iter_array(chunks)) == expected
+
+
+def test_items_arrive_before_the_body_ends():
+    def chunks():
+        yield b'{"data": [{"slug": "a"}, '
+        raise AssertionError("read past the first item")
+
+    assert next(iter_array(chunks())) == {"slug": "a"}
+
+
+def test_missing_key_yields_nothing_and_truncation_raises():
+    assert list(iter_array([b'{"links": {}}'])) == []
+    assert list(iter_array([b""])) == []
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_array([b'{"data": [{"slug": "a"}, {"slug"']))
@@ -0,0 +1,35 @@
+import numpy as np
+
+from locations import City, Gazetteer, load_gazetteer
+
+
+def test_longest_name_wins_and_words_must_match():
+    frankfurt = City("Frankfurt", "Germany", 50.1, 8.7)
+    hamburg = City("Hamburg", "Germany", 53.6, 10.0)
+    hamm = City("Hamm", "Germany", 51.7, 7.8)
+    gazetteer = Gazetteer(
+        {
+            "frankfurt": frankfurt,
+            "frankfurt am main": frankfurt,
+            "hamburg": hamburg,
+            "hamm": hamm,
+        }
+    )
+    assert gazetteer.resolve("Frankfurt am Main, Hesse") is frankfurt
+    assert gazetteer.resolve("Hamburg, Germany") is hamburg
+    assert gazetteer.resolve("Remote") is None
+    assert gazetteer.resolve(None) is None
+
+
+def test_default_gazetteer_covers_aliases_and_other_countries():
+    gazetteer = load_gazetteer()
+    assert gazetteer.resolve("München").name == "Munich"
+    assert gazetteer.resolve("Vienna, Austria").country == "Austria"
+
+
+def test_city_counts_resolves_each_distinct_location_once():
+    gazetteer = load_gazetteer()
+    locations = ["Berlin", "Berlin, Germany", "Remote", "Unused"]
+    codes = np.array([0, 1, 1, 2, -1, 0])
+    counts = gazetteer.city_counts(locations, codes)
+    assert {city.name: count for city, count in counts.items()} == {"Berlin": 4}
@@ -1,10 +1,101 @@
+import csv
+import io
+import json
+import subprocess
+import sys
+from pathlib import Path
 from unittest.mock import patch
 
-from main import fetch_jobs
+import pytest
+from conftest import FakeResponse, make_job
+
+import jobs
+from jobs import fetch_jobs
+from main import main
+
+ROOT = Path(__file__).resolve().parent.parent
+# Modules the CLI must not load before it knows it needs them.
+HEAVY_MODULES = {"requests", "rich", "numpy", "pandas", "bs4"}
+# Import time of main.py in microseconds; about 40 ms at the time of writing.
+STARTUP_BUDGET_US = 250_000
 
 
 def test_fetch_jobs():
-    with patch("jobs.requests.get") as mock_get:
-        mock_get.return_value.json.return_value = {"data": []}
-        jobs = fetch_jobs()
-        assert isinstance(jobs, list)
+    payload = {"data": [make_job(1, unused="dropped")], "links": {}}
+    with patch("jobs.get_session") as mock_get_session:
+        mock_get_session.return_value.get.return_value = FakeResponse(payload)
+        fetched = fetch_jobs()
+    assert len(fetched) == 1
+    job = fetched[0]
+    assert job["slug"] == "job-1"
+    assert job["source"] == "arbeitnow"
+    assert job["description_text"] == "Work on Python services, posting 1."
+    assert "description" not in job and "unused" not in job
+    assert isinstance(job["fingerprint"], int)
+
+
+def run_cli(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["main.py", *argv])
+    main()
+
+
+@pytest.mark.parametrize(
+    "argv", [["--pages", "0"], ["--pages", "-1"], ["--limit", "-2"], ["--pages", "x"]]
+)
+def test_cli_rejects_bad_counts(fake_api, monkeypatch, capsys, argv):
+    with pytest.raises(SystemExit) as exit:
+        run_cli(monkeypatch, *argv)
+    assert exit.value.code == 2
+    assert f"argument {argv[0]}" in capsys.readouterr().err
+    assert fake_api.requested_pages == []
+
+
+def test_cli_streams_jsonl_and_stops_at_limit(fake_api, monkeypatch, capsys):
+    run_cli(monkeypatch, "--all", "--limit", "3", "--format", "jsonl")
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)["slug"] for line in lines] == ["job-0", "job-1", "job-2"]
+    assert len(fake_api.requested_pages) <= jobs.DEFAULT_WORKERS
+
+
+def test_cli_sorted_csv_reads_every_requested_page(fake_api, monkeypatch, capsys):
+    run_cli(
+        monkeypatch,
+        "--pages",
+        "3",
+        "--sort",
+        "oldest",
+        "--limit",
+        "0",
+        "--format",
+        "csv",
+    )
+    rows = list(csv.DictReader(io.StringIO(capsys.readouterr().out)))
+    assert len(rows) == 250
+    assert rows[0]["slug"] == "job-249"
+
+
+def test_cli_table_is_plain_text_when_piped(fake_api, monkeypatch, capsys):
+    run_cli(monkeypatch, "--limit", "2", "--country", "germany")
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == "Top 2 Remote Jobs in Germany"
+    assert lines[2].split() == ["Company", "Title", "Location", "URL"]
+    assert len(lines) == 5
+    assert "─" not in "".join(lines)
+
+
+def test_cli_help_starts_without_heavy_imports():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main; main.main()", "-h"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imported = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                imported[name.strip()] = int(cumulative)
+    assert not HEAVY_MODULES & imported.keys()
+    assert imported["main"] < STARTUP_BUDGET_US
@@ -0,0 +1,59 @@
+import urllib.request
+
+import pytest
+
+from metrics import Metrics, serve
+
+
+def test_spans_are_summarised_per_stage():
+    metrics = Metrics()
+    metrics.observe("fetch", 0.2)
+    metrics.observe("fetch", 0.4)
+    with metrics.span("filter"):
+        pass
+    with pytest.raises(ValueError):
+        with metrics.span("render"):
+            raise ValueError
+
+    stages = {row["stage"]: row for row in metrics.stages()}
+    assert metrics.stages()[0]["stage"] == "fetch"
+    assert stages["fetch"]["count"] == 2
+    assert stages["fetch"]["mean"] == pytest.approx(0.3)
+    assert stages["fetch"]["max"] == stages["fetch"]["last"] == 0.4
+    assert stages["render"]["count"] == 1
+
+
+def test_prometheus_export_has_cumulative_buckets_and_cache_stats():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 5.0):
+        metrics.observe("fetch.network", seconds)
+    cache_stats = {
+        "hits": 3,
+        "revalidated": 1,
+        "misses": 1,
+        "hit_rate": 0.8,
+        "entries": 4,
+        "size_bytes": 2048,
+    }
+    lines = metrics.to_prometheus(cache_stats).splitlines()
+
+    name = "remotejobs_stage_duration_seconds"
+    assert f'{name}_bucket{{stage="fetch.network",le="0.1"}} 1' in lines
+    assert f'{name}_bucket{{stage="fetch.network",le="1.0"}} 2' in lines
+    assert f'{name}_bucket{{stage="fetch.network",le="+Inf"}} 3' in lines
+    assert f'{name}_count{{stage="fetch.network"}} 3' in lines
+    assert 'remotejobs_cache_requests_total{outcome="hits"} 3' in lines
+    assert "remotejobs_cache_hit_rate 0.8" in lines
+
+
+def test_metrics_endpoint_serves_the_registry():
+    metrics = Metrics()
+    metrics.observe("rerun", 0.01)
+    server = serve(0, host="127.0.0.1", metrics=metrics)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as response:
+            body = response.read().decode()
+    finally:
+        server.shutdown()
+    assert 'remotejobs_stage_duration_seconds_count{stage="rerun"} 1' in body
@@ -0,0 +1,71 @@
+import pytest
+
+from search import QuerySyntaxError, SearchIndex, compile_keywords, parse_query
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    index.add_jobs(
+        [
+            {
+                "slug": "py",
+                "title": "Senior Python Developer",
+                "description": "<p>Build <b>data pipelines</b> in München.</p>",
+            },
+            {
+                "slug": "js",
+                "title": "Frontend Engineer",
+                "description": "<p>React &amp; JavaScript, some Python.</p>",
+            },
+            {
+                "slug": "ops",
+                "title": "DevOps Engineer",
+                "description": "<ul><li>Kubernetes</li></ul>",
+            },
+        ]
+    )
+    return index
+
+
+def test_keyword_list_is_or_with_prefix(index):
+    assert index.search(compile_keywords("python, kube")) == {"py", "js", "ops"}
+    assert index.search(compile_keywords("develop")) == {"py"}
+
+
+def test_boolean_phrase_and_prefix_queries(index):
+    assert index.search('"data pipelines"') == {"py"}
+    assert index.search('"pipelines data"') == set()
+    assert index.search("python AND NOT react") == {"py"}
+    assert index.search("engineer -devops") == {"js"}
+    assert index.search("(react OR kubernetes) engineer") == {"js", "ops"}
+    assert index.search("java*") == {"js"}
+    assert index.search("munchen") == {"py"}
+
+
+def test_index_updates_incrementally(index):
+    index.add_jobs([{"slug": "new", "title": "Rust Developer", "description": ""}])
+    assert index.search("rust") == {"new"}
+    assert len(index) == 4
+
+
+@pytest.mark.parametrize("query", ["(python", "python NOT", "NOT", "(NOT"])
+def test_invalid_query_raises(query):
+    with pytest.raises(QuerySyntaxError):
+        parse_query(query)
+
+
+def test_bm25_prefers_title_matches_and_updates_incrementally(index):
+    scores = index.scores("python")
+    assert set(scores) == {"py", "js"}
+    assert scores["py"] > scores["js"]  # title beats a description mention
+    assert index.scores("python -react") == index.scores("python")
+    # The rarer term is worth more.
+    either = index.scores("python OR kubernetes")
+    assert sorted(either, key=either.get, reverse=True)[:2] == ["ops", "py"]
+
+    index.add("go", "Python Python Developer", "Python everywhere.")
+    updated = index.scores("python")
+    assert max(updated, key=updated.get) == "go"
+    # Python is in more documents now, so it is worth less.
+    assert updated["js"] < scores["js"]
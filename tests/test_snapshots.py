@@ -0,0 +1,85 @@
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from conftest import make_job
+
+from filters import filter_rows
+from filterspec import FilterSpec
+from jobtable import JobTable
+from main import main
+from snapshots import (
+    diff_snapshots,
+    find_snapshot,
+    list_snapshots,
+    query,
+    write_snapshot,
+)
+
+pytest.importorskip("pyarrow")
+
+FETCHED_AT = datetime(2026, 10, 16, 9, 30, tzinfo=timezone.utc)
+
+
+def jobs(numbers):
+    return [make_job(n) for n in numbers]
+
+
+def test_snapshots_round_trip_and_resolve(tmp_path):
+    table = JobTable.from_records(jobs(range(20)))
+    first = write_snapshot(table, tmp_path, FETCHED_AT)
+    second = write_snapshot(table, tmp_path, FETCHED_AT + timedelta(days=1))
+
+    assert first.path.parent.name == "date=2026-10-16"
+    assert list_snapshots(tmp_path) == [first, second]
+    assert find_snapshot(None, tmp_path) == second
+    assert find_snapshot("previous", tmp_path) == first
+    assert find_snapshot("2026-10-16", tmp_path) == first
+    assert find_snapshot(str(second.path)) == second
+    with pytest.raises(ValueError):
+        find_snapshot("2025", tmp_path)
+
+    assert second.count() == 20
+    assert JobTable.from_arrow(second.read()).records() == table.records()
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [
+        FilterSpec(),
+        FilterSpec(remote_only=True, location="munich", sort_by="oldest"),
+        FilterSpec(keywords="python -posting", job_types=["intern"]),
+        FilterSpec(keywords='"posting 7" OR "posting 12"', sort_by="company"),
+    ],
+)
+def test_query_matches_like_live_filters(tmp_path, spec):
+    live = JobTable.from_records(jobs(range(30)))
+    snapshot = write_snapshot(live, tmp_path, FETCHED_AT)
+
+    table, rows = query(snapshot, spec, columns=["title"])
+    expected = [live.keys[row] for row in filter_rows(live, spec)]
+    assert [table.keys[row] for row in rows] == expected
+    assert not table.urls.any()  # Columns not asked for are not read.
+
+
+def test_diff_reads_added_and_removed_jobs(tmp_path):
+    old = write_snapshot(JobTable.from_records(jobs(range(5))), tmp_path, FETCHED_AT)
+    new = write_snapshot(
+        JobTable.from_records(jobs(range(2, 8))),
+        tmp_path,
+        FETCHED_AT + timedelta(hours=1),
+    )
+    added, removed = diff_snapshots(old, new, ["slug", "title"])
+    assert added.column("slug").to_pylist() == ["job-5", "job-6", "job-7"]
+    assert removed.to_pylist() == [
+        {"slug": "job-0", "title": "Python Developer 0"},
+        {"slug": "job-1", "title": "Python Developer 1"},
+    ]
+
+
+def test_cli_snapshot_saves_the_whole_board(fake_api, monkeypatch, tmp_path, capsys):
+    monkeypatch.setenv("REMOTEJOBS_SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    monkeypatch.setattr(sys, "argv", ["main.py", "--snapshot"])
+    main()
+    assert capsys.readouterr().out.startswith("Saved 250 jobs to ")
+    assert find_snapshot().count() == 250
@@ -0,0 +1,49 @@
+import sqlite3
+import time
+
+from store import JobStore
+
+DAY = 86_400
+
+
+def job(slug, created_at, location="Berlin", job_types=("full-time",)):
+    return {
+        "slug": slug,
+        "created_at": created_at,
+        "location": location,
+        "job_types": list(job_types),
+    }
+
+
+def test_aggregates_count_each_job_once(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    store.add([job("a", DAY), job("b", DAY + 60, "Remote", ["full-time", "contract"])])
+    store.add([job("a", DAY), job("c", 3 * DAY, job_types=[" contract "])])
+
+    assert store.aggregates("job_type") == [("contract", 2), ("full-time", 2)]
+    assert store.aggregates("location", limit=1) == [("Berlin", 2)]
+    assert store.aggregates("day") == [("1970-01-02", 2), ("1970-01-04", 1)]
+
+
+def test_existing_stores_are_backfilled(tmp_path):
+    path = tmp_path / "jobs.sqlite3"
+    JobStore(path).add([job("a", DAY), job("b", 2 * DAY)])
+    with sqlite3.connect(path) as conn:
+        conn.execute("DELETE FROM aggregates")
+        conn.execute("DELETE FROM meta WHERE name = 'aggregates_version'")
+
+    assert JobStore(path).aggregates("location") == [("Berlin", 2)]
+
+
+def test_sync_lease_has_one_holder_until_it_expires(tmp_path, monkeypatch):
+    path = tmp_path / "jobs.sqlite3"
+    first, second = JobStore(path), JobStore(path)
+    assert first.acquire_lease("sync", ttl=60, owner="a") == "a"
+    assert second.acquire_lease("sync", ttl=60, owner="b") is None
+    assert first.acquire_lease("sync", ttl=60, owner="a") == "a"
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert second.acquire_lease("sync", ttl=60, owner="b") == "b"
+    second.release_lease("sync", "b")
+    assert first.acquire_lease("sync", ttl=60, owner="a") == "a"
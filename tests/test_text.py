@@ -0,0 +1,29 @@
+from unittest.mock import patch
+
+import text
+
+
+def test_html_to_text_fast_path_keeps_block_breaks():
+    markup = (
+        "<p>Hello&nbsp;<b>world</b></p><ul><li>One</li><li>Two &amp; three</li></ul>"
+    )
+    with patch("text._parse_with_soup") as soup:
+        assert text.html_to_text(markup) == "Hello world\n\nOne\n\nTwo & three"
+        soup.assert_not_called()
+
+
+def test_html_to_text_falls_back_for_complex_markup():
+    markup = "<style>p {color: red}</style><p>Visible</p><!-- hidden -->"
+    assert text.html_to_text(markup) == "Visible"
+
+
+def test_prepare_job_memoizes_by_slug_and_content():
+    job = {"slug": "a", "description": "<p>" + "word " * 100 + "</p>"}
+    text.prepare_job(job)
+    assert len(job["preview"]) <= text.PREVIEW_LENGTH
+    assert job["description_text"].startswith("word word")
+
+    with patch("text.html_to_text") as convert:
+        again = text.prepare_job({"slug": "a", "description": job["description"]})
+        convert.assert_not_called()
+    assert again["preview"] == job["preview"]
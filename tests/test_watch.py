@@ -0,0 +1,93 @@
+import json
+import sys
+import time
+
+from conftest import make_job
+
+from filterspec import FilterSpec
+from main import main
+from watch import PollSchedule, RecentJobs, Watcher
+
+
+class FixedRandom:
+    def uniform(self, low, high):
+        return high
+
+
+def test_poll_schedule_adapts_and_backs_off():
+    schedule = PollSchedule(min_interval=10, max_interval=30, rng=FixedRandom())
+    schedule.succeeded([])
+    schedule.succeeded([])
+    schedule.succeeded([])
+    assert schedule.next_delay() == 30 * 1.2
+    schedule.succeeded(["new job"])
+    assert schedule.next_delay() == 10 * 1.2
+    schedule.failed()
+    schedule.failed()
+    assert schedule.next_delay() == 40 * 1.2
+
+
+def test_watcher_reports_only_new_matching_jobs(fake_api):
+    watcher = Watcher(FilterSpec(job_types=["internship"]))
+    assert watcher.poll() == []
+    fake_api.jobs[:0] = [
+        make_job(1000, job_types=["internship"]),
+        make_job(1001, job_types=["full time"]),
+    ]
+    assert [job["slug"] for job in watcher.poll()] == ["job-1000"]
+    fake_api.requested_pages.clear()
+    assert watcher.poll() == []
+    assert fake_api.requested_pages == [1]
+
+
+def test_recent_jobs_stay_bounded_and_skip_reposts():
+    def posting(n, fingerprint):
+        return make_job(
+            n, company_name="Acme", title="Engineer", fingerprint=fingerprint
+        )
+
+    recent = RecentJobs(capacity=10)
+    assert recent.add(posting(0, 1234))
+    assert not recent.add(posting(1, 1234 ^ 1))
+    for n in range(2, 100):
+        recent.add(make_job(n, fingerprint=n << 40))
+    assert len(recent) == 10
+    assert len(recent._window) == 10
+    assert recent.add(posting(100, 1234))
+
+
+def test_cli_watch_writes_new_jobs_to_file_and_hook(
+    fake_api, monkeypatch, tmp_path, capsys
+):
+    output = tmp_path / "new.jsonl"
+    hooked = tmp_path / "hooked.jsonl"
+    script = "import sys; open(sys.argv[1], 'w').write(sys.stdin.read())"
+    hook = f'{sys.executable} -c "{script}" {hooked}'
+    polls = []
+
+    def fake_sleep(seconds):
+        polls.append(seconds)
+        if len(polls) == 1:
+            fake_api.jobs.insert(0, make_job(2000, title="Rust Developer"))
+        else:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(time, "sleep", fake_sleep)
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "main.py",
+            "--watch",
+            "--keywords",
+            "rust",
+            "--output",
+            str(output),
+            "--on-new",
+            hook,
+        ],
+    )
+    main()
+    assert [json.loads(line)["slug"] for line in output.open()] == ["job-2000"]
+    assert hooked.read_text() == output.read_text()
+    assert capsys.readouterr().out == ""
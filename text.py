@@ -0,0 +1,84 @@
+import hashlib
+import html
+import re
+import threading
+from collections import OrderedDict
+
+PREVIEW_LENGTH = 200
+MEMO_SIZE = 20_000
+
+BLOCK_TAG_RE = re.compile(
+    r"</?(?:p|div|br|li|ul|ol|h[1-6]|tr|table|section|article|blockquote)\b[^>]*>",
+    re.IGNORECASE,
+)
+TAG_RE = re.compile(r"<[^>]*>")
+# Markup the regex fast path cannot safely handle.
+COMPLEX_MARKUP_RE = re.compile(r"<(?:script|style|!--|!\[CDATA\[)", re.IGNORECASE)
+SPACES_RE = re.compile(r"[ \t\r\f\v\xa0]+")
+BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def _parse_with_soup(markup):
+    from bs4 import BeautifulSoup  # type: ignore
+
+    return BeautifulSoup(markup, "lxml").get_text("\n")
+
+
+def html_to_text(markup):
+    """Convert an HTML job description into plain text.
+
+    Descriptions are simple formatted fragments, so tags are stripped with
+    regular expressions. Markup with scripts, styles, comments or stray angle
+    brackets falls back to a full BeautifulSoup parse.
+    """
+    if not markup:
+        return ""
+    text = None
+    if not COMPLEX_MARKUP_RE.search(markup):
+        stripped = TAG_RE.sub("", BLOCK_TAG_RE.sub("\n", markup))
+        if "<" not in stripped and ">" not in stripped:
+            text = html.unescape(stripped)
+    if text is None:
+        text = _parse_with_soup(markup)
+    text = SPACES_RE.sub(" ", text)
+    text = "\n".join(line.strip() for line in text.split("\n"))
+    return BLANK_LINES_RE.sub("\n\n", text).strip()
+
+
+def make_preview(text, length=PREVIEW_LENGTH):
+    return " ".join(text[: length * 2].split())[:length].strip()
+
+
+def prepare_job(job):
+    """Add ``description_text`` and ``preview`` fields to ``job`` in place.
+
+    Conversions are memoized by slug and a hash of the description, so jobs
+    seen again (re-fetched pages, cache hits) skip the HTML work entirely.
+    """
+    if "description_text" in job:
+        return job
+    description = job.get("description") or ""
+    digest = hashlib.blake2b(description.encode(), digest_size=16).digest()
+    key = (job.get("slug"), digest)
+    with _memo_lock:
+        cached = _memo.get(key)
+        if cached is not None:
+            _memo.move_to_end(key)
+    if cached is None:
+        text = html_to_text(description)
+        cached = (text, make_preview(text))
+        with _memo_lock:
+            _memo[key] = cached
+            if len(_memo) > MEMO_SIZE:
+                _memo.popitem(last=False)
+    job["description_text"], job["preview"] = cached
+    return job
+
+
+def prepare_jobs(jobs):
+    for job in jobs:
+        prepare_job(job)
+    return jobs
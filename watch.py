@@ -0,0 +1,257 @@
+import json
+import random
+import shlex
+import subprocess
+import sys
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from jobs import PAGE_SIZE, fetch_jobs, get_sources
+from metrics import increment, span
+from store import job_key
+
+# Seconds between polls: the interval shrinks back to the minimum as soon as
+# a poll finds new jobs and grows towards the maximum while nothing changes.
+MIN_INTERVAL = 60
+MAX_INTERVAL = 900
+GROWTH = 1.5
+# Consecutive failures double the delay up to this many seconds.
+MAX_BACKOFF = 3600
+# Every delay is randomized by up to this fraction so that watchers started
+# together do not poll in lockstep.
+JITTER = 0.2
+# Jobs remembered to tell new postings from seen ones. Polls stop at the
+# first page holding a seen job, so a few pages' worth per board is plenty.
+SEEN_CAPACITY = 20 * PAGE_SIZE
+
+
+class PollSchedule:
+    """Adaptive, jittered delays between polls."""
+
+    def __init__(
+        self,
+        min_interval=MIN_INTERVAL,
+        max_interval=MAX_INTERVAL,
+        max_backoff=MAX_BACKOFF,
+        jitter=JITTER,
+        rng=random,
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.max_backoff = max(max_backoff, self.max_interval)
+        self.jitter = jitter
+        self.interval = min_interval
+        self.failures = 0
+        self._rng = rng
+
+    def succeeded(self, new_jobs):
+        self.failures = 0
+        if new_jobs:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * GROWTH, self.max_interval)
+
+    def failed(self):
+        self.failures += 1
+
+    def next_delay(self):
+        delay = self.interval
+        if self.failures:
+            delay = min(delay * 2**self.failures, self.max_backoff)
+        return delay * self._rng.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+class RecentJobs:
+    """The last ``capacity`` jobs seen, for spotting new and duplicate posts.
+
+    Near-duplicates are found with a :class:`dedupe.Deduplicator` that is
+    rebuilt from the window whenever twice ``capacity`` jobs have been
+    added, so memory stays bounded however long the watch runs.
+    """
+
+    def __init__(self, capacity=SEEN_CAPACITY, collapse=True):
+        self.capacity = capacity
+        self.collapse = collapse
+        self._keys = OrderedDict()
+        self._window = deque(maxlen=capacity)  # (fingerprint, key, group)
+        self._deduplicator = None
+        self._added = 0
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def add(self, job):
+        """Remember ``job``; return False if it duplicates a recent job."""
+        from dedupe import Deduplicator, group_key
+
+        key = job_key(job)
+        if key in self._keys:
+            return False
+        self._keys[key] = None
+        if len(self._keys) > self.capacity:
+            self._keys.popitem(last=False)
+        if not self.collapse:
+            return True
+        if self._deduplicator is None or self._added >= 2 * self.capacity:
+            self._deduplicator = Deduplicator()
+            for fingerprint, other, group in self._window:
+                self._deduplicator.add(fingerprint, other, group)
+            self._added = len(self._window)
+        entry = (job["fingerprint"], key, group_key(job))
+        self._window.append(entry)
+        self._added += 1
+        return self._deduplicator.add(*entry) == key
+
+
+class Watcher:
+    """Polls the newest pages for matching jobs that were not seen before.
+
+    Pages are revalidated with conditional requests (see
+    :func:`jobs.fetch_jobs`), so a poll of an unchanged board costs one
+    ``304 Not Modified``. Paging stops at the first page holding a job seen
+    before. The first poll only records what is already on the board.
+    ``sources`` (default: the configured boards) are polled side by side.
+    """
+
+    def __init__(
+        self,
+        spec,
+        max_pages=None,
+        use_cache=True,
+        collapse=True,
+        schedule=None,
+        sources=None,
+    ):
+        self.spec = spec
+        self.max_pages = max_pages
+        self.use_cache = use_cache
+        self.schedule = schedule or PollSchedule()
+        self.sources = sources or get_sources()
+        self.recent = RecentJobs(
+            capacity=SEEN_CAPACITY * len(self.sources), collapse=collapse
+        )
+        self.primed = False
+
+    def poll(self):
+        """Fetch the newest pages once and return the new matching jobs."""
+        from filters import filter_rows
+        from jobtable import JobTable
+
+        with span("watch.poll"):
+            if len(self.sources) == 1:
+                fresh = self._poll_source(self.sources[0])
+            else:
+                with ThreadPoolExecutor(max_workers=len(self.sources)) as executor:
+                    polled = executor.map(self._poll_source, self.sources)
+                    fresh = [job for jobs in polled for job in jobs]
+                fresh.sort(key=lambda job: job.get("created_at") or 0, reverse=True)
+            # Oldest first, so the earliest of a set of reposts is the one kept
+            # and output files read chronologically. Jobs are only remembered
+            # once the whole poll has succeeded.
+            unseen = [job for job in reversed(fresh) if self.recent.add(job)]
+            if not self.primed:
+                self.primed = True
+                return []
+            table = JobTable.from_records(unseen)
+            matches = table.records(filter_rows(table, self.spec))
+        increment("watch.new_jobs", len(matches))
+        return matches
+
+    def _poll_source(self, source):
+        """Return the jobs of ``source`` not seen before, newest first."""
+        fresh = []
+        page = 1
+        while self.max_pages is None or page <= self.max_pages:
+            jobs = fetch_jobs(
+                page, use_cache=self.use_cache, refresh=True, source=source
+            )
+            page_fresh = [job for job in jobs if job_key(job) not in self.recent]
+            fresh.extend(page_fresh)
+            # Newer jobs push older ones down the pages, so a page holding a
+            # job seen before is the last one with anything new on it.
+            # Priming only needs page 1 for the same reason.
+            if (
+                not self.primed
+                or source.page_size is None
+                or len(page_fresh) < source.page_size
+            ):
+                break
+            page += 1
+        return fresh
+
+    def run(self, on_new, polls=None, sleep=None, log=None):
+        """Poll until interrupted (or ``polls`` times), passing new jobs on.
+
+        Failed polls are reported to ``log`` (stderr) and retried with backoff.
+        """
+        sleep = sleep or time.sleep
+        log = log or sys.stderr
+        count = 0
+        while polls is None or count < polls:
+            count += 1
+            try:
+                matches = self.poll()
+            except Exception as e:
+                self.schedule.failed()
+                increment("watch.errors")
+                print(f"Poll failed: {e}", file=log)
+            else:
+                self.schedule.succeeded(matches)
+                if matches:
+                    on_new(matches)
+            if polls is None or count < polls:
+                sleep(self.schedule.next_delay())
+
+
+def terminal_sink(out):
+    """Print one plain line per new job, as ``main.py --format table`` would."""
+
+    def emit(jobs):
+        stamp = datetime.now().strftime("%H:%M:%S")
+        for job in jobs:
+            out.write(
+                f"{stamp}  {job.get('company_name') or 'N/A'} — "
+                f"{job.get('title') or 'N/A'} ({job.get('location') or 'N/A'})  "
+                f"{job.get('url') or ''}\n"
+            )
+        out.flush()
+
+    return emit
+
+
+def jsonl_sink(out, project):
+    """Write each new job as one JSON line and flush it straight away."""
+
+    def emit(jobs):
+        for job in jobs:
+            out.write(json.dumps(project(job), ensure_ascii=False) + "\n")
+        out.flush()
+
+    return emit
+
+
+def command_sink(command, project, log=None):
+    """Run ``command`` once per poll with the new jobs as JSONL on stdin."""
+    argv = shlex.split(command)
+    log = log or sys.stderr
+
+    def emit(jobs):
+        lines = "".join(
+            json.dumps(project(job), ensure_ascii=False) + "\n" for job in jobs
+        )
+        try:
+            result = subprocess.run(argv, input=lines, text=True, check=False)
+        except OSError as e:
+            increment("watch.hook_errors")
+            print(f"Could not run {command!r}: {e}", file=log)
+            return
+        if result.returncode:
+            increment("watch.hook_errors")
+            print(f"{command!r} exited with status {result.returncode}", file=log)
+
+    return emit